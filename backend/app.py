@@ -1,14 +1,24 @@
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
+import sys
+import io
+import csv
+import json
+import copy
+import base64
+import time
+import threading
+import multiprocessing
 from flask_bcrypt import Bcrypt
 from flask_migrate import Migrate
 import jwt
 from datetime import datetime, timedelta
 import pandas as pd
 from flask import request, jsonify
+from sqlalchemy.exc import IntegrityError
 from flask_jwt_extended import (
     JWTManager,
     jwt_required,
@@ -16,6 +26,14 @@ from flask_jwt_extended import (
     create_access_token
 )
 
+# 保证以 backend.app 方式导入时（如导入脚本）也能找到同级模块
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# 数据导入接口按 backend.database_import 导入导入脚本，脚本再以 backend.app 导入本模块；
+# 直接运行 app.py 时让 backend.app 指向当前模块，导入脚本使用同一个应用和数据库实例
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.modules.setdefault('backend.app', sys.modules[__name__])
+from services import runtime_path, get_data_version, bump_data_version, get_registration_version, bump_registration_version, get_rewrite_version, bump_rewrite_version, RankIndex, VersionedLRUCache, StudentSearchIndex, JobStore, ResultCache
+
 # 修复Windows下KMeans内存泄漏警告
 if os.name == 'nt':  # Windows系统
     os.environ['OMP_NUM_THREADS'] = '1'
@@ -34,7 +52,8 @@ jwt_manager = JWTManager(app)
 app.config['JSONIFY_PRETTYPRINT_REGULAR'] = False
 CORS(app, resources={r"/*": {"origins": ["http://localhost:5173", "http://127.0.0.1:5173"]}}, supports_credentials=True)
 
-app.config['SQLALCHEMY_DATABASE_URI'] = (
+# DATABASE_URL 可指定其他数据库（如测试使用的 SQLite），未设置时连接 MySQL
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL') or (
     f"mysql+pymysql://{os.getenv('MYSQL_USER')}:{os.getenv('MYSQL_PASSWORD')}@"
     f"{os.getenv('MYSQL_HOST')}/{os.getenv('MYSQL_DB')}?charset=utf8mb4"
 )
@@ -87,7 +106,7 @@ def _build_cors_preflight_response():
 class User(db.Model):
     __tablename__ = 'users' # 存储用户数据
     id = db.Column(db.String(80), primary_key=True)
-    name = db.Column(db.String(80), nullable=False)
+    name = db.Column(db.String(80), nullable=False, index=True)
     password = db.Column(db.String(255), nullable=False)
     phone_number = db.Column(db.String(11), nullable=False)
     role = db.Column(db.String(15), default='user')
@@ -159,10 +178,698 @@ class HomeworkStatistic(db.Model):
     score9 = db.Column(db.Float)
     user = db.relationship('User', backref='homework_statistic')
 
+class CohortStat(db.Model):
+    __tablename__ = 'cohort_stats' # 全体学生汇总统计（物化结果，由数据导入后刷新）
+    id = db.Column(db.String(20), primary_key=True)
+    user_count = db.Column(db.Integer, nullable=False, default=0)
+    active_users = db.Column(db.Integer, nullable=False, default=0) # 讨论数大于3的学生数
+    avg_comprehensive_score = db.Column(db.Float(precision=53))
+    max_comprehensive_score = db.Column(db.Float(precision=53))
+    min_comprehensive_score = db.Column(db.Float(precision=53))
+    avg_exam_score = db.Column(db.Float(precision=53))
+    max_exam_score = db.Column(db.Float(precision=53))
+    min_exam_score = db.Column(db.Float(precision=53))
+    excellent_count = db.Column(db.Integer, nullable=False, default=0) # 综合成绩 >= 90
+    good_count = db.Column(db.Integer, nullable=False, default=0) # 80-90
+    medium_count = db.Column(db.Integer, nullable=False, default=0) # 70-80
+    pass_count = db.Column(db.Integer, nullable=False, default=0) # 60-70
+    fail_count = db.Column(db.Integer, nullable=False, default=0) # < 60
+    data_version = db.Column(db.String(32))
+    updated_at = db.Column(db.DateTime)
+
+class StudentRecommendation(db.Model):
+    __tablename__ = 'student_recommendations' # 个性化推荐（物化结果，由数据导入后批量刷新）
+    id = db.Column(db.String(80), primary_key=True) # 学号
+    recommendations = db.Column(db.Text, nullable=False) # 推荐内容JSON
+    updated_at = db.Column(db.DateTime)
+
+class MaterializedVersion(db.Model):
+    __tablename__ = 'materialized_versions' # 物化表的数据版本（每张表一行，整表共用一个版本标记）
+    id = db.Column(db.String(80), primary_key=True) # 物化表名
+    data_version = db.Column(db.String(32), nullable=False)
+    updated_at = db.Column(db.DateTime)
+
 with app.app_context():
     db.create_all()
 
 
+class StudentProfile:
+    """
+    学生画像：一次查询得到的用户及其各项 1:1 数据记录
+    同时提供与 User 关系属性同名的列表接口，可直接传给 ml_services 中的模型
+    """
+    __slots__ = ('user', 'synthesis', 'homework', 'exam', 'discussion', 'video', 'offline')
+
+    def __init__(self, user, synthesis, homework, exam, discussion, video, offline):
+        self.user = user
+        self.synthesis = synthesis
+        self.homework = homework
+        self.exam = exam
+        self.discussion = discussion
+        self.video = video
+        self.offline = offline
+
+    @property
+    def id(self):
+        return self.user.id
+
+    @property
+    def name(self):
+        return self.user.name
+
+    @property
+    def role(self):
+        return self.user.role
+
+    @property
+    def synthesis_grades(self):
+        return [self.synthesis] if self.synthesis else []
+
+    @property
+    def homework_statistic(self):
+        return [self.homework] if self.homework else []
+
+    @property
+    def exam_statistic(self):
+        return [self.exam] if self.exam else []
+
+    @property
+    def discussion_participation(self):
+        return [self.discussion] if self.discussion else []
+
+    @property
+    def video_watching_details(self):
+        return [self.video] if self.video else []
+
+    @property
+    def offline_grades(self):
+        return [self.offline] if self.offline else []
+
+
+def _student_profile_query():
+    return db.session.query(
+        User, SynthesisGrade, HomeworkStatistic, ExamStatistic,
+        DiscussionParticipation, VideoWatchingDetail, OfflineGrade
+    ).outerjoin(SynthesisGrade, User.id == SynthesisGrade.id)\
+     .outerjoin(HomeworkStatistic, User.id == HomeworkStatistic.id)\
+     .outerjoin(ExamStatistic, User.id == ExamStatistic.id)\
+     .outerjoin(DiscussionParticipation, User.id == DiscussionParticipation.id)\
+     .outerjoin(VideoWatchingDetail, User.id == VideoWatchingDetail.id)\
+     .outerjoin(OfflineGrade, User.id == OfflineGrade.id)
+
+
+def load_student_profile(student_id):
+    """通过一次 LEFT JOIN 查询加载学生的全部 1:1 数据，用户不存在时返回None"""
+    row = _student_profile_query().filter(User.id == student_id).first()
+    return StudentProfile(*row) if row else None
+
+
+def load_student_profiles(student_ids=None):
+    """批量加载学生画像，student_ids 为None时加载全部学生（排除管理员）"""
+    query = _student_profile_query().filter(User.role != 'admin')
+    if student_ids is not None:
+        query = query.filter(User.id.in_(student_ids))
+    return [StudentProfile(*row) for row in query.order_by(User.id)]
+
+
+# 列式加载每次从数据库读取的行数
+STUDENT_COLUMNS_CHUNK_SIZE = 2000
+
+
+def load_student_columns(student_ids=None, chunk_size=STUDENT_COLUMNS_CHUNK_SIZE):
+    """
+    通过一次 LEFT JOIN 只读取特征计算所需的数值列，按块流式转换为 StudentColumns（排除管理员）
+    不构建 ORM 对象，适合模型训练和批量分析等需要全体学生数据的场景
+    """
+    from ml_services import StudentColumns
+    from ml_services.feature_engine import RELATION_FIELDS
+    tables = {
+        'homework_statistic': HomeworkStatistic,
+        'discussion_participation': DiscussionParticipation,
+        'video_watching_details': VideoWatchingDetail,
+        'synthesis_grades': SynthesisGrade
+    }
+    value_columns = [getattr(tables[relation], field) for relation, fields in RELATION_FIELDS for field in fields]
+    query = db.select(User.id, HomeworkStatistic.id, SynthesisGrade.id, *value_columns)\
+        .select_from(User)\
+        .outerjoin(HomeworkStatistic, User.id == HomeworkStatistic.id)\
+        .outerjoin(DiscussionParticipation, User.id == DiscussionParticipation.id)\
+        .outerjoin(VideoWatchingDetail, User.id == VideoWatchingDetail.id)\
+        .outerjoin(SynthesisGrade, User.id == SynthesisGrade.id)\
+        .where(User.role != 'admin')
+    if student_ids is not None:
+        query = query.where(User.id.in_(student_ids))
+    result = db.session.execute(query.order_by(User.id).execution_options(yield_per=chunk_size))
+    return StudentColumns.from_row_chunks(result.partitions())
+
+
+# 特征存储：导入数据后预先计算全部学生的特征，训练和推理直接读取
+# 不影响特征的数据来源只需将已有特征沿用到新数据版本
+FEATURE_UNAFFECTED_SOURCES = ('exam_statistic', 'offline_grades')
+# 只新增学生、不修改已有学生学习数据的数据来源，已训练的模型可只用新增学生增量更新
+STUDENT_ADDING_SOURCES = ('users',)
+_feature_store = None
+
+
+def _get_feature_store():
+    global _feature_store
+    if _feature_store is None:
+        from ml_services import FeatureStore
+        _feature_store = FeatureStore(runtime_path('student_features.npz'))
+    return _feature_store
+
+
+def load_student_features(student_ids=None):
+    """读取预先计算的学生特征（排除管理员），特征存储过期时从数据库重新计算"""
+    features = _get_feature_store().get(get_data_version(), load_student_columns)
+    if student_ids is not None:
+        features = features.select(student_ids)
+    return features
+
+
+def refresh_feature_store(source=None, previous_version=None):
+    """数据变化后更新特征存储"""
+    store = _get_feature_store()
+    data_version = get_data_version()
+    if source in FEATURE_UNAFFECTED_SOURCES and store.restamp(previous_version, data_version):
+        return
+    store.refresh(data_version, load_student_columns())
+
+
+# 推荐表的整表版本标记在 materialized_versions 中的主键
+RECOMMENDATIONS_VERSION_KEY = 'student_recommendations'
+
+
+def refresh_student_recommendations(source=None, previous_version=None):
+    """
+    批量计算全部学生的个性化推荐并整体替换推荐表，返回写入的学生数（沿用已有结果时返回0）
+    推荐表整表共用 materialized_versions 中的一个版本标记；不影响推荐内容的数据来源只需更新该标记
+    """
+    from ml_services import PersonalizedRecommendation
+    data_version = get_data_version()
+    if source in FEATURE_UNAFFECTED_SOURCES and previous_version is not None:
+        restamped = MaterializedVersion.query\
+            .filter_by(id=RECOMMENDATIONS_VERSION_KEY, data_version=previous_version)\
+            .update({'data_version': data_version, 'updated_at': datetime.now()}, synchronize_session=False)
+        db.session.commit()
+        if restamped:
+            return 0
+    
+    columns = load_student_columns()
+    start = time.perf_counter()
+    bodies = PersonalizedRecommendation().batch_recommendation_json(columns)
+    elapsed = time.perf_counter() - start
+    now = datetime.now()
+    db.session.execute(db.delete(StudentRecommendation))
+    if bodies:
+        db.session.execute(db.insert(StudentRecommendation), [
+            {'id': student_id, 'recommendations': body, 'updated_at': now}
+            for student_id, body in bodies
+        ])
+    # 推荐内容与版本标记在同一事务中更新
+    version = db.session.get(MaterializedVersion, RECOMMENDATIONS_VERSION_KEY)
+    if version is None:
+        db.session.add(MaterializedVersion(id=RECOMMENDATIONS_VERSION_KEY, data_version=data_version, updated_at=now))
+    else:
+        version.data_version = data_version
+        version.updated_at = now
+    db.session.commit()
+    app.logger.info(
+        f'个性化推荐表已刷新: {len(bodies)} 名学生, 规则计算耗时 {elapsed:.3f}s'
+        f'（{len(bodies) / max(elapsed, 1e-9):.0f} 名/秒）, 总耗时 {time.perf_counter() - start:.3f}s'
+    )
+    return len(bodies)
+
+
+# 汇总统计物化表：只有一行，按数据来源刷新受影响的部分
+COHORT_STATS_KEY = 'all'
+COHORT_SECTIONS = ('users', 'synthesis', 'exam', 'discussion')
+# 各数据来源影响的统计部分，未列出的来源刷新全部
+COHORT_SECTIONS_BY_SOURCE = {
+    'synthesis_grades': ('synthesis',),
+    'exam_statistic': ('exam',),
+    'discussion_participation': ('discussion',),
+    'homework_statistic': (),
+    'video_watching_details': (),
+    'offline_grades': ()
+}
+# 成绩等级与物化表字段的对应关系
+COHORT_GRADE_LEVELS = [
+    ('优秀', 'excellent_count'),
+    ('良好', 'good_count'),
+    ('中等', 'medium_count'),
+    ('及格', 'pass_count'),
+    ('不及格', 'fail_count')
+]
+COHORT_STAT_FIELDS = [
+    'user_count', 'active_users',
+    'avg_comprehensive_score', 'max_comprehensive_score', 'min_comprehensive_score',
+    'avg_exam_score', 'max_exam_score', 'min_exam_score'
+] + [field for _, field in COHORT_GRADE_LEVELS]
+
+
+def _grade_level_case():
+    return db.case(
+        (SynthesisGrade.comprehensive_score >= 90, '优秀'),
+        (SynthesisGrade.comprehensive_score >= 80, '良好'),
+        (SynthesisGrade.comprehensive_score >= 70, '中等'),
+        (SynthesisGrade.comprehensive_score >= 60, '及格'),
+        (db.true(), '不及格'),
+        else_='不及格'
+    )
+
+
+def _compute_cohort_sections(sections):
+    """从基础表计算指定部分的汇总统计（排除管理员），返回 {字段: 值}"""
+    values = {}
+    if 'users' in sections:
+        values['user_count'] = db.session.query(db.func.count(User.id))\
+            .filter(User.role != 'admin').scalar() or 0
+    
+    if 'synthesis' in sections:
+        stats = db.session.query(
+            db.func.avg(SynthesisGrade.comprehensive_score),
+            db.func.max(SynthesisGrade.comprehensive_score),
+            db.func.min(SynthesisGrade.comprehensive_score)
+        ).join(User, User.id == SynthesisGrade.id)\
+         .filter(User.role != 'admin').first()
+        values['avg_comprehensive_score'] = float(stats[0]) if stats[0] is not None else None
+        values['max_comprehensive_score'] = float(stats[1]) if stats[1] is not None else None
+        values['min_comprehensive_score'] = float(stats[2]) if stats[2] is not None else None
+        
+        level = _grade_level_case()
+        distribution = dict(
+            db.session.query(level, db.func.count())
+            .join(User, User.id == SynthesisGrade.id)
+            .filter(User.role != 'admin')
+            .group_by(level).all()
+        )
+        for name, field in COHORT_GRADE_LEVELS:
+            values[field] = distribution.get(name, 0)
+    
+    if 'exam' in sections:
+        stats = db.session.query(
+            db.func.avg(ExamStatistic.score),
+            db.func.max(ExamStatistic.score),
+            db.func.min(ExamStatistic.score)
+        ).join(User, User.id == ExamStatistic.id)\
+         .filter(User.role != 'admin').first()
+        values['avg_exam_score'] = float(stats[0]) if stats[0] is not None else None
+        values['max_exam_score'] = float(stats[1]) if stats[1] is not None else None
+        values['min_exam_score'] = float(stats[2]) if stats[2] is not None else None
+    
+    if 'discussion' in sections:
+        values['active_users'] = db.session.query(db.func.count(User.id))\
+            .join(DiscussionParticipation, User.id == DiscussionParticipation.id)\
+            .filter(User.role != 'admin', DiscussionParticipation.total_discussions > 3)\
+            .scalar() or 0
+    return values
+
+
+def refresh_cohort_stats(sections=None, previous_version=None):
+    """
+    刷新汇总统计物化表
+    sections: 需要重新计算的部分，默认全部
+    previous_version: 本次数据变更前的数据版本；物化结果不是基于该版本时，说明之前有刷新被遗漏，改为全量刷新
+    """
+    row = db.session.get(CohortStat, COHORT_STATS_KEY)
+    created = row is None
+    if created or sections is None or (previous_version is not None and row.data_version != previous_version):
+        sections = COHORT_SECTIONS
+    values = _compute_cohort_sections(sections)
+    if created:
+        row = CohortStat(id=COHORT_STATS_KEY)
+        db.session.add(row)
+    
+    for field, value in values.items():
+        setattr(row, field, value)
+    row.data_version = get_data_version()
+    row.updated_at = datetime.now()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        if not created:
+            raise
+        # 其他进程同时插入了汇总行，重新读取后在该行上全量刷新
+        db.session.rollback()
+        return refresh_cohort_stats()
+    return row
+
+
+def check_cohort_stats():
+    """从基础表重新计算汇总统计并与物化结果比较，返回不一致的字段列表 [(字段, 物化值, 实际值)]"""
+    row = db.session.get(CohortStat, COHORT_STATS_KEY)
+    expected = _compute_cohort_sections(COHORT_SECTIONS)
+    differences = []
+    for field in COHORT_STAT_FIELDS:
+        stored = getattr(row, field) if row else None
+        actual = expected[field]
+        if stored is None or actual is None:
+            consistent = stored is None and actual is None
+        else:
+            consistent = abs(stored - actual) <= 1e-6 * max(1.0, abs(actual))
+        if not consistent:
+            differences.append((field, stored, actual))
+    return differences
+
+
+def student_list_version():
+    """
+    学生名单版本：数据导入或用户注册后都会变化
+    管理员看板缓存和搜索索引按它失效；模型、特征等只依赖学习数据的结果仍按数据版本失效
+    """
+    return f'{get_data_version()}.{get_registration_version()}'
+
+
+def mark_data_changed(source=None):
+    """数据导入后调用：更新数据版本，使已训练模型等派生数据失效，并刷新汇总统计、特征存储和个性化推荐表"""
+    previous_version = get_data_version()
+    if source not in STUDENT_ADDING_SOURCES + FEATURE_UNAFFECTED_SOURCES:
+        # 已有学生的数据可能被修改，先于数据版本更新，保证读到新数据版本的请求不会增量更新旧模型
+        bump_rewrite_version()
+    version = bump_data_version()
+    _admin_stats_cache.clear()
+    try:
+        refresh_cohort_stats(COHORT_SECTIONS_BY_SOURCE.get(source, COHORT_SECTIONS), previous_version)
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f'汇总统计刷新失败: {str(e)}', exc_info=True)
+    try:
+        refresh_feature_store(source, previous_version)
+    except Exception as e:
+        # 特征存储过期后会在下次读取时重建
+        app.logger.error(f'特征存储刷新失败: {str(e)}', exc_info=True)
+    try:
+        refresh_student_recommendations(source, previous_version)
+    except Exception as e:
+        # 推荐表过期时接口按需为单个学生计算
+        db.session.rollback()
+        app.logger.error(f'个性化推荐刷新失败: {str(e)}', exc_info=True)
+    app.logger.info(f'数据已更新({source or "未知来源"})，新数据版本: {version}')
+    return version
+
+
+@app.cli.command('refresh-cohort-stats')
+def refresh_cohort_stats_command():
+    """从基础表全量重新计算汇总统计"""
+    row = refresh_cohort_stats()
+    print(f'汇总统计已刷新: 学生数 {row.user_count}, 数据版本 {row.data_version}')
+
+
+@app.cli.command('check-cohort-stats')
+def check_cohort_stats_command():
+    """检查汇总统计物化结果与基础表是否一致，不一致时以非零状态退出"""
+    differences = check_cohort_stats()
+    if not differences:
+        print('汇总统计与基础表一致')
+        return
+    for field, stored, actual in differences:
+        print(f'{field}: 物化值={stored}, 实际值={actual}')
+    print('汇总统计与基础表不一致，可运行 flask refresh-cohort-stats 修复')
+    sys.exit(1)
+
+
+@app.cli.command('refresh-recommendations')
+def refresh_recommendations_command():
+    """为全部学生重新计算个性化推荐表"""
+    count = refresh_student_recommendations()
+    print(f'个性化推荐表已刷新: 学生数 {count}, 数据版本 {get_data_version()}')
+
+
+@app.cli.command('refresh-feature-store')
+def refresh_feature_store_command():
+    """从基础表重新计算特征存储"""
+    features = _get_feature_store().refresh(get_data_version(), load_student_columns())
+    print(f'特征存储已刷新: 学生数 {len(features)}, 特征版本 {features.feature_version}, 数据版本 {features.data_version}')
+
+
+# 已训练模型管理
+_model_registry = None
+_model_server = None
+_model_training_lock = threading.Lock()
+# 聚类数选择方式：tiers 按样本量分档（默认），auto 按抽样轮廓系数自动选择
+CLUSTER_K_SELECTION = os.getenv('CLUSTER_K_SELECTION', 'tiers')
+# 模型文件的映射方式：默认 r（只读映射，多个 gunicorn worker 共享同一份模型数组），设为空时整体读入内存
+MODEL_MMAP_MODE = os.getenv('MODEL_MMAP_MODE', 'r') or None
+# 检查模型清单是否有新版本的间隔（秒），训练任务保存的新模型在该间隔内切换到各 worker
+MODEL_POLL_INTERVAL = float(os.getenv('MODEL_POLL_INTERVAL', '2'))
+
+
+def _get_model_registry():
+    """获取模型注册表（延迟导入ML模块）"""
+    global _model_registry
+    if _model_registry is None:
+        from ml_services import ModelRegistry
+        _model_registry = ModelRegistry(runtime_path('models'), mmap_mode=MODEL_MMAP_MODE)
+    return _model_registry
+
+
+def _get_model_server():
+    """获取模型热更新服务，并确保后台检查线程在当前进程中运行"""
+    global _model_server
+    if _model_server is None:
+        from ml_services import ModelServer
+        _model_server = ModelServer(
+            _get_model_registry(),
+            {name: (lambda name=name: _create_ml_model(name)) for name, _ in TRAINING_MODELS},
+            poll_interval=MODEL_POLL_INTERVAL
+        )
+    _model_server.start()
+    return _model_server
+
+
+def _create_ml_model(name, **kwargs):
+    """根据注册名创建空模型"""
+    from ml_services import GradePredictionModel, LearningBehaviorClustering, AnomalyDetector
+    factories = {
+        'prediction_model': GradePredictionModel,
+        'clustering_model': LearningBehaviorClustering,
+        'anomaly_model': AnomalyDetector
+    }
+    return factories[name](**kwargs)
+
+
+def _model_train_options(name, data_version):
+    """
+    全量训练参数，格式与 ml_services.train_models 的 model_options 相同
+    聚类模型按 CLUSTER_K_SELECTION 选择聚类数；同一数据版本下已自动选出的聚类数直接沿用，不再重新选择
+    """
+    if name != 'clustering_model':
+        return {}
+    options = {'init': {'k_selection': CLUSTER_K_SELECTION}}
+    entry = _get_model_registry().get_entry(name) or {}
+    if CLUSTER_K_SELECTION == 'auto' and entry.get('k_data_version') == data_version:
+        options['train'] = {'n_clusters': entry['n_clusters']}
+    return options
+
+
+def _model_metadata(model, data_version):
+    """保存模型时写入清单的附加信息"""
+    from ml_services import FEATURE_VERSION
+    metadata = {'feature_version': FEATURE_VERSION}
+    if getattr(model, 'k_source', None) in ('auto', 'preset'):
+        # 记录本数据版本自动选出的聚类数，供同一数据版本下的重新训练沿用
+        metadata.update(n_clusters=model.n_clusters, k_data_version=data_version)
+    return metadata
+
+
+def _can_update_incrementally(entry):
+    """
+    模型保存后是否只新增了学生（或只修改了不影响特征的数据），是则可以只用新增学生增量更新
+    已有学生的学习数据被修改后，增量更新不会反映这些修改，必须全量训练
+    """
+    try:
+        return int(entry.get('data_version') or 0) > int(get_rewrite_version())
+    except ValueError:
+        return False
+
+
+def _get_current_model(name):
+    """模型热更新服务当前提供的、基于当前数据版本和特征版本训练的模型，没有时返回None（不训练）"""
+    from ml_services import FEATURE_VERSION
+    entry, model = _get_model_server().get(name)
+    if model is None or entry.get('feature_version') != FEATURE_VERSION or entry.get('data_version') != get_data_version():
+        return None
+    return model
+
+
+def _get_trained_model(name, users=None):
+    """
+    获取基于当前数据版本训练的模型
+    优先使用模型热更新服务当前提供的模型；数据版本变化时，若之后只新增了学生则在已有模型基础上增量更新，
+    已有学生的数据被修改或尚无模型时全量训练
+    users: 需要训练时使用的全部学生数据，默认读取特征存储
+    """
+    from ml_services import FEATURE_VERSION
+    model = _get_current_model(name)
+    if model is not None:
+        return model
+    server = _get_model_server()
+    data_version = get_data_version()
+
+    def served_model(data_version=None):
+        """返回 (清单条目, 模型)，没有符合条件的模型时返回 (None, None)"""
+        entry, model = server.get(name)
+        if model is None or entry.get('feature_version') != FEATURE_VERSION:
+            return None, None
+        if data_version is not None and entry.get('data_version') != data_version:
+            return None, None
+        return entry, model
+
+    with _model_training_lock:
+        # 等待锁期间其他请求或训练任务可能已保存了新版本，不等后台检查立即加载
+        server.refresh()
+        _, model = served_model(data_version)
+        if model is not None:
+            return model
+
+        users = users if users is not None else load_student_features()
+        base_entry, base_model = served_model()
+        if base_model is not None and hasattr(base_model, 'update_model') and _can_update_incrementally(base_entry):
+            app.logger.info(f'模型 {name} 保存后只新增了学生，开始增量更新')
+            # 当前模型可能正被其他请求使用，在副本上更新
+            model = copy.deepcopy(base_model)
+            success = model.update_model(users)
+        else:
+            app.logger.info(f'模型 {name} 不存在、不支持增量更新或已有学生的数据已修改，开始重新训练')
+            options = _model_train_options(name, data_version)
+            model = _create_ml_model(name, **options.get('init', {}))
+            success = model.train_model(users, **options.get('train', {}))
+        if not success:
+            return None
+        entry = _get_model_registry().save(name, model, data_version, _model_metadata(model, data_version))
+        if entry:
+            server.publish(name, entry, model)
+        return model
+
+
+def _served_model_version(name, data_version, model=None):
+    """
+    当前提供服务、且基于该数据版本训练的模型版本号，没有时返回None
+    model: 指定时还要求提供服务的正是该模型对象
+    """
+    from ml_services import FEATURE_VERSION
+    entry, served = _get_model_server().get(name)
+    if served is None and model is None:
+        # 进程刚启动、后台检查线程尚未加载模型时，按清单中的当前版本查找，不必为读取缓存先加载模型
+        entry = _get_model_registry().get_entry(name)
+        if entry is None:
+            return None
+    elif served is None or (model is not None and served is not model):
+        return None
+    if entry.get('feature_version') != FEATURE_VERSION or entry.get('data_version') != data_version:
+        return None
+    return entry['version']
+
+
+# 整体分析结果缓存：所有 worker 共享，重启后仍有效
+_result_cache = None
+
+
+def _get_result_cache():
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(runtime_path('results.sqlite3'))
+    return _result_cache
+
+
+def _json_body_response(body, cache_status):
+    """由已序列化的JSON响应体构造响应，X-Cache 标明是否命中结果缓存"""
+    response = app.response_class(body, mimetype='application/json')
+    response.headers['X-Cache'] = cache_status
+    _add_cors_headers(response)
+    return response
+
+
+def _cached_analysis_response(endpoint, model_name, label, analyze):
+    """
+    带结果缓存的整体分析接口
+    缓存键为 (接口, 数据版本, 模型版本)，命中时直接返回保存的响应体；未命中时加载特征、分析并写入缓存
+    analyze(model, users): 返回响应数据字典，失败时返回None
+    """
+    data_version = get_data_version()
+    cache = _get_result_cache()
+    body = cache.get(endpoint, data_version, _served_model_version(model_name, data_version))
+    if body is not None:
+        return _json_body_response(body, 'HIT')
+
+    users = load_student_features()
+    if len(users) < 3:
+        response = jsonify({'error': f'数据量不足进行{label}，当前有{len(users)}个用户，至少需要3个'})
+        _add_cors_headers(response)
+        return response, 400
+
+    model = _get_trained_model(model_name, users)
+    payload = analyze(model, users) if model else None
+    if payload is None:
+        response = jsonify({'error': f'{label}失败'})
+        _add_cors_headers(response)
+        return response, 500
+
+    body = app.json.dumps(payload)
+    # 分析期间数据或模型已更新时不写入缓存
+    model_version = _served_model_version(model_name, data_version, model)
+    if model_version is not None:
+        cache.set(endpoint, data_version, model_version, body)
+    return _json_body_response(body, 'MISS')
+
+
+# 综合成绩排名索引
+_rank_index = RankIndex()
+
+
+def _rebuild_rank_index(data_version):
+    """后台线程中重建排名索引"""
+    try:
+        with app.app_context():
+            scores = [score for (score,) in db.session.query(SynthesisGrade.comprehensive_score)]
+            _rank_index.rebuild(scores, data_version)
+            app.logger.info(f'排名索引已重建: {len(scores)} 条成绩, 数据版本 {data_version}')
+    except Exception as e:
+        app.logger.error(f'排名索引重建失败: {str(e)}', exc_info=True)
+    finally:
+        _rank_index.end_rebuild()
+
+
+def _query_rank_by_window_function(student_id):
+    """索引未就绪时，使用SQL窗口函数计算单个学生的排名"""
+    ranked = db.session.query(
+        SynthesisGrade.id,
+        db.func.rank().over(order_by=SynthesisGrade.comprehensive_score.desc()).label('rank'),
+        db.func.cume_dist().over(order_by=SynthesisGrade.comprehensive_score.asc()).label('cume_dist'),
+        db.func.count().over().label('total')
+    ).subquery()
+    row = db.session.query(ranked.c.rank, ranked.c.cume_dist, ranked.c.total)\
+        .filter(ranked.c.id == student_id).first()
+    if not row:
+        return None
+    return {
+        'rank': int(row.rank),
+        'percentile': round(float(row.cume_dist) * 100, 2),
+        'total': int(row.total)
+    }
+
+
+def get_student_rank(student_id, comprehensive_score):
+    """
+    获取学生综合成绩排名
+    索引与当前数据版本一致时直接二分查找；否则使用窗口函数查询，并在后台重建索引
+    """
+    data_version = get_data_version()
+    if comprehensive_score is None:
+        # 没有综合成绩的学生不参与排名
+        total = _rank_index.total if _rank_index.is_current(data_version) \
+            else SynthesisGrade.query.count()
+        return {'rank': 0, 'percentile': 0, 'total': total}
+
+    if _rank_index.is_current(data_version):
+        return _rank_index.lookup(comprehensive_score)
+
+    if _rank_index.try_begin_rebuild():
+        threading.Thread(target=_rebuild_rank_index, args=(data_version,), daemon=True).start()
+    return _query_rank_by_window_function(student_id) or _rank_index.lookup(comprehensive_score)
+
+
 @app.route('/api/get', methods=['GET'])
 def api_get():
     query = request.args
@@ -226,7 +933,12 @@ def register():
             phone_number=data['phone_number']
         )
         db.session.add(new_user)
+        # 新学生还没有学习数据，只需把汇总统计中的学生数加一，不重新计算其他统计
+        CohortStat.query.filter_by(id=COHORT_STATS_KEY)\
+            .update({'user_count': CohortStat.user_count + 1}, synchronize_session=False)
         db.session.commit()
+        # 只使学生名单相关的缓存失效，不更新数据版本，已训练的模型、特征存储和推荐表继续有效
+        bump_registration_version()
         return jsonify({"message": "用户注册成功", "user_id": new_user.id}), 201
     except Exception as e:
         db.session.rollback()
@@ -245,28 +957,18 @@ def get_user_data():
         
         query_id = student_id if (current_user_id.startswith('admin') and student_id) else current_user_id
         
-        user = User.query.options(
-            db.joinedload(User.synthesis_grades),
-            db.joinedload(User.homework_statistic),
-            db.joinedload(User.exam_statistic),
-            db.joinedload(User.discussion_participation),
-            db.joinedload(User.video_watching_details),
-            db.joinedload(User.offline_grades)
-        ).get(query_id)
+        user = load_student_profile(query_id)
         
         if not user:
             app.logger.warning(f"用户数据查询失败 - 无效用户ID: {current_user_id}")
             return jsonify({'error': '用户不存在'}), 404
 
-        homework = user.homework_statistic[0] if user.homework_statistic else HomeworkStatistic()
-        exam = user.exam_statistic[0] if user.exam_statistic else ExamStatistic(score=0)
-        synthesis = user.synthesis_grades[0] if user.synthesis_grades else SynthesisGrade(comprehensive_score=0)
-        
-        exam = ExamStatistic.query.filter_by(id=user.id).first() or ExamStatistic(score=0)
-        synthesis = SynthesisGrade.query.filter_by(id=user.id).first() or SynthesisGrade(comprehensive_score=0)
-        discussion = DiscussionParticipation.query.filter_by(id=user.id).first()
-        video_watching = VideoWatchingDetail.query.filter_by(id=user.id).first()
-        offline_grade = OfflineGrade.query.filter_by(id=user.id).first()
+        homework = user.homework or HomeworkStatistic()
+        exam = user.exam or ExamStatistic(score=0)
+        synthesis = user.synthesis or SynthesisGrade(comprehensive_score=0)
+        discussion = user.discussion
+        video_watching = user.video
+        offline_grade = user.offline
         
         # 提取作业成绩计算逻辑
         def get_homework_scores(hw):
@@ -286,9 +988,7 @@ def get_user_data():
         eligible_for_exam = missing_hw_count < 4
         
         # 计算排名
-        all_scores = [s.comprehensive_score for s in SynthesisGrade.query.all()]
-        all_scores_sorted = sorted(all_scores, reverse=True)
-        rank = all_scores_sorted.index(synthesis.comprehensive_score) + 1 if synthesis else 0
+        rank_info = get_student_rank(user.id, user.synthesis.comprehensive_score if user.synthesis else None)
         return jsonify({
             'user': {
                 'id': user.id,
@@ -330,8 +1030,9 @@ def get_user_data():
                     getattr(video_watching, 'rumination_ratio7', 0) or 0
                 ]
             },
-            'rank': rank,
-            'total_students': len(all_scores_sorted)
+            'rank': rank_info['rank'],
+            'percentile': rank_info['percentile'],
+            'total_students': rank_info['total']
         }), 200
     except Exception as e:
         app.logger.error(f'数据查询失败: {str(e)}')
@@ -351,9 +1052,10 @@ def get_chart_data():
         return jsonify({"status": 1, "msg": "缺少用户ID参数"})
     
     # 查询数据库获取数据
-    homework = HomeworkStatistic.query.get(user_id)
-    exam = ExamStatistic.query.get(user_id)
-    offline = OfflineGrade.query.get(user_id)
+    profile = load_student_profile(user_id)
+    homework = profile.homework if profile else None
+    exam = profile.exam if profile else None
+    offline = profile.offline if profile else None
     
     if not homework or not exam or not offline:
         return jsonify({"status": 1, "msg": "用户数据不存在"})
@@ -387,6 +1089,255 @@ def get_chart_data():
 
 
 
+# 学生搜索索引：按数据版本重建，学号和姓名的子串搜索只需查找倒排列表
+_student_search_index = StudentSearchIndex()
+SEARCH_MAX_LIMIT = 100
+# 学生列表按索引结果过滤时 IN 列表的最大长度；匹配更多学生的宽泛查询词改用 LIKE 过滤
+ADMIN_SEARCH_MAX_IDS = 1000
+
+
+def _load_search_entries():
+    return db.session.query(User.id, User.name).filter(User.role != 'admin').all()
+
+
+def _search_student_ids(search_id=None, search_name=None, limit=None):
+    """按学号和姓名子串搜索学生，返回按匹配程度排序的学号列表"""
+    _student_search_index.ensure_current(student_list_version(), _load_search_entries)
+    return _student_search_index.search(search_id, search_name, limit=limit)
+
+
+def _escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _prefix_search_students(term, limit):
+    """在带索引的学号、姓名列上做前缀匹配，完全匹配和较短的结果排在前面"""
+    pattern = f'{_escape_like(term)}%'
+    rows = db.session.query(User.id, User.name)\
+        .filter(User.role != 'admin')\
+        .filter(db.or_(User.id.like(pattern, escape='\\'), User.name.like(pattern, escape='\\')))\
+        .order_by(
+            db.case((db.or_(User.id == term, User.name == term), 0), else_=1),
+            db.func.length(User.name),
+            User.id
+        )\
+        .limit(limit).all()
+    return [(row.id, row.name) for row in rows]
+
+
+# 管理员数据看板缓存：按查询参数缓存序列化后的响应体，数据导入或用户注册后失效
+_admin_stats_cache = VersionedLRUCache(maxsize=256)
+
+# 学生列表可用的排序字段
+ADMIN_SORT_COLUMNS = {
+    'comprehensive_score': SynthesisGrade.comprehensive_score,
+    'exam_score': ExamStatistic.score,
+    'activity': DiscussionParticipation.total_discussions
+}
+# 排序字段在查询结果行中对应的属性名，用于生成游标
+ADMIN_SORT_ROW_FIELDS = {
+    'comprehensive_score': 'comprehensive_score',
+    'exam_score': 'exam_score',
+    'activity': 'total_discussions'
+}
+ADMIN_PAGE_MAX_LIMIT = 500
+
+
+def _query_admin_aggregates():
+    """
+    读取管理员数据看板的汇总统计和成绩分布（物化表主键查询）
+    物化结果缺失或过期时（数据导入时刷新失败）只读地从基础表计算，不在请求中写表，
+    可运行 flask refresh-cohort-stats 修复
+    """
+    row = db.session.get(CohortStat, COHORT_STATS_KEY)
+    data_version = get_data_version()
+    if row is not None and row.data_version == data_version:
+        stats = {field: getattr(row, field) for field in COHORT_STAT_FIELDS}
+    else:
+        app.logger.warning(f'汇总统计物化结果已过期（数据版本 {row.data_version if row else None}，当前 {data_version}），从基础表计算')
+        stats = _compute_cohort_sections(COHORT_SECTIONS)
+    
+    app.logger.debug(f'[get_admin_dashboard_stats] 汇总统计数据版本: {data_version}')
+    
+    return {
+        "userCount": stats['user_count'] or 0,
+        "avgComprehensiveScore": stats['avg_comprehensive_score'] or 0,
+        "maxComprehensiveScore": stats['max_comprehensive_score'] or 0,
+        "minComprehensiveScore": stats['min_comprehensive_score'] or 0,
+        "avgExamScore": stats['avg_exam_score'] or 0,
+        "maxExamScore": stats['max_exam_score'] or 0,
+        "minExamScore": stats['min_exam_score'] or 0,
+        "scoreDistribution": {
+            level: stats[field] for level, field in COHORT_GRADE_LEVELS if stats[field]
+        },
+        "activeUsers": stats['active_users'] or 0,
+        "inactiveUsers": (stats['user_count'] or 0) - (stats['active_users'] or 0)
+    }
+
+
+def _build_admin_student_query(search_id, search_name):
+    """构建学生列表查询（排除管理员），包含搜索条件但不含排序"""
+    query = db.session.query(
+        User.id,
+        User.name,
+        User.phone_number,
+        SynthesisGrade.comprehensive_score,
+        ExamStatistic.score.label('exam_score'),
+        DiscussionParticipation.total_discussions
+    ).filter(User.role != 'admin')\
+     .join(SynthesisGrade, User.id == SynthesisGrade.id, isouter=True)\
+     .join(ExamStatistic, User.id == ExamStatistic.id, isouter=True)\
+     .join(DiscussionParticipation, User.id == DiscussionParticipation.id, isouter=True)
+    
+    # 添加搜索条件：通过内存中的 n-gram 索引匹配学号和姓名子串，避免 LIKE '%...%' 全表扫描
+    if search_id or search_name:
+        student_ids = _search_student_ids(search_id, search_name, limit=ADMIN_SEARCH_MAX_IDS + 1)
+        if len(student_ids) <= ADMIN_SEARCH_MAX_IDS:
+            return query.filter(User.id.in_(student_ids))
+        # 查询词过于宽泛（如单个数字或常见姓氏）时匹配了大部分学生，全表扫描的代价与结果规模相当，
+        # 不再把几乎全部学号放入 IN 列表
+        if search_id:
+            query = query.filter(User.id.like(f'%{_escape_like(search_id)}%', escape='\\'))
+        if search_name:
+            query = query.filter(User.name.like(f'%{_escape_like(search_name)}%', escape='\\'))
+    return query
+
+
+def _serialize_admin_student(student):
+    return {
+        "id": student.id,
+        "name": student.name,
+        "phone_number": student.phone_number or '0',
+        "comprehensive_score": student.comprehensive_score or 0,
+        "exam_score": student.exam_score or 0
+    }
+
+
+def _apply_admin_sort(query, sort_by, sort_order):
+    """按管理员数据看板的排序参数为学生列表查询添加排序，排序值相同时按学号排序，保证列表和导出的顺序一致"""
+    id_order = User.id.desc() if sort_order == 'desc' else User.id.asc()
+    if sort_by == 'comprehensive_score':
+        query = query.order_by(SynthesisGrade.comprehensive_score.desc() if sort_order == 'desc' else SynthesisGrade.comprehensive_score.asc(), id_order)
+    elif sort_by == 'exam_score':
+        query = query.order_by(ExamStatistic.score.desc() if sort_order == 'desc' else ExamStatistic.score.asc(), id_order)
+    elif sort_by == 'activity':
+        query = query.order_by(DiscussionParticipation.total_discussions.desc() if sort_order == 'desc' else DiscussionParticipation.total_discussions.asc(), id_order)
+    return query
+
+
+def _compute_admin_dashboard_data(sort_by, sort_order, search_id, search_name):
+    """查询管理员数据看板所需的统计数据、完整学生列表和成绩分布"""
+    query = _build_admin_student_query(search_id, search_name)
+    
+    # 应用排序
+    query = _apply_admin_sort(query, sort_by, sort_order)
+    
+    students = query.all()
+    
+    # 构建标准化响应
+    data = _query_admin_aggregates()
+    data["students"] = [_serialize_admin_student(student) for student in students]
+    return {
+        "status": 0,
+        "msg": "获取管理员数据成功",
+        "data": data
+    }
+
+
+def _encode_admin_cursor(sort_value, student_id):
+    """将排序键和学号编码为不透明游标"""
+    raw = json.dumps([sort_value, student_id], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def _decode_admin_cursor(cursor):
+    """解析游标，格式错误时抛出ValueError"""
+    try:
+        sort_value, student_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError('无效的分页游标')
+    if not isinstance(student_id, str) or not (sort_value is None or isinstance(sort_value, (int, float))):
+        raise ValueError('无效的分页游标')
+    return sort_value, student_id
+
+
+def _compute_admin_students_page(sort_by, sort_order, search_id, search_name, limit, after):
+    """
+    基于游标（键集）分页查询学生列表
+    排序键为 (排序字段, 学号)，空值按-1处理，与MySQL中NULL的排序位置一致
+    """
+    query = _build_admin_student_query(search_id, search_name)
+    descending = sort_order == 'desc'
+    sort_column = ADMIN_SORT_COLUMNS.get(sort_by)
+    sort_key = db.func.coalesce(sort_column, -1) if sort_column is not None else None
+    
+    if after:
+        last_value, last_id = _decode_admin_cursor(after)
+        if sort_key is not None:
+            # 游标行的排序值从数据库中重新读取，避免FLOAT列经过JSON往返后精度不一致导致漏行或重复
+            last_value = db.func.coalesce(
+                db.session.query(sort_key)
+                .select_from(User)
+                .outerjoin(sort_column.class_, User.id == sort_column.class_.id)
+                .filter(User.id == last_id)
+                .scalar_subquery(),
+                last_value
+            )
+        if sort_key is None:
+            query = query.filter(User.id < last_id if descending else User.id > last_id)
+        elif descending:
+            query = query.filter(db.or_(
+                sort_key < last_value,
+                db.and_(sort_key == last_value, User.id < last_id)
+            ))
+        else:
+            query = query.filter(db.or_(
+                sort_key > last_value,
+                db.and_(sort_key == last_value, User.id > last_id)
+            ))
+    
+    order_columns = [User.id.desc() if descending else User.id.asc()]
+    if sort_key is not None:
+        order_columns.insert(0, sort_key.desc() if descending else sort_key.asc())
+    
+    # 多取一条用于判断是否还有下一页
+    rows = query.order_by(*order_columns).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        last_value = None
+        if sort_column is not None:
+            raw_value = getattr(last, ADMIN_SORT_ROW_FIELDS[sort_by])
+            last_value = raw_value if raw_value is not None else -1
+        next_cursor = _encode_admin_cursor(last_value, last.id)
+    
+    return {
+        "status": 0,
+        "msg": "获取学生列表成功",
+        "data": {
+            "students": [_serialize_admin_student(student) for student in rows],
+            "limit": limit,
+            "nextCursor": next_cursor
+        }
+    }
+
+
+def _admin_cached_response(cache_key, compute):
+    """从缓存读取序列化后的响应体，未命中时计算并写入缓存；数据导入或用户注册后失效"""
+    version = student_list_version()
+    body = _admin_stats_cache.get(cache_key, version)
+    if body is None:
+        body = app.json.dumps(compute())
+        _admin_stats_cache.set(cache_key, body, version)
+    response = app.response_class(body, mimetype='application/json')
+    _add_cors_headers(response)
+    response.headers.add('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
+    return response
+
+
 # 管理员数据看板接口
 @app.route('/api/admin-stats', methods=['GET', 'OPTIONS'])
 @jwt_required()
@@ -408,111 +1359,32 @@ def get_admin_dashboard_stats():
         sort_order = request.args.get('sort_order', 'desc')
         print(f'[get_admin_dashboard_stats] 排序参数: sort_by={sort_by}, sort_order={sort_order}')
         
-        # 使用单个查询获取所有统计数据（排除管理员用户）
-        stats = db.session.query(
-            db.func.count(User.id).label('user_count'),
-            db.func.avg(SynthesisGrade.comprehensive_score).label('avg_comprehensive_score'),
-            db.func.max(SynthesisGrade.comprehensive_score).label('max_comprehensive_score'),
-            db.func.min(SynthesisGrade.comprehensive_score).label('min_comprehensive_score'),
-            db.func.avg(ExamStatistic.score).label('avg_exam_score'),
-            db.func.max(ExamStatistic.score).label('max_exam_score'),
-            db.func.min(ExamStatistic.score).label('min_exam_score'),
-            db.func.sum(
-                db.case(
-                    (DiscussionParticipation.total_discussions > 3, 1),
-                    else_=0
-                )
-            ).label('active_users')
-        ).filter(User.role != 'admin')\
-         .join(SynthesisGrade, User.id == SynthesisGrade.id, isouter=True)\
-         .join(ExamStatistic, User.id == ExamStatistic.id, isouter=True)\
-         .join(DiscussionParticipation, User.id == DiscussionParticipation.id, isouter=True)\
-         .first()
-        
-        print(f'[get_admin_dashboard_stats] 数据库查询结果: {stats}')
-        
-        # 获取所有学生数据（排除管理员）
-        query = db.session.query(
-            User.id,
-            User.name,
-            User.phone_number,
-            SynthesisGrade.comprehensive_score,
-            ExamStatistic.score.label('exam_score'),
-            DiscussionParticipation.total_discussions
-        ).filter(User.role != 'admin')\
-         .join(SynthesisGrade, User.id == SynthesisGrade.id, isouter=True)\
-         .join(ExamStatistic, User.id == ExamStatistic.id, isouter=True)\
-         .join(DiscussionParticipation, User.id == DiscussionParticipation.id, isouter=True)
-        
         # 添加搜索条件
         search_id = request.args.get('search_id')
         search_name = request.args.get('search_name')
         
-        if search_id:
-            query = query.filter(User.id.like(f'%{search_id}%'))
-        if search_name:
-            query = query.filter(User.name.like(f'%{search_name}%'))
-        
-        # 应用排序
-        if sort_by == 'comprehensive_score':
-            query = query.order_by(SynthesisGrade.comprehensive_score.desc() if sort_order == 'desc' else SynthesisGrade.comprehensive_score.asc())
-        elif sort_by == 'exam_score':
-            query = query.order_by(ExamStatistic.score.desc() if sort_order == 'desc' else ExamStatistic.score.asc())
-        elif sort_by == 'activity':
-            query = query.order_by(DiscussionParticipation.total_discussions.desc() if sort_order == 'desc' else DiscussionParticipation.total_discussions.asc())
-        
-        students = query.all()
-        
-        # 获取成绩分布（排除管理员）
-        score_distribution = db.session.query(
-            db.case(
-                (SynthesisGrade.comprehensive_score >= 90, '优秀'),
-                (SynthesisGrade.comprehensive_score >= 80, '良好'),
-                (SynthesisGrade.comprehensive_score >= 70, '中等'),
-                (SynthesisGrade.comprehensive_score >= 60, '及格'),
-                (db.true(), '不及格'),
-                else_='不及格'
-            ).label('level'),
-            db.func.count().label('count')
-        ).filter(User.role != 'admin')\
-         .join(User, User.id == SynthesisGrade.id)\
-         .group_by(db.case(
-            (SynthesisGrade.comprehensive_score >= 90, '优秀'),
-            (SynthesisGrade.comprehensive_score >= 80, '良好'),
-            (SynthesisGrade.comprehensive_score >= 70, '中等'),
-            (SynthesisGrade.comprehensive_score >= 60, '及格'),
-            (db.true(), '不及格'),
-            else_='不及格'
-        )).all()
-        # 构建标准化响应
-        response_data = {
-            "status": 0,
-            "msg": "获取管理员数据成功",
-            "data": {
-                "userCount": stats.user_count or 0,
-                "avgComprehensiveScore": float(stats.avg_comprehensive_score) if stats and stats.avg_comprehensive_score else 0,
-                "maxComprehensiveScore": float(stats.max_comprehensive_score) if stats and stats.max_comprehensive_score else 0,
-                "minComprehensiveScore": float(stats.min_comprehensive_score) if stats and stats.min_comprehensive_score else 0,
-                "avgExamScore": float(stats.avg_exam_score) if stats and stats.avg_exam_score else 0,
-                "maxExamScore": float(stats.max_exam_score) if stats and stats.max_exam_score else 0,
-                "minExamScore": float(stats.min_exam_score) if stats and stats.min_exam_score else 0,
-                "scoreDistribution": {level: count for level, count in score_distribution} if score_distribution else {},
-                "activeUsers": stats.active_users or 0,
-                "inactiveUsers": (stats.user_count or 0) - (stats.active_users or 0),
-                "students": [{
-                    "id": student.id,
-                    "name": student.name,
-                    "phone_number": student.phone_number or '0',
-                    "comprehensive_score": student.comprehensive_score or 0,
-                    "exam_score": student.exam_score or 0
-                } for student in students]
-            }
-        }
-        
-        response = jsonify(response_data)
-        _add_cors_headers(response)
-        response.headers.add('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
-        return response, 200
+        # 指定limit时按游标分页返回学生列表，汇总统计通过 /api/admin-stats/summary 单独获取
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = max(1, min(limit, ADMIN_PAGE_MAX_LIMIT))
+            after = request.args.get('after')
+            try:
+                if after:
+                    _decode_admin_cursor(after)
+            except ValueError as e:
+                response = jsonify({"status": 1, "msg": str(e)})
+                _add_cors_headers(response)
+                return response, 400
+            cache_key = ('page', sort_by, sort_order, search_id, search_name, limit, after)
+            return _admin_cached_response(cache_key, lambda: _compute_admin_students_page(
+                sort_by, sort_order, search_id, search_name, limit, after
+            )), 200
+        
+        # 优先使用缓存，数据导入前结果不会变化
+        cache_key = (sort_by, sort_order, search_id, search_name)
+        return _admin_cached_response(cache_key, lambda: _compute_admin_dashboard_data(
+            sort_by, sort_order, search_id, search_name
+        )), 200
     except Exception as e:
         app.logger.error(f"获取管理员数据失败: {str(e)}", exc_info=True)
         app.logger.error(f"当前用户ID: {current_user_id}")
@@ -522,122 +1394,223 @@ def get_admin_dashboard_stats():
         return response, 500
 
 
-
-@app.route('/api/ml/predict-grade', methods=['POST', 'OPTIONS'])
-@jwt_required(optional=True)
-def predict_grade():
-    """预测学生成绩"""
+# 管理员数据看板汇总统计接口（不含学生列表，供分页模式使用）
+@app.route('/api/admin-stats/summary', methods=['GET', 'OPTIONS'])
+@jwt_required()
+def get_admin_dashboard_summary():
     if request.method == 'OPTIONS':
         response = _build_cors_preflight_response()
         response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        response.headers.add('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        response.headers.add('Access-Control-Allow-Methods', 'GET, OPTIONS')
         return response
     
     try:
-        from ml_services import GradePredictionModel
-        
-        data = request.get_json()
-        student_id = data.get('student_id')
-        
-        if not student_id:
-            response = jsonify({'error': '缺少学生ID'})
-            _add_cors_headers(response)
-            return response, 400
-        
-        # 获取用户数据
-        user = User.query.options(
-            db.joinedload(User.synthesis_grades),
-            db.joinedload(User.homework_statistic),
-            db.joinedload(User.exam_statistic),
-            db.joinedload(User.discussion_participation),
-            db.joinedload(User.video_watching_details)
-        ).get(student_id)
-        
-        if not user:
-            response = jsonify({'error': '用户不存在'})
-            _add_cors_headers(response)
-            return response, 404
-        
-        # 训练并预测
-        predictor = GradePredictionModel()
-        all_users = User.query.filter(User.role != 'admin').options(
-            db.joinedload(User.synthesis_grades),
-            db.joinedload(User.homework_statistic),
-            db.joinedload(User.discussion_participation),
-            db.joinedload(User.video_watching_details)
-        ).all()
-        
-        if predictor.train_model(all_users):
-            prediction = predictor.predict_grade(user)
-            if prediction:
-                response = jsonify({
-                    'success': True,
-                    'prediction': prediction
-                })
-                _add_cors_headers(response)
-                return response
-        
-        response = jsonify({'error': '预测失败'})
-        _add_cors_headers(response)
-        return response, 500
-        
+        return _admin_cached_response(('summary',), lambda: {
+            "status": 0,
+            "msg": "获取汇总统计成功",
+            "data": _query_admin_aggregates()
+        }), 200
     except Exception as e:
-        app.logger.error(f'成绩预测失败: {str(e)}')
-        response = jsonify({'error': '服务暂时不可用'})
+        app.logger.error(f"获取汇总统计失败: {str(e)}", exc_info=True)
+        response = jsonify({"status": 1, "msg": f"获取汇总统计失败: {str(e)}"})
         _add_cors_headers(response)
         return response, 500
 
-@app.route('/api/ml/cluster-analysis', methods=['GET', 'OPTIONS'])
-@jwt_required(optional=True)
-def cluster_analysis():
-    """学习行为聚类分析"""
-    if request.method == 'OPTIONS':
-        response = _build_cors_preflight_response()
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        response.headers.add('Access-Control-Allow-Methods', 'GET, OPTIONS')
-        return response
-    
-    try:
-        from ml_services import LearningBehaviorClustering
-        
-        # 获取所有用户数据（排除管理员）
-        users = User.query.filter(User.role != 'admin').options(
-            db.joinedload(User.synthesis_grades),
-            db.joinedload(User.homework_statistic),
-            db.joinedload(User.discussion_participation),
-            db.joinedload(User.video_watching_details)
-        ).all()
-        
-        if len(users) < 3:
-            response = jsonify({'error': f'数据量不足进行聚类分析，当前有{len(users)}个用户，至少需要3个'})
-            _add_cors_headers(response)
+
+# 学生数据导出时每批从数据库游标读取的行数
+ADMIN_EXPORT_BATCH_SIZE = 1000
+ADMIN_EXPORT_COLUMNS = [
+    ('id', '学号'),
+    ('name', '姓名'),
+    ('phone_number', '手机号'),
+    ('comprehensive_score', '综合成绩'),
+    ('exam_score', '考试成绩')
+]
+
+
+def _iter_admin_export_rows(sort_by, sort_order, search_id, search_name):
+    """
+    通过服务端游标逐批读取学生列表，内存占用与总行数无关
+    查询在调用时即执行，查询出错时在开始流式返回之前抛出
+    """
+    query = _apply_admin_sort(_build_admin_student_query(search_id, search_name), sort_by, sort_order)
+    students = iter(query.yield_per(ADMIN_EXPORT_BATCH_SIZE))
+
+    def rows():
+        try:
+            for student in students:
+                yield _serialize_admin_student(student)
+        except Exception as e:
+            # 响应头已发出，只能记录日志后中断传输
+            app.logger.error(f'学生数据导出中断: {str(e)}', exc_info=True)
+            raise
+    return rows()
+
+
+def _generate_admin_csv(rows):
+    """逐行生成CSV文本，首行带BOM便于Excel识别UTF-8"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([title for _, title in ADMIN_EXPORT_COLUMNS])
+    yield '\ufeff' + buffer.getvalue()
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow([row[key] for key, _ in ADMIN_EXPORT_COLUMNS])
+        yield buffer.getvalue()
+
+
+def _generate_admin_ndjson(rows):
+    """逐行生成NDJSON文本"""
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+# 管理员学生数据导出接口（流式返回CSV或NDJSON）
+@app.route('/api/admin-stats/export', methods=['GET', 'OPTIONS'])
+@jwt_required()
+def export_admin_students():
+    if request.method == 'OPTIONS':
+        response = _build_cors_preflight_response()
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        return response
+    
+    try:
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in ('csv', 'ndjson'):
+            response = jsonify({"status": 1, "msg": "不支持的导出格式，仅支持 csv 或 ndjson"})
+            _add_cors_headers(response)
             return response, 400
         
-        clustering = LearningBehaviorClustering()
-        if clustering.train_model(users):
-            analysis = clustering.get_all_clusters_analysis(users)
-            if analysis:
+        # 与 /api/admin-stats 使用相同的筛选和排序参数
+        sort_by = request.args.get('sort_by', 'comprehensive_score')
+        sort_order = request.args.get('sort_order', 'desc')
+        search_id = request.args.get('search_id')
+        search_name = request.args.get('search_name')
+        app.logger.debug(f'[export_admin_students] 导出格式: {export_format}, 排序参数: sort_by={sort_by}, sort_order={sort_order}')
+        
+        rows = _iter_admin_export_rows(sort_by, sort_order, search_id, search_name)
+        if export_format == 'csv':
+            body = _generate_admin_csv(rows)
+            mimetype = 'text/csv'
+        else:
+            body = _generate_admin_ndjson(rows)
+            mimetype = 'application/x-ndjson'
+        
+        filename = f"students_{datetime.now().strftime('%Y%m%d%H%M%S')}.{export_format}"
+        response = app.response_class(stream_with_context(body), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+        _add_cors_headers(response)
+        return response
+    except Exception as e:
+        app.logger.error(f"导出学生数据失败: {str(e)}", exc_info=True)
+        response = jsonify({"status": 1, "msg": f"导出学生数据失败: {str(e)}"})
+        _add_cors_headers(response)
+        return response, 500
+
+
+# 管理员学生搜索接口：返回按匹配程度排序的候选学生，供搜索框联想使用
+@app.route('/api/admin-stats/search', methods=['GET', 'OPTIONS'])
+@jwt_required()
+def search_students():
+    if request.method == 'OPTIONS':
+        response = _build_cors_preflight_response()
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        return response
+    
+    try:
+        term = (request.args.get('q') or '').strip()
+        match = request.args.get('match', 'substring')
+        limit = max(1, min(request.args.get('limit', 20, type=int), SEARCH_MAX_LIMIT))
+        if match not in ('substring', 'prefix'):
+            response = jsonify({"status": 1, "msg": "match 参数仅支持 substring 或 prefix"})
+            _add_cors_headers(response)
+            return response, 400
+        
+        if not term:
+            results = []
+        elif match == 'prefix':
+            results = _prefix_search_students(term, limit)
+        else:
+            _student_search_index.ensure_current(student_list_version(), _load_search_entries)
+            results = _student_search_index.search_any(term, limit=limit)
+        
+        response = jsonify({
+            "status": 0,
+            "msg": "搜索成功",
+            "data": {
+                "students": [{"id": student_id, "name": name} for student_id, name in results]
+            }
+        })
+        _add_cors_headers(response)
+        return response, 200
+    except Exception as e:
+        app.logger.error(f"搜索学生失败: {str(e)}", exc_info=True)
+        response = jsonify({"status": 1, "msg": f"搜索学生失败: {str(e)}"})
+        _add_cors_headers(response)
+        return response, 500
+
+
+
+@app.route('/api/ml/predict-grade', methods=['POST', 'OPTIONS'])
+@jwt_required(optional=True)
+def predict_grade():
+    """预测学生成绩"""
+    if request.method == 'OPTIONS':
+        response = _build_cors_preflight_response()
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        return response
+    
+    try:
+        data = request.get_json()
+        student_id = data.get('student_id')
+        
+        if not student_id:
+            response = jsonify({'error': '缺少学生ID'})
+            _add_cors_headers(response)
+            return response, 400
+        
+        # 读取预先计算的特征
+        features = load_student_features([str(student_id)])
+        
+        if len(features) == 0:
+            response = jsonify({'error': '用户不存在'})
+            _add_cors_headers(response)
+            return response, 404
+        
+        # 使用已训练模型预测
+        predictor = _get_trained_model('prediction_model')
+        if predictor:
+            prediction = predictor.predict_grade(features)
+            if prediction:
                 response = jsonify({
                     'success': True,
-                    'analysis': analysis
+                    'prediction': prediction
                 })
                 _add_cors_headers(response)
                 return response
         
-        response = jsonify({'error': '聚类分析失败'})
+        response = jsonify({'error': '预测失败'})
         _add_cors_headers(response)
         return response, 500
         
     except Exception as e:
-        app.logger.error(f'聚类分析失败: {str(e)}')
+        app.logger.error(f'成绩预测失败: {str(e)}')
         response = jsonify({'error': '服务暂时不可用'})
         _add_cors_headers(response)
         return response, 500
 
-@app.route('/api/ml/recommendations', methods=['POST', 'OPTIONS'])
+# 批量预测单次请求最多包含的学号数量（预测全部学生时不受此限制）
+BATCH_PREDICT_MAX_IDS = 10000
+
+
+@app.route('/api/ml/predict-grades', methods=['POST', 'OPTIONS'])
 @jwt_required(optional=True)
-def get_recommendations():
-    """获取个性化推荐"""
+def predict_grades():
+    """批量预测学生成绩：student_ids 为学号列表，或为 "all" 表示全部学生"""
     if request.method == 'OPTIONS':
         response = _build_cors_preflight_response()
         response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
@@ -645,9 +1618,65 @@ def get_recommendations():
         return response
     
     try:
-        from ml_services import PersonalizedRecommendation
+        data = request.get_json(silent=True) or {}
+        student_ids = data.get('student_ids')
+        
+        if student_ids == 'all':
+            users = load_student_features()
+            missing = []
+        elif isinstance(student_ids, list) and student_ids:
+            if len(student_ids) > BATCH_PREDICT_MAX_IDS:
+                response = jsonify({'error': f'单次最多预测{BATCH_PREDICT_MAX_IDS}名学生，预测全部学生请使用 "all"'})
+                _add_cors_headers(response)
+                return response, 400
+            student_ids = list(dict.fromkeys(str(student_id) for student_id in student_ids))
+            users = load_student_features(student_ids)
+            found = set(users.user_ids)
+            missing = [student_id for student_id in student_ids if student_id not in found]
+        else:
+            response = jsonify({'error': 'student_ids 应为学号列表或 "all"'})
+            _add_cors_headers(response)
+            return response, 400
         
-        data = request.get_json()
+        predictor = _get_trained_model('prediction_model')
+        if not predictor:
+            response = jsonify({'error': '预测失败'})
+            _add_cors_headers(response)
+            return response, 500
+        
+        predictions, skipped = predictor.predict_grades(users)
+        response = jsonify({
+            'success': True,
+            'predictions': predictions,
+            'feature_importance': predictor.get_feature_importance(),
+            'skipped': skipped,
+            'missing': missing
+        })
+        _add_cors_headers(response)
+        return response
+        
+    except Exception as e:
+        app.logger.error(f'批量成绩预测失败: {str(e)}', exc_info=True)
+        response = jsonify({'error': '服务暂时不可用'})
+        _add_cors_headers(response)
+        return response, 500
+
+@app.route('/api/ml/simulate-grade', methods=['POST', 'OPTIONS'])
+@jwt_required(optional=True)
+def simulate_grade():
+    """
+    成绩模拟（what-if）：对一名学生的多组假设改变预测成绩
+    只读取一次该学生的原始数据，全部情景一次计算特征、一次预测
+    """
+    if request.method == 'OPTIONS':
+        response = _build_cors_preflight_response()
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        return response
+    
+    try:
+        from ml_services.grade_simulation import expand_grid
+        data = request.get_json() or {}
         student_id = data.get('student_id')
         
         if not student_id:
@@ -655,20 +1684,250 @@ def get_recommendations():
             _add_cors_headers(response)
             return response, 400
         
-        user = User.query.options(
-            db.joinedload(User.synthesis_grades),
-            db.joinedload(User.homework_statistic),
-            db.joinedload(User.discussion_participation),
-            db.joinedload(User.video_watching_details)
-        ).get(student_id)
+        try:
+            if 'grid' in data:
+                _, scenarios = expand_grid(data['grid'])
+            else:
+                scenarios = data.get('scenarios')
+            predictor = _get_current_model('prediction_model')
+            if predictor is not None:
+                columns = load_student_columns([str(student_id)])
+            else:
+                # 模型需要训练或加载时一次读取全部学生的数据，训练和模拟共用，整个请求只查询一次数据库
+                all_columns = load_student_columns()
+                columns = all_columns.select([str(student_id)])
+            if len(columns) == 0:
+                response = jsonify({'error': '用户不存在'})
+                _add_cors_headers(response)
+                return response, 404
+            
+            if predictor is None:
+                predictor = _get_trained_model('prediction_model', users=all_columns)
+            if predictor is None:
+                response = jsonify({'error': '预测模型训练失败'})
+                _add_cors_headers(response)
+                return response, 500
+            simulation = predictor.simulate_grades(columns, scenarios)
+        except ValueError as e:
+            response = jsonify({'error': str(e)})
+            _add_cors_headers(response)
+            return response, 400
         
-        if not user:
-            response = jsonify({'error': '用户不存在'})
+        if simulation is None:
+            response = jsonify({'error': '该学生没有综合成绩，无法预测'})
             _add_cors_headers(response)
             return response, 404
         
-        recommender = PersonalizedRecommendation()
-        recommendations = recommender.generate_personalized_recommendations(user)
+        baseline, predictions = simulation
+        results = [
+            {**scenario, 'predicted_score': round(score, 2), 'change': round(score - baseline, 2)}
+            for scenario, score in zip(scenarios, predictions.tolist())
+        ]
+        body = {'success': True, 'student_id': student_id, 'baseline_score': round(baseline, 2), 'scenarios': results}
+        if 'grid' in data:
+            body['axes'] = data['grid']
+        response = jsonify(body)
+        _add_cors_headers(response)
+        return response
+        
+    except Exception as e:
+        app.logger.error(f'成绩模拟失败: {str(e)}')
+        response = jsonify({'error': '服务暂时不可用'})
+        _add_cors_headers(response)
+        return response, 500
+
+@app.route('/api/ml/cluster-analysis', methods=['GET', 'OPTIONS'])
+@jwt_required(optional=True)
+def cluster_analysis():
+    """学习行为聚类分析（结果按数据版本和模型版本缓存）"""
+    if request.method == 'OPTIONS':
+        response = _build_cors_preflight_response()
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        return response
+    
+    try:
+        def analyze(clustering, users):
+            analysis = clustering.get_all_clusters_analysis(users)
+            return {'success': True, 'analysis': analysis} if analysis else None
+        
+        return _cached_analysis_response('cluster-analysis', 'clustering_model', '聚类分析', analyze)
+        
+    except Exception as e:
+        app.logger.error(f'聚类分析失败: {str(e)}')
+        response = jsonify({'error': '服务暂时不可用'})
+        _add_cors_headers(response)
+        return response, 500
+
+def _with_neighbor_index(clustering):
+    """
+    旧版本保存的聚类模型没有近邻索引：在副本上按当前特征补建，并替换提供服务的模型
+    正提供服务的模型对象可能正被其他请求使用，不直接修改
+    """
+    server = _get_model_server()
+    with _model_training_lock:
+        entry, served = server.get('clustering_model')
+        if served is not None and served is not clustering and served.neighbor_index is not None:
+            # 等待锁期间其他请求已补建
+            return served
+        model = copy.deepcopy(clustering)
+        model.build_neighbor_index(load_student_features())
+        if served is clustering:
+            server.publish('clustering_model', entry, model)
+        return model
+
+
+@app.route('/api/ml/similar-students/<student_id>', methods=['GET', 'OPTIONS'])
+@jwt_required(optional=True)
+def similar_students(student_id):
+    """学习行为相似的学生，以及其中成绩更高的学生所采用的学习策略（基于聚类特征空间的近邻索引）"""
+    if request.method == 'OPTIONS':
+        response = _build_cors_preflight_response()
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        return response
+    
+    try:
+        k = request.args.get('k', 10, type=int)
+        if k is None or not 1 <= k <= 100:
+            response = jsonify({'error': 'k 必须是1到100之间的整数'})
+            _add_cors_headers(response)
+            return response, 400
+        
+        clustering = _get_trained_model('clustering_model')
+        if clustering is None:
+            response = jsonify({'error': '聚类模型训练失败'})
+            _add_cors_headers(response)
+            return response, 500
+        if clustering.neighbor_index is None:
+            clustering = _with_neighbor_index(clustering)
+        
+        # 尚未进入索引的学生（如暂未参与增量更新的新增学生）用特征存储中的特征查询
+        features = load_student_features([student_id])
+        result = clustering.find_similar_students(student_id, k, user=features if len(features) else None)
+        if result is None:
+            response = jsonify({'error': '用户不存在或缺少学习行为数据'})
+            _add_cors_headers(response)
+            return response, 404
+        
+        response = jsonify({'success': True, 'student_id': student_id, **result})
+        _add_cors_headers(response)
+        return response
+        
+    except Exception as e:
+        app.logger.error(f'相似学生查询失败: {str(e)}')
+        response = jsonify({'error': '服务暂时不可用'})
+        _add_cors_headers(response)
+        return response, 500
+
+def _student_model_response(student_id, model_name, result_key, score):
+    """
+    单个学生的模型分析接口：读取该学生预先计算的特征，用当前提供服务的已保存模型只对这一名学生打分，
+    不再对全体学生重新分析
+    score(model, features) 返回分析结果，该学生缺少所需数据时返回None
+    """
+    features = load_student_features([student_id])
+    if len(features) == 0:
+        response = jsonify({'error': '用户不存在'})
+        _add_cors_headers(response)
+        return response, 404
+    
+    model = _get_trained_model(model_name)
+    if model is None:
+        response = jsonify({'error': '模型训练失败'})
+        _add_cors_headers(response)
+        return response, 500
+    
+    result = score(model, features)
+    if result is None:
+        response = jsonify({'error': '缺少学习行为数据，无法分析'})
+        _add_cors_headers(response)
+        return response, 404
+    
+    response = jsonify({'success': True, 'student_id': student_id, result_key: result})
+    _add_cors_headers(response)
+    return response
+
+
+@app.route('/api/ml/student-cluster/<student_id>', methods=['GET', 'OPTIONS'])
+@jwt_required(optional=True)
+def student_cluster(student_id):
+    """单个学生的学习行为类型（聚类）"""
+    if request.method == 'OPTIONS':
+        response = _build_cors_preflight_response()
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        return response
+    
+    try:
+        return _student_model_response(
+            student_id, 'clustering_model', 'cluster',
+            lambda clustering, features: clustering.predict_cluster(features)
+        )
+        
+    except Exception as e:
+        app.logger.error(f'学生聚类预测失败: {str(e)}')
+        response = jsonify({'error': '服务暂时不可用'})
+        _add_cors_headers(response)
+        return response, 500
+
+@app.route('/api/ml/student-anomaly/<student_id>', methods=['GET', 'OPTIONS'])
+@jwt_required(optional=True)
+def student_anomaly(student_id):
+    """单个学生的异常行为检测"""
+    if request.method == 'OPTIONS':
+        response = _build_cors_preflight_response()
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        return response
+    
+    try:
+        return _student_model_response(
+            student_id, 'anomaly_model', 'anomaly',
+            lambda detector, features: detector.detect_anomalies(features)
+        )
+        
+    except Exception as e:
+        app.logger.error(f'学生异常检测失败: {str(e)}')
+        response = jsonify({'error': '服务暂时不可用'})
+        _add_cors_headers(response)
+        return response, 500
+
+@app.route('/api/ml/recommendations', methods=['POST', 'OPTIONS'])
+@jwt_required(optional=True)
+def get_recommendations():
+    """获取个性化推荐：直接读取推荐表中预先计算的结果，推荐表尚未包含该学生的当前结果时按需计算"""
+    if request.method == 'OPTIONS':
+        response = _build_cors_preflight_response()
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        return response
+    
+    try:
+        data = request.get_json()
+        student_id = data.get('student_id')
+        
+        if not student_id:
+            response = jsonify({'error': '缺少学生ID'})
+            _add_cors_headers(response)
+            return response, 400
+        
+        # 一次查询同时读取该学生的推荐和推荐表的版本标记
+        row = db.session.query(StudentRecommendation.recommendations, MaterializedVersion.data_version)\
+            .outerjoin(MaterializedVersion, MaterializedVersion.id == RECOMMENDATIONS_VERSION_KEY)\
+            .filter(StudentRecommendation.id == student_id).first()
+        if row is not None and row.data_version == get_data_version():
+            recommendations = json.loads(row.recommendations)
+        else:
+            from ml_services import PersonalizedRecommendation
+            user = load_student_profile(student_id)
+            
+            if not user:
+                response = jsonify({'error': '用户不存在'})
+                _add_cors_headers(response)
+                return response, 404
+            
+            recommendations = PersonalizedRecommendation().generate_personalized_recommendations(user)
         
         if recommendations:
             response = jsonify({
@@ -688,45 +1947,115 @@ def get_recommendations():
         _add_cors_headers(response)
         return response, 500
 
-@app.route('/api/ml/anomaly-detection', methods=['GET', 'OPTIONS'])
+# 学习路径接口缓存的单个学生学习表现分析，数据导入后失效
+_learning_analysis_cache = VersionedLRUCache(maxsize=4096)
+# 学习路径单次请求最多包含的目标分数数量
+LEARNING_PATH_MAX_TARGETS = 100
+
+
+def _parse_target_scores(data):
+    """
+    读取请求中的目标分数：target_scores（列表）或 target_score（单个），都未提供时以当前成绩加10分为目标
+    返回 (目标分数列表, 错误信息)
+    """
+    if 'target_scores' not in data:
+        targets = [data.get('target_score')]
+        if targets[0] is None:
+            return targets, None
+    else:
+        targets = data['target_scores']
+        if not isinstance(targets, list) or not targets:
+            return None, 'target_scores 必须是非空列表'
+        if len(targets) > LEARNING_PATH_MAX_TARGETS:
+            return None, f'单次最多包含 {LEARNING_PATH_MAX_TARGETS} 个目标分数'
+    for target in targets:
+        if isinstance(target, bool) or not isinstance(target, (int, float)) or not 0 <= target <= 100:
+            return None, '目标分数必须是0到100之间的数字'
+    return targets, None
+
+
+@app.route('/api/ml/learning-path', methods=['POST', 'OPTIONS'])
 @jwt_required(optional=True)
-def anomaly_detection():
-    """异常行为检测"""
+def learning_path():
+    """
+    学习路径推荐：同一名学生的学习表现分析按数据版本缓存，
+    调整目标分数重复请求时不再重新分析；一次请求可包含多个目标分数
+    """
     if request.method == 'OPTIONS':
         response = _build_cors_preflight_response()
         response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        response.headers.add('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        response.headers.add('Access-Control-Allow-Methods', 'POST, OPTIONS')
         return response
     
     try:
-        from ml_services import AnomalyDetector
+        data = request.get_json() or {}
+        student_id = data.get('student_id')
         
-        users = User.query.filter(User.role != 'admin').options(
-            db.joinedload(User.synthesis_grades),
-            db.joinedload(User.homework_statistic),
-            db.joinedload(User.discussion_participation),
-            db.joinedload(User.video_watching_details)
-        ).all()
+        if not student_id:
+            response = jsonify({'error': '缺少学生ID'})
+            _add_cors_headers(response)
+            return response, 400
         
-        if len(users) < 3:
-            response = jsonify({'error': f'数据量不足进行异常检测，当前有{len(users)}个用户，至少需要3个'})
+        targets, error = _parse_target_scores(data)
+        if error:
+            response = jsonify({'error': error})
             _add_cors_headers(response)
             return response, 400
         
-        detector = AnomalyDetector()
-        if detector.train_model(users):
-            results = detector.batch_detect_anomalies(users)
-            if results:
-                response = jsonify({
-                    'success': True,
-                    'results': results
-                })
+        from ml_services import PersonalizedRecommendation
+        recommender = PersonalizedRecommendation()
+        data_version = get_data_version()
+        analysis = _learning_analysis_cache.get(student_id, data_version)
+        cache_status = 'HIT' if analysis is not None else 'MISS'
+        if analysis is None:
+            user = load_student_profile(student_id)
+            
+            if not user:
+                response = jsonify({'error': '用户不存在'})
                 _add_cors_headers(response)
-                return response
+                return response, 404
+            
+            analysis = recommender._analyze_user_performance(user)
+            _learning_analysis_cache.set(student_id, analysis, data_version)
         
-        response = jsonify({'error': '异常检测失败'})
+        paths = recommender.get_learning_path_recommendations(None, targets, analysis)
+        if paths is None:
+            response = jsonify({'error': '学习路径生成失败'})
+            _add_cors_headers(response)
+            return response, 500
+        
+        response = jsonify({
+            'success': True,
+            'student_id': student_id,
+            'current_score': analysis.get('overall_score') or 0,
+            'learning_paths': paths
+        })
+        response.headers['X-Cache'] = cache_status
+        _add_cors_headers(response)
+        return response
+        
+    except Exception as e:
+        app.logger.error(f'学习路径推荐失败: {str(e)}')
+        response = jsonify({'error': '服务暂时不可用'})
         _add_cors_headers(response)
         return response, 500
+
+@app.route('/api/ml/anomaly-detection', methods=['GET', 'OPTIONS'])
+@jwt_required(optional=True)
+def anomaly_detection():
+    """异常行为检测（结果按数据版本和模型版本缓存）"""
+    if request.method == 'OPTIONS':
+        response = _build_cors_preflight_response()
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        return response
+    
+    try:
+        def analyze(detector, users):
+            results = detector.batch_detect_anomalies(users)
+            return {'success': True, 'results': results} if results else None
+        
+        return _cached_analysis_response('anomaly-detection', 'anomaly_model', '异常检测', analyze)
         
     except Exception as e:
         app.logger.error(f'异常检测失败: {str(e)}')
@@ -734,10 +2063,158 @@ def anomaly_detection():
         _add_cors_headers(response)
         return response, 500
 
+# 模型训练任务：训练在独立子进程中执行，进度记录在本地任务表中
+TRAINING_JOB_KIND = 'train-models'
+TRAINING_MODELS = [
+    ('prediction_model', '预测模型'),
+    ('clustering_model', '聚类模型'),
+    ('anomaly_model', '异常检测模型')
+]
+TRAINING_MODE_FULL = 'full'
+TRAINING_MODE_INCREMENTAL = 'incremental'
+_job_store = None
+
+
+def _get_job_store():
+    global _job_store
+    if _job_store is None:
+        _job_store = JobStore(runtime_path('jobs.sqlite3'))
+    return _job_store
+
+
+def _run_training_job(job_id, mode=TRAINING_MODE_FULL):
+    """
+    训练子进程入口：并行训练各个模型并记录进度
+    mode: full 全量重新训练；incremental 在已持久化的模型基础上用新增学生增量更新
+    """
+    store = _get_job_store()
+    with app.app_context():
+        # 子进程不能复用父进程的数据库连接
+        db.engine.dispose(close=False)
+        try:
+            data_version = get_data_version()
+            store.start(job_id, os.getpid(), data_version)
+            users = load_student_features()
+            store.update(job_id, total_samples=len(users))
+            app.logger.info(f'训练任务 {job_id}: 查询到 {len(users)} 个用户')
+            
+            if len(users) < 3:
+                store.finish(job_id, 'failed', f'数据量不足进行模型训练，当前有{len(users)}个用户，至少需要3个')
+                return
+            
+            from ml_services import FEATURE_VERSION, train_models
+            registry = _get_model_registry()
+            labels = dict(TRAINING_MODELS)
+            base_models = {}
+            if mode == TRAINING_MODE_INCREMENTAL:
+                for name, _ in TRAINING_MODELS:
+                    entry = registry.get_entry(name)
+                    # 模型保存后已有学生的数据被修改时，增量更新无法反映修改，改为全量训练
+                    if not entry or entry.get('feature_version') != FEATURE_VERSION or not _can_update_incrementally(entry):
+                        continue
+                    model = registry.load_entry(name, entry, lambda: _create_ml_model(name))
+                    if model is not None:
+                        base_models[name] = model
+            
+            def on_start(name):
+                store.update_model(
+                    job_id, name, status='running', started_at=time.time(),
+                    mode=TRAINING_MODE_INCREMENTAL if name in base_models else TRAINING_MODE_FULL
+                )
+            
+            def on_done(name, success, model, elapsed, error):
+                if success:
+                    registry.save(name, model, data_version, _model_metadata(model, data_version))
+                store.update_model(
+                    job_id, name,
+                    status='succeeded' if success else 'failed',
+                    success=success,
+                    message=f'{labels[name]}训练成功' if success else error,
+                    finished_at=time.time(),
+                    elapsed=elapsed
+                )
+                if error:
+                    store.add_error(job_id, error)
+                app.logger.info(f'训练任务 {job_id}: {labels[name]}训练结果: {success}')
+            
+            # 预先计算的特征可直接传给进程池，三个模型并行训练
+            results, errors, _ = train_models(
+                users, [name for name, _ in TRAINING_MODELS], on_start=on_start, on_done=on_done,
+                base_models=base_models,
+                model_options={name: _model_train_options(name, data_version) for name, _ in TRAINING_MODELS}
+            )
+            success_count = sum(results.values())
+            
+            if success_count == 0:
+                store.finish(job_id, 'failed', '所有模型训练失败')
+            else:
+                status = 'succeeded' if success_count == len(TRAINING_MODELS) else 'partial'
+                store.finish(job_id, status, f'模型训练完成，成功训练 {success_count}/{len(TRAINING_MODELS)} 个模型')
+        except Exception as e:
+            app.logger.error(f'训练任务 {job_id} 异常: {str(e)}', exc_info=True)
+            store.add_error(job_id, str(e))
+            store.finish(job_id, 'failed', '模型训练过程异常')
+
+
+def _wait_training_process(process, job_id):
+    """回收训练子进程，子进程异常退出时将任务标记为失败"""
+    process.join()
+    if process.exitcode != 0:
+        _get_job_store().finish(
+            job_id, 'failed', f'训练进程异常退出(exitcode={process.exitcode})', only_if_active=True
+        )
+
+
+def _start_training_process(job_id, mode=TRAINING_MODE_FULL):
+    # 训练子进程内部还可能再启动进程池，因此不能设为 daemon
+    process = multiprocessing.Process(target=_run_training_job, args=(job_id, mode), name=f'train-{job_id[:8]}')
+    process.start()
+    threading.Thread(target=_wait_training_process, args=(process, job_id), daemon=True).start()
+
+
+def _serialize_training_job(job):
+    """转换为接口返回格式，运行中的任务和模型计算实时耗时"""
+    now = time.time()
+    
+    def elapsed(started_at, finished_at):
+        if not started_at:
+            return None
+        return round((finished_at or now) - started_at, 3)
+    
+    def isoformat(timestamp):
+        return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+    
+    models = {}
+    for name, state in job['models'].items():
+        state = dict(state)
+        if state.get('status') == 'running':
+            state['elapsed'] = elapsed(state.get('started_at'), None)
+        state['started_at'] = isoformat(state.get('started_at'))
+        state['finished_at'] = isoformat(state.get('finished_at'))
+        models[name] = state
+    
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'message': job['message'],
+        'created_at': isoformat(job['created_at']),
+        'started_at': isoformat(job['started_at']),
+        'finished_at': isoformat(job['finished_at']),
+        'elapsed': elapsed(job['started_at'], job['finished_at']),
+        'total_samples': job['total_samples'],
+        'models': models,
+        'results': {name: bool(state.get('success')) for name, state in job['models'].items()},
+        'errors': job['errors'] or None
+    }
+
+
 @app.route('/api/ml/train-models', methods=['POST', 'OPTIONS'])
 @jwt_required(optional=True)
 def train_ml_models():
-    """训练所有ML模型"""
+    """
+    提交模型训练任务，立即返回任务ID，通过 /api/ml/train-models/<job_id> 查询进度
+    请求体可选 {"mode": "full" | "incremental"}，默认全量重新训练
+    """
     if request.method == 'OPTIONS':
         response = _build_cors_preflight_response()
         response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
@@ -755,105 +2232,110 @@ def train_ml_models():
             _add_cors_headers(response)
             return response, 403
         
-        app.logger.info('开始导入ML模块...')
-        try:
-            from ml_services import GradePredictionModel, LearningBehaviorClustering, AnomalyDetector
-            app.logger.info('ML模块导入成功')
-        except ImportError as e:
-            app.logger.error(f'ML模块导入失败: {str(e)}')
-            response = jsonify({'error': f'ML模块导入失败: {str(e)}'})
-            _add_cors_headers(response)
-            return response, 500
-        
-        app.logger.info('开始查询用户数据...')
-        users = User.query.filter(User.role != 'admin').options(
-            db.joinedload(User.synthesis_grades),
-            db.joinedload(User.homework_statistic),
-            db.joinedload(User.discussion_participation),
-            db.joinedload(User.video_watching_details)
-        ).all()
-        
-        app.logger.info(f'查询到 {len(users)} 个用户')
-        
-        if len(users) < 3:
-            app.logger.warning(f'用户数量不足: {len(users)} < 3')
-            response = jsonify({'error': f'数据量不足进行模型训练，当前有{len(users)}个用户，至少需要3个'})
+        mode = (request.get_json(silent=True) or {}).get('mode', TRAINING_MODE_FULL)
+        if mode not in (TRAINING_MODE_FULL, TRAINING_MODE_INCREMENTAL):
+            response = jsonify({'error': f'不支持的训练模式: {mode}'})
             _add_cors_headers(response)
             return response, 400
         
-        results = {
-            'prediction_model': False,
-            'clustering_model': False,
-            'anomaly_model': False
-        }
-        
-        errors = []
-        
-        # 训练预测模型
-        app.logger.info('开始训练预测模型...')
-        try:
-            predictor = GradePredictionModel()
-            results['prediction_model'] = predictor.train_model(users)
-            app.logger.info(f'预测模型训练结果: {results["prediction_model"]}')
-        except Exception as e:
-            error_msg = f'预测模型训练失败: {str(e)}'
-            app.logger.error(error_msg, exc_info=True)
-            errors.append(error_msg)
-        
-        # 训练聚类模型
-        app.logger.info('开始训练聚类模型...')
-        try:
-            clustering = LearningBehaviorClustering()
-            results['clustering_model'] = clustering.train_model(users)
-            app.logger.info(f'聚类模型训练结果: {results["clustering_model"]}')
-        except Exception as e:
-            error_msg = f'聚类模型训练失败: {str(e)}'
-            app.logger.error(error_msg, exc_info=True)
-            errors.append(error_msg)
-        
-        # 训练异常检测模型
-        app.logger.info('开始训练异常检测模型...')
-        try:
-            detector = AnomalyDetector()
-            results['anomaly_model'] = detector.train_model(users)
-            app.logger.info(f'异常检测训练结果: {results["anomaly_model"]}')
-        except Exception as e:
-            error_msg = f'异常检测模型训练失败: {str(e)}'
-            app.logger.error(error_msg, exc_info=True)
-            errors.append(error_msg)
-        
-        success_count = sum(results.values())
-        
-        if success_count == 0:
-            # 如果所有模型都训练失败
-            app.logger.error('所有模型训练失败')
-            response = jsonify({
-                'error': '所有模型训练失败',
-                'details': errors,
-                'results': results
-            })
-            _add_cors_headers(response)
-            return response, 500
+        job, created = _get_job_store().create(TRAINING_JOB_KIND, [name for name, _ in TRAINING_MODELS])
+        if created:
+            _start_training_process(job['id'], mode)
+            app.logger.info(f'已提交训练任务 {job["id"]}')
         
-        app.logger.info(f'模型训练完成: {success_count}/3 个模型成功')
         response = jsonify({
             'success': True,
-            'results': results,
-            'message': f'模型训练完成，成功训练 {success_count}/3 个模型',
-            'errors': errors if errors else None
+            'job_id': job['id'],
+            'status': job['status'],
+            'mode': mode if created else None,
+            'message': '训练任务已提交' if created else '已有训练任务正在进行'
         })
         _add_cors_headers(response)
-        return response
+        return response, 202
         
     except Exception as e:
-        app.logger.error(f'模型训练过程异常: {str(e)}', exc_info=True)
+        app.logger.error(f'提交训练任务失败: {str(e)}', exc_info=True)
         response = jsonify({
-            'error': '模型训练过程异常',
+            'error': '提交训练任务失败',
             'detail': str(e)
         })
         _add_cors_headers(response)
         return response, 500
 
+
+@app.route('/api/ml/train-models/<job_id>', methods=['GET', 'OPTIONS'])
+@jwt_required(optional=True)
+def get_training_job(job_id):
+    """查询模型训练任务的状态、各模型进度、耗时和错误信息"""
+    if request.method == 'OPTIONS':
+        response = _build_cors_preflight_response()
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        return response
+    
+    try:
+        job = _get_job_store().get(job_id)
+        if job is None:
+            response = jsonify({'error': '训练任务不存在'})
+            _add_cors_headers(response)
+            return response, 404
+        
+        response = jsonify({'success': True, 'job': _serialize_training_job(job)})
+        _add_cors_headers(response)
+        return response
+        
+    except Exception as e:
+        app.logger.error(f'查询训练任务失败: {str(e)}', exc_info=True)
+        response = jsonify({'error': '查询训练任务失败'})
+        _add_cors_headers(response)
+        return response, 500
+
+
+@app.route('/api/ml/models', methods=['GET', 'OPTIONS'])
+@jwt_required(optional=True)
+def get_serving_models():
+    """查询当前进程正在使用的模型版本，以及最近一次热更新的加载耗时和切换延迟"""
+    if request.method == 'OPTIONS':
+        response = _build_cors_preflight_response()
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        return response
+    
+    try:
+        server = _get_model_server()
+        server.refresh()
+        response = jsonify({'success': True, **server.status()})
+        _add_cors_headers(response)
+        return response
+        
+    except Exception as e:
+        app.logger.error(f'查询模型状态失败: {str(e)}', exc_info=True)
+        response = jsonify({'error': '查询模型状态失败'})
+        _add_cors_headers(response)
+        return response, 500
+
+
+@app.route('/api/ml/result-cache', methods=['GET', 'OPTIONS'])
+@jwt_required(optional=True)
+def get_result_cache_stats():
+    """查询分析结果缓存各接口的命中、未命中次数和缓存条数（所有 worker 合计）"""
+    if request.method == 'OPTIONS':
+        response = _build_cors_preflight_response()
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        return response
+    
+    try:
+        response = jsonify({'success': True, 'endpoints': _get_result_cache().stats()})
+        _add_cors_headers(response)
+        return response
+        
+    except Exception as e:
+        app.logger.error(f'查询结果缓存失败: {str(e)}', exc_info=True)
+        response = jsonify({'error': '查询结果缓存失败'})
+        _add_cors_headers(response)
+        return response, 500
+
 # 数据导入API接口
 @app.route('/api/import-data', methods=['POST', 'OPTIONS'])
 @jwt_required(optional=True)
@@ -915,6 +2397,8 @@ def import_data():
                 app.logger.error(f'工作表{sheet_name}导入失败: {str(e)}', exc_info=True)
                 results.append({'sheet': sheet_name, 'success': False, 'message': f'导入失败: {str(e)}'})
         
+        # 各导入器提交后已按各自的数据来源调用 mark_data_changed
+        
         # 清理临时文件
         try:
             os.remove(file_path)
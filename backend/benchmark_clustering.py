@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+聚类训练性能测试脚本
+对比完整轮廓系数（改造前每次训练都会计算，耗时与样本数的平方成正比）与固定抽样轮廓系数的耗时和数值差异，
+并测试按样本量分档与自动选择聚类数两种方式的训练耗时
+
+用法:
+    python benchmark_clustering.py
+    python benchmark_clustering.py --sizes 5000 20000 50000 --skip-full-above 20000
+"""
+
+import sys
+import os
+import time
+import logging
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sklearn.metrics import silhouette_score
+from ml_services import LearningBehaviorClustering, StudentFeatures
+from ml_services.clustering_analysis import K_SELECTION_AUTO, sampled_silhouette_score
+from benchmark_features import generate_users
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run_benchmark(size, skip_full_above):
+    features = StudentFeatures.compute(generate_users(size), 'benchmark')
+    print(f"\n📈 学生数: {size}")
+
+    tiers = LearningBehaviorClustering()
+    ok, tiers_ms = timed(lambda: tiers.train_model(features))
+    auto = LearningBehaviorClustering(k_selection=K_SELECTION_AUTO)
+    auto_ok, auto_ms = timed(lambda: auto.train_model(features))
+    print(f"  {'分档训练':<10} 耗时={tiers_ms:10.2f}ms  聚类数={tiers.n_clusters}")
+    print(f"  {'自动选择':<10} 耗时={auto_ms:10.2f}ms  聚类数={auto.n_clusters}  "
+          f"轮廓系数={ {k: round(v, 3) for k, v in auto.silhouette_scores.items() if v is not None} }")
+
+    scaled = tiers.scaler.transform(tiers._handle_outliers(tiers.prepare_features(features)[0]))
+    labels = tiers.model.labels_
+    sampled, sampled_ms = timed(lambda: sampled_silhouette_score(scaled, labels))
+    print(f"  {'抽样轮廓系数':<10} 耗时={sampled_ms:10.2f}ms  值={sampled:.4f}")
+    if size <= skip_full_above:
+        full, full_ms = timed(lambda: silhouette_score(scaled, labels))
+        print(f"  {'完整轮廓系数':<10} 耗时={full_ms:10.2f}ms  值={full:.4f}  差异={abs(full - sampled):.4f}")
+    else:
+        print(f"  {'完整轮廓系数':<10} 已跳过（样本数超过 {skip_full_above}）")
+    return ok and auto_ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='聚类训练性能测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2000, 10000, 30000], help='生成的学生数')
+    parser.add_argument('--skip-full-above', type=int, default=30000, help='样本数超过该值时不计算完整轮廓系数')
+    args = parser.parse_args()
+    # 生成数据中的空值会触发大量特征告警
+    logging.disable(logging.WARNING)
+
+    print("=" * 60)
+    print("🧩 聚类训练与轮廓系数测试")
+    print("=" * 60)
+    ok = all([run_benchmark(size, args.skip_full_above) for size in args.sizes])
+
+    print(f"\n" + "=" * 60)
+    print(f"{'✅' if ok else '❌'} 聚类训练测试完成")
+    print(f"=" * 60)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+成绩模拟性能测试脚本
+对比逐个情景调用 predict_grade 与 simulate_grades 一次预测全部情景的耗时，并校验两者的预测成绩一致
+
+用法:
+    python benchmark_grade_simulation.py
+    python benchmark_grade_simulation.py --scenarios 5000
+"""
+
+import sys
+import os
+import time
+import logging
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from ml_services import GradePredictionModel, StudentColumns, StudentFeatures
+from ml_services.grade_simulation import perturb_columns
+from benchmark_incremental import generate_correlated_users
+
+
+def random_scenarios(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            'completed_homework': int(rng.integers(0, 4)),
+            'homework_score_delta': float(rng.integers(-10, 11)),
+            'extra_watch_time': float(rng.integers(0, 400)),
+            'extra_posts': int(rng.integers(0, 10)),
+            'extra_replies': int(rng.integers(0, 10))
+        }
+        for _ in range(count)
+    ]
+
+
+def perturbed_row(columns, row):
+    """取出改变后数据中的一行，作为只含一名学生的 StudentColumns"""
+    return StudentColumns(
+        user_ids=[columns.user_ids[row]],
+        has_homework=columns.has_homework[row:row + 1],
+        homework=columns.homework[row:row + 1],
+        discussion=columns.discussion[row:row + 1],
+        watch=columns.watch[row:row + 1],
+        rumination=columns.rumination[row:row + 1],
+        has_synthesis=columns.has_synthesis[row:row + 1],
+        course_points=columns.course_points[row:row + 1],
+        comprehensive_score=columns.comprehensive_score[row:row + 1]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='成绩模拟性能测试')
+    parser.add_argument('--size', type=int, default=5000, help='训练用的生成学生数')
+    parser.add_argument('--scenarios', type=int, default=1000, help='每名学生的情景数')
+    parser.add_argument('--students', type=int, default=5, help='参与模拟的学生数')
+    args = parser.parse_args()
+    # 生成数据中的空值会触发大量特征告警
+    logging.disable(logging.WARNING)
+
+    print("=" * 60)
+    print(f"🧪 成绩模拟测试（{args.students} 名学生，每名 {args.scenarios} 个情景）")
+    print("=" * 60)
+
+    users = generate_correlated_users(args.size)
+    columns = StudentColumns.from_users(users)
+    model = GradePredictionModel()
+    model.train_model(StudentFeatures.compute(columns, 'benchmark'))
+    scenarios = random_scenarios(args.scenarios)
+
+    # 只选有综合成绩、可以预测的学生
+    candidates = [user for user in users if model.predict_grade(user) is not None][:args.students]
+    loop_seconds, batch_seconds = 0.0, 0.0
+    identical = len(candidates) > 0
+    for user in candidates:
+        student = StudentColumns.from_users([user])
+
+        start = time.perf_counter()
+        perturbed = perturb_columns(student, scenarios)
+        expected = [
+            model.predict_grade(perturbed_row(perturbed, row))['predicted_score']
+            for row in range(len(scenarios))
+        ]
+        loop_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        baseline, predictions = model.simulate_grades(student, scenarios)
+        batch_seconds += time.perf_counter() - start
+
+        identical = identical and baseline == model.predict_grade(student)['predicted_score'] \
+            and np.allclose(predictions, expected, rtol=0, atol=1e-9)
+
+    total = len(candidates) * len(scenarios)
+    print(f"\n  情景总数: {total}")
+    print(f"  逐个情景预测: {loop_seconds:8.3f}s  {total / loop_seconds:10.0f} 个/秒")
+    print(f"  一次批量预测: {batch_seconds:8.3f}s  {total / batch_seconds:10.0f} 个/秒")
+    print(f"  加速: {loop_seconds / batch_seconds:.1f}x")
+    print(f"  结果一致性: {'✅ 一致' if identical else '❌ 不一致'}")
+
+    print(f"\n" + "=" * 60)
+    print(f"{'✅' if identical else '❌'} 成绩模拟测试完成")
+    print(f"=" * 60)
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+增量更新性能测试脚本
+先用一部分学生训练模型，再模拟导入新学生，对比「在已有模型上增量更新」与「全量重新训练」的耗时和效果：
+预测模型比较留出测试集上的 MAE / R2，聚类模型比较惯性（簇内平方和）和两种方式分簇结果的一致程度
+
+用法:
+    python benchmark_incremental.py
+    python benchmark_incremental.py --size 20000 --new-ratio 0.1
+"""
+
+import sys
+import os
+import copy
+import time
+import random
+import logging
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sklearn.metrics import mean_absolute_error, r2_score, adjusted_rand_score
+from ml_services import GradePredictionModel, LearningBehaviorClustering, StudentFeatures
+from benchmark_features import generate_users
+
+
+def generate_correlated_users(size, seed=1):
+    """在 generate_users 的基础上让综合成绩与作业成绩、视频观看相关，使预测误差有比较意义"""
+    rng = random.Random(seed)
+    users = generate_users(size, seed)
+    for user in users:
+        if not user.synthesis_grades:
+            continue
+        homework = user.homework_statistic[0] if user.homework_statistic else None
+        scores = [getattr(homework, f'score{k}') or 0 for k in range(2, 10)] if homework else []
+        valid = [s for s in scores if s > 0]
+        homework_avg = sum(valid) / len(valid) if valid else 40
+        videos = user.video_watching_details[0] if user.video_watching_details else None
+        watched = sum(getattr(videos, f'watch_duration{k}') or 0 for k in range(1, 8)) if videos else 0
+        user.synthesis_grades[0].comprehensive_score = min(
+            100, max(1, 0.6 * homework_avg + 0.03 * watched + rng.gauss(10, 6))
+        )
+    return users
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def evaluate_prediction(model, test):
+    features, targets = model.prepare_features(test)
+    predictions = model.model.predict(model.scaler.transform(features))
+    return mean_absolute_error(targets, predictions), r2_score(targets, predictions)
+
+
+def cluster_labels(model, users):
+    features, _ = model.prepare_features(users)
+    scaled = model.scaler.transform(model._handle_outliers(features))
+    labels = model.model.predict(scaled)
+    inertia = float(((scaled - model.model.cluster_centers_[labels]) ** 2).sum())
+    return labels, inertia
+
+
+def run_benchmark(size, new_ratio, test_ratio, seed):
+    features = StudentFeatures.compute(generate_correlated_users(size, seed), 'benchmark')
+    ids = list(features.user_ids)
+    random.Random(seed).shuffle(ids)
+    test_count = int(size * test_ratio)
+    new_count = int((size - test_count) * new_ratio / (1 + new_ratio))
+    test_ids, new_ids, base_ids = ids[:test_count], ids[test_count:test_count + new_count], ids[test_count + new_count:]
+    base = features.select(base_ids)
+    current = features.select(base_ids + new_ids)
+    test = features.select(test_ids)
+    print(f"  学生数: 已训练 {len(base)}, 新增 {len(new_ids)}, 测试 {len(test)}")
+
+    ok = True
+    for label, model_class in (('预测模型', GradePredictionModel), ('聚类模型', LearningBehaviorClustering)):
+        base_model = model_class()
+        base_model.train_model(base)
+
+        full_model = model_class()
+        full_ok, full_ms = timed(lambda: full_model.train_model(current))
+        incremental_model = copy.deepcopy(base_model)
+        incremental_ok, incremental_ms = timed(lambda: incremental_model.update_model(current))
+        ok = ok and full_ok and incremental_ok
+
+        print(f"\n  {label}")
+        print(f"    {'全量训练':<10} 耗时={full_ms:9.2f}ms")
+        print(f"    {'增量更新':<10} 耗时={incremental_ms:9.2f}ms  加速比: {full_ms / incremental_ms:.1f}x")
+        if model_class is GradePredictionModel:
+            for name, model in (('训练前', base_model), ('全量训练', full_model), ('增量更新', incremental_model)):
+                mae, r2 = evaluate_prediction(model, test)
+                print(f"    {name:<10} 测试集 MAE={mae:6.3f}  R2={r2:6.3f}")
+        else:
+            full_labels, full_inertia = cluster_labels(full_model, test)
+            incremental_labels, incremental_inertia = cluster_labels(incremental_model, test)
+            print(f"    测试集惯性: 全量={full_inertia:.1f}  增量={incremental_inertia:.1f}")
+            print(f"    分簇一致性(ARI): {adjusted_rand_score(full_labels, incremental_labels):.3f}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='增量更新性能测试')
+    parser.add_argument('--size', type=int, default=5000, help='生成的学生总数')
+    parser.add_argument('--new-ratio', type=float, default=0.1, help='新增学生占已训练学生的比例')
+    parser.add_argument('--test-ratio', type=float, default=0.2, help='留作测试集的比例')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    # 生成数据中的空值会触发大量特征告警
+    logging.disable(logging.WARNING)
+
+    print("=" * 60)
+    print("🔁 增量更新 vs 全量训练")
+    print("=" * 60)
+    ok = run_benchmark(args.size, args.new_ratio, args.test_ratio, args.seed)
+
+    print(f"\n" + "=" * 60)
+    print(f"{'✅' if ok else '❌'} 增量更新测试完成")
+    print(f"=" * 60)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+训练数据加载性能测试脚本
+对比通过 ORM 加载 User 对象图（joinedload 四张关联表）与列式加载器直接读取数值列的耗时和峰值内存，
+并校验两种方式得到的数据一致
+
+用法:
+    python benchmark_loader.py
+    python benchmark_loader.py --chunk-size 5000
+"""
+
+import sys
+import os
+import gc
+import time
+import argparse
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import app, db, User, load_student_columns, STUDENT_COLUMNS_CHUNK_SIZE
+from ml_services import StudentColumns
+import numpy as np
+
+
+def load_with_orm():
+    """原先模型接口使用的加载方式"""
+    users = User.query.filter(User.role != 'admin').options(
+        db.joinedload(User.synthesis_grades),
+        db.joinedload(User.homework_statistic),
+        db.joinedload(User.discussion_participation),
+        db.joinedload(User.video_watching_details)
+    ).order_by(User.id).all()
+    return StudentColumns.from_users(users)
+
+
+def measure(func, repeat=3):
+    """返回 (结果, 最短耗时ms, 峰值内存MB)"""
+    timings = []
+    peak = 0
+    result = None
+    for _ in range(repeat):
+        db.session.remove()
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return result, min(timings), peak / 1024 / 1024
+
+
+def columns_identical(left, right):
+    if left.user_ids != right.user_ids:
+        return False
+    for field in StudentColumns.__slots__[1:]:
+        if not np.array_equal(getattr(left, field), getattr(right, field), equal_nan=True):
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='训练数据加载性能测试')
+    parser.add_argument('--chunk-size', type=int, default=STUDENT_COLUMNS_CHUNK_SIZE, help='列式加载每块读取的行数')
+    parser.add_argument('--repeat', type=int, default=3, help='每种方式的重复次数')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("📦 训练数据加载测试")
+    print("=" * 60)
+
+    with app.app_context():
+        orm_columns, orm_ms, orm_peak = measure(load_with_orm, args.repeat)
+        sql_columns, sql_ms, sql_peak = measure(lambda: load_student_columns(chunk_size=args.chunk_size), args.repeat)
+
+        print(f"  学生数: {len(sql_columns)}, 每块行数: {args.chunk_size}")
+        print(f"  {'ORM 对象图':<16} 耗时={orm_ms:9.2f}ms  峰值内存={orm_peak:8.2f}MB")
+        print(f"  {'列式加载':<16} 耗时={sql_ms:9.2f}ms  峰值内存={sql_peak:8.2f}MB")
+        if sql_ms > 0 and sql_peak > 0:
+            print(f"  加速比: {orm_ms / sql_ms:.1f}x, 内存降低: {orm_peak / sql_peak:.1f}x")
+
+        identical = columns_identical(orm_columns, sql_columns)
+        print(f"  数据一致性: {'✅ 一致' if identical else '❌ 不一致'}")
+
+    print(f"\n" + "=" * 60)
+    print(f"✅ 加载性能测试完成")
+    print(f"=" * 60)
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == "__main__":
+    main()
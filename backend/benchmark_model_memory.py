@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+模型内存占用测试脚本
+模拟 gunicorn 的多个 worker：每个 worker 进程独立加载预测、聚类、异常检测三个模型并执行一次推理，
+对比普通布局（整体读入内存）与 mmap 布局（只读映射，共享页缓存）下每个 worker 增加的内存：
+- RSS：进程常驻内存，映射文件的页面也计入，因此两种布局差别不大
+- PSS：共享页面按共享进程数分摊后的内存
+- USS：进程私有内存，即多启动一个 worker 实际增加的内存
+需要 Linux 的 /proc/<pid>/smaps_rollup
+
+用法:
+    python benchmark_model_memory.py
+    python benchmark_model_memory.py --size 50000 --workers 4
+"""
+
+import sys
+import os
+import logging
+import argparse
+import tempfile
+import multiprocessing
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+MODELS = ('prediction_model', 'clustering_model', 'anomaly_model')
+
+
+def memory_usage():
+    """返回当前进程的 (RSS, PSS, USS)，单位MB"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1]) / 1024
+    return values['Rss'], values['Pss'], values['Private_Clean'] + values['Private_Dirty']
+
+
+def model_classes():
+    from ml_services import GradePredictionModel, LearningBehaviorClustering, AnomalyDetector
+    return dict(zip(MODELS, (GradePredictionModel, LearningBehaviorClustering, AnomalyDetector)))
+
+
+def worker(registry_dir, mmap_mode, features_path, results, all_loaded, done):
+    """模拟一个 worker：加载三个模型并推理，记录加载前后的内存，等待所有 worker 加载完成后再读取共享后的数值"""
+    logging.disable(logging.WARNING)
+    from ml_services import ModelRegistry, FeatureStore
+    features = FeatureStore(features_path).read().select([f'2023{i:06d}' for i in range(2000)])
+    classes = model_classes()
+    before = memory_usage()
+
+    registry = ModelRegistry(registry_dir, mmap_mode=mmap_mode)
+    models = {name: registry.load(name, classes[name]) for name in MODELS}
+    models['prediction_model'].predict_grades(features)
+    models['clustering_model'].get_all_clusters_analysis(features)
+    models['anomaly_model'].batch_detect_anomalies(features)
+
+    all_loaded.wait()
+    after = memory_usage()
+    results.put(tuple(a - b for a, b in zip(after, before)))
+    done.wait()
+
+
+def run_layout(label, registry_dir, mmap_mode, features_path, workers):
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    all_loaded = ctx.Barrier(workers + 1)
+    done = ctx.Event()
+    processes = [
+        ctx.Process(target=worker, args=(registry_dir, mmap_mode, features_path, results, all_loaded, done))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    all_loaded.wait()
+    usages = [results.get() for _ in processes]
+    done.set()
+    for process in processes:
+        process.join()
+
+    print(f"\n  {label}")
+    for i, (rss, pss, uss) in enumerate(usages, 1):
+        print(f"    worker {i}: RSS +{rss:7.2f}MB  PSS +{pss:7.2f}MB  USS +{uss:7.2f}MB")
+    total_uss = sum(usage[2] for usage in usages)
+    total_pss = sum(usage[1] for usage in usages)
+    print(f"    合计: PSS +{total_pss:.2f}MB  USS +{total_uss:.2f}MB")
+    return total_pss
+
+
+def main():
+    parser = argparse.ArgumentParser(description='模型内存占用测试')
+    parser.add_argument('--size', type=int, default=30000, help='训练用的生成学生数')
+    parser.add_argument('--workers', type=int, default=4, help='模拟的 worker 进程数')
+    args = parser.parse_args()
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("需要 Linux 的 /proc/self/smaps_rollup，跳过")
+        return
+    logging.disable(logging.WARNING)
+
+    from ml_services import ModelRegistry, FeatureStore, StudentFeatures
+    from benchmark_incremental import generate_correlated_users
+
+    print("=" * 60)
+    print(f"🧠 模型内存占用测试（{args.workers} 个 worker）")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        features = StudentFeatures.compute(generate_correlated_users(args.size), 'benchmark')
+        features_path = os.path.join(tmp_dir, 'features.npz')
+        FeatureStore(features_path).save(features)
+
+        layouts = (('普通布局', os.path.join(tmp_dir, 'plain'), None), ('mmap 布局', os.path.join(tmp_dir, 'mmap'), 'r'))
+        registries = [ModelRegistry(path, mmap_mode=mmap_mode) for _, path, mmap_mode in layouts]
+        for name, model_class in model_classes().items():
+            model = model_class()
+            model.train_model(features)
+            for registry in registries:
+                registry.save(name, model, 'benchmark')
+
+        model = registries[0].load('prediction_model', model_classes()['prediction_model'])
+        print(f"  学生数: {len(features)}, 随机森林节点数: {sum(e.tree_.node_count for e in model.model.estimators_)}")
+        totals = [run_layout(label, path, mmap_mode, features_path, args.workers) for label, path, mmap_mode in layouts]
+
+    print(f"\n" + "=" * 60)
+    print(f"✅ 内存测试完成，mmap 布局合计 PSS 降低 {totals[0] - totals[1]:.2f}MB")
+    print(f"=" * 60)
+
+
+if __name__ == "__main__":
+    main()
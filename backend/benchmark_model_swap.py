@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+模型热更新测试脚本
+多个线程持续调用预测模型模拟并发请求，同时由另一个进程（模拟训练任务）依次保存新版本，检查：
+- 所有请求都成功返回，切换过程中没有报错
+- 每个新版本从写入清单到 ModelServer 完成切换的延迟
+- 最终所有请求都使用最新版本
+注册表只保留 1 个版本，旧版本文件在切换后立即被删除，以验证处理中的请求仍可使用已映射的旧模型
+
+用法:
+    python benchmark_model_swap.py
+    python benchmark_model_swap.py --threads 8 --versions 5
+"""
+
+import sys
+import os
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import multiprocessing
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+MODEL_NAME = 'prediction_model'
+
+
+def publish_versions(registry_dir, features_path, versions, interval, saved):
+    """模拟训练任务进程：每次随机抽取一半学生训练并保存新版本，记录每个版本的保存完成时间"""
+    logging.disable(logging.WARNING)
+    from ml_services import GradePredictionModel, ModelRegistry, FeatureStore
+    features = FeatureStore(features_path).read()
+    registry = ModelRegistry(registry_dir, keep_versions=1, mmap_mode='r')
+    rng = np.random.default_rng(0)
+    for _ in range(versions):
+        model = GradePredictionModel()
+        model.train_model(features.select(rng.choice(features.user_ids, len(features) // 2, replace=False)))
+        time.sleep(interval)
+        entry = registry.save(MODEL_NAME, model, 'benchmark')
+        saved.put((entry['version'], time.time()))
+
+
+def run_requests(server, features, stop, stats, lock):
+    """模拟请求线程：每次取当前模型完成一次批量预测"""
+    while not stop.is_set():
+        entry, model = server.get(MODEL_NAME)
+        try:
+            results, skipped = model.predict_grades(features)
+            ok = results is not None and len(results) + len(skipped) == len(features)
+        except Exception as e:
+            ok = False
+            logging.error(f"请求失败: {str(e)}")
+        with lock:
+            stats['requests'] += 1
+            stats['errors'] += not ok
+            stats['versions'].add(entry['version'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='模型热更新测试')
+    parser.add_argument('--size', type=int, default=5000, help='训练用的生成学生数')
+    parser.add_argument('--threads', type=int, default=4, help='并发请求线程数')
+    parser.add_argument('--versions', type=int, default=3, help='训练任务依次保存的新版本数')
+    parser.add_argument('--poll-interval', type=float, default=0.1, help='清单检查间隔（秒）')
+    args = parser.parse_args()
+    # 生成数据中的空值会触发大量特征告警
+    logging.disable(logging.WARNING)
+
+    from ml_services import GradePredictionModel, ModelRegistry, ModelServer, FeatureStore, StudentFeatures
+    from benchmark_incremental import generate_correlated_users
+
+    print("=" * 60)
+    print(f"🔄 模型热更新测试（{args.threads} 个请求线程，{args.versions} 次发布）")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        features = StudentFeatures.compute(generate_correlated_users(args.size), 'benchmark')
+        features_path = os.path.join(tmp_dir, 'features.npz')
+        FeatureStore(features_path).save(features)
+        registry_dir = os.path.join(tmp_dir, 'models')
+
+        registry = ModelRegistry(registry_dir, keep_versions=1, mmap_mode='r')
+        model = GradePredictionModel()
+        model.train_model(features)
+        registry.save(MODEL_NAME, model, 'benchmark')
+        server = ModelServer(registry, {MODEL_NAME: GradePredictionModel}, poll_interval=args.poll_interval)
+        server.refresh()
+        server.start()
+
+        batch = features.select(features.user_ids[:200])
+        stats = {'requests': 0, 'errors': 0, 'versions': set()}
+        lock = threading.Lock()
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=run_requests, args=(server, batch, stop, stats, lock))
+            for _ in range(args.threads)
+        ]
+        for thread in threads:
+            thread.start()
+
+        ctx = multiprocessing.get_context('spawn')
+        saved = ctx.Queue()
+        publisher = ctx.Process(
+            target=publish_versions, args=(registry_dir, features_path, args.versions, 0.5, saved)
+        )
+        publisher.start()
+
+        delays = []
+        for _ in range(args.versions):
+            version, saved_at = saved.get(timeout=300)
+            while server.get(MODEL_NAME)[0]['version'] < version:
+                time.sleep(0.001)
+            delay = time.time() - saved_at
+            delays.append(delay)
+            load_seconds = server.status()['models'][MODEL_NAME]['load_seconds']
+            print(f"  版本 {version}: 切换延迟 {delay * 1000:7.1f}ms（其中加载 {load_seconds * 1000:.1f}ms）")
+        publisher.join()
+
+        # 切换完成后继续运行一段时间，确认新请求都使用最新版本
+        latest = server.get(MODEL_NAME)[0]['version']
+        time.sleep(0.1)
+        with lock:
+            stats['versions'] = set()
+        time.sleep(0.5)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        server.stop()
+
+    ok = stats['errors'] == 0 and stats['versions'] == {latest} and server.error_count == 0
+    print(f"\n  请求数: {stats['requests']}, 失败: {stats['errors']}, 加载失败: {server.error_count}")
+    print(f"  平均切换延迟: {np.mean(delays) * 1000:.1f}ms（检查间隔 {args.poll_interval * 1000:.0f}ms）")
+    print(f"  切换后请求使用的版本: {sorted(stats['versions'])}")
+
+    print(f"\n" + "=" * 60)
+    print(f"{'✅' if ok else '❌'} 热更新测试完成")
+    print(f"=" * 60)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
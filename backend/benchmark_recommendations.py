@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+个性化推荐批量计算性能测试脚本
+对比逐个学生分析（改造前的实现）与布尔掩码批量规则求值的吞吐量（名/秒），并校验两者的分析结果一致
+
+用法:
+    python benchmark_recommendations.py
+    python benchmark_recommendations.py --size 50000
+"""
+
+import sys
+import os
+import time
+import json
+import logging
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from ml_services import PersonalizedRecommendation, StudentColumns
+from benchmark_incremental import generate_correlated_users
+
+
+# ---------------------------------------------------------------------------
+# 参照实现：与改造前 _analyze_user_performance 的逐用户规则相同
+# 改造前遇到空值会抛出异常并中断分析，这里与批量实现一致：空值按0处理，字段全部为空的讨论、视频记录视为不存在
+# ---------------------------------------------------------------------------
+
+def _first(records):
+    return records[0] if records else None
+
+
+def _all_empty(record, fields):
+    return all(getattr(record, field, None) is None for field in fields)
+
+
+def legacy_analyze(user):
+    analysis = {
+        'homework_performance': 0,
+        'discussion_activity': 0,
+        'video_engagement': 0,
+        'learning_consistency': 0,
+        'overall_score': 0,
+        'strengths': [],
+        'weaknesses': [],
+        'learning_type': 'unknown'
+    }
+    homework = _first(user.homework_statistic)
+    if homework:
+        scores = [getattr(homework, f'score{i}', 0) or 0 for i in range(2, 10)]
+        valid_scores = [s for s in scores if s > 0]
+        if valid_scores:
+            analysis['homework_performance'] = np.mean(valid_scores)
+            analysis['homework_completion_rate'] = len(valid_scores) / len(scores)
+            if analysis['homework_performance'] >= 85:
+                analysis['strengths'].append('作业完成质量高')
+            elif analysis['homework_performance'] < 60:
+                analysis['weaknesses'].append('作业成绩需要提升')
+            if analysis['homework_completion_rate'] < 0.8:
+                analysis['weaknesses'].append('作业完成率偏低')
+
+    discussion = _first(user.discussion_participation)
+    if discussion and not _all_empty(discussion, ('posted_discussions', 'replied_discussions', 'upvotes_received')):
+        total_activity = (
+            (discussion.posted_discussions or 0) +
+            (discussion.replied_discussions or 0) +
+            (discussion.upvotes_received or 0)
+        )
+        analysis['discussion_activity'] = total_activity
+        if total_activity >= 15:
+            analysis['strengths'].append('课程讨论参与度高')
+        elif total_activity < 5:
+            analysis['weaknesses'].append('课程讨论参与度低')
+
+    video = _first(user.video_watching_details)
+    video_fields = [f'watch_duration{i}' for i in range(1, 8)] + [f'rumination_ratio{i}' for i in range(1, 8)]
+    if video and not _all_empty(video, video_fields):
+        watch_times = [getattr(video, f'watch_duration{i}', 0) or 0 for i in range(1, 8)]
+        rumination_ratios = [getattr(video, f'rumination_ratio{i}', 0) or 0 for i in range(1, 8)]
+        total_watch_time = sum(watch_times)
+        positive = [r for r in rumination_ratios if r > 0]
+        avg_rumination = np.mean(positive) if positive else 0
+        analysis['video_engagement'] = total_watch_time
+        analysis['video_rumination'] = avg_rumination
+        if total_watch_time >= 300:
+            analysis['strengths'].append('视频学习时间充足')
+        elif total_watch_time < 120:
+            analysis['weaknesses'].append('视频学习时间不足')
+        if avg_rumination > 0.3:
+            analysis['weaknesses'].append('视频重复观看率高，理解存在困难')
+
+    synthesis = _first(user.synthesis_grades)
+    if synthesis:
+        analysis['overall_score'] = synthesis.comprehensive_score
+        if synthesis.comprehensive_score >= 90:
+            analysis['learning_type'] = 'high_performer'
+        elif synthesis.comprehensive_score >= 75:
+            analysis['learning_type'] = 'steady_learner'
+        elif synthesis.comprehensive_score >= 60:
+            analysis['learning_type'] = 'struggling_student'
+        else:
+            analysis['learning_type'] = 'passive_learner'
+
+    if homework:
+        scores = [getattr(homework, f'score{i}', 0) or 0 for i in range(2, 10)]
+        non_zero_scores = [s for s in scores if s > 0]
+        if len(non_zero_scores) > 2:
+            score_std = np.std(non_zero_scores)
+            score_mean = np.mean(non_zero_scores)
+            analysis['learning_consistency'] = 1 / (1 + score_std / score_mean) if score_mean > 0 else 0
+            if analysis['learning_consistency'] > 0.8:
+                analysis['strengths'].append('学习表现稳定')
+            elif analysis['learning_consistency'] < 0.5:
+                analysis['weaknesses'].append('学习表现波动较大')
+    return analysis
+
+
+def normalize(analysis):
+    return {key: float(value) if isinstance(value, (int, float, np.floating)) else value for key, value in analysis.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='个性化推荐批量计算性能测试')
+    parser.add_argument('--size', type=int, default=30000, help='生成的学生数')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print("=" * 60)
+    print("🎯 个性化推荐批量计算测试")
+    print("=" * 60)
+
+    users = list(generate_correlated_users(args.size))
+    columns = StudentColumns.from_users(users)
+    recommender = PersonalizedRecommendation()
+
+    start = time.perf_counter()
+    legacy = [legacy_analyze(user) for user in users]
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = recommender.analyze_performance_batch(columns)
+    batch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    recommendations = recommender.batch_generate_recommendations(columns)
+    generate_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bodies = recommender.batch_recommendation_json(columns)
+    json_seconds = time.perf_counter() - start
+
+    identical = all(
+        normalize(expected) == normalize(recommendation['performance_insights'])
+        for expected, recommendation in zip(legacy, recommendations)
+    ) and all(json.loads(body) == recommendation for (_, body), recommendation in zip(bodies, recommendations))
+
+    print(f"\n  学生数: {len(users)}, 不同的（弱项组合, 学习类型）: "
+          f"{len(set(zip(batch['weakness_bits'].tolist(), batch['learning_type'].tolist())))}")
+    print(f"  逐个学生规则分析: {legacy_seconds:8.3f}s  {len(users) / legacy_seconds:10.0f} 名/秒")
+    print(f"  布尔掩码批量分析: {batch_seconds:8.3f}s  {len(users) / batch_seconds:10.0f} 名/秒")
+    print(f"  批量生成完整推荐: {generate_seconds:8.3f}s  {len(users) / generate_seconds:10.0f} 名/秒")
+    print(f"  批量生成推荐JSON: {json_seconds:8.3f}s  {len(users) / json_seconds:10.0f} 名/秒（写入推荐表使用）")
+    print(f"  结果一致性: {'✅ 一致' if identical else '❌ 不一致'}")
+
+    print(f"\n" + "=" * 60)
+    print(f"{'✅' if identical else '❌'} 推荐批量计算测试完成")
+    print(f"=" * 60)
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == "__main__":
+    main()
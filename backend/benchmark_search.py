@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+学生搜索性能测试脚本
+对比 LIKE '%关键词%' 全表扫描、带索引列的前缀匹配和内存 n-gram 索引的查询延迟
+
+用法:
+    python benchmark_search.py                 # 使用 users 表中的真实数据
+    python benchmark_search.py --synthetic 50000   # 额外测试生成的大规模数据（仅内存索引）
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import app, db, User, _load_search_entries, _prefix_search_students
+from services import StudentSearchIndex
+import numpy as np
+
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗'
+GIVEN_NAMES = '伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉兰'
+
+
+def measure(func, terms, repeat=3):
+    """返回每次查询的延迟（毫秒）统计"""
+    latencies = []
+    for term in terms:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(term)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies = np.array(latencies)
+    return {
+        'p50': float(np.percentile(latencies, 50)),
+        'p95': float(np.percentile(latencies, 95)),
+        'max': float(latencies.max())
+    }
+
+
+def print_result(label, stats):
+    print(f"  {label:<24} p50={stats['p50']:8.3f}ms  p95={stats['p95']:8.3f}ms  max={stats['max']:8.3f}ms")
+
+
+def sample_terms(entries, count=30):
+    """从已有学号和姓名中抽取前缀、子串和单字查询词"""
+    rng = random.Random(0)
+    terms = []
+    for student_id, name in rng.sample(entries, min(count, len(entries))):
+        terms.append(student_id[:4])
+        terms.append(student_id[-3:])
+        if name:
+            terms.append(name[-1])
+            terms.append(name[:2])
+    return terms
+
+
+def benchmark_database():
+    """使用 users 表中的数据测试三种查询方式"""
+    print("=" * 60)
+    print("🔍 学生搜索延迟测试（users 表）")
+    print("=" * 60)
+
+    with app.app_context():
+        entries = [(str(student_id), name) for student_id, name in _load_search_entries()]
+        if not entries:
+            print("  users 表中没有学生数据，跳过")
+            return
+        terms = sample_terms(entries)
+        print(f"  学生数: {len(entries)}, 查询词数: {len(terms)}")
+
+        def like_scan(term):
+            return db.session.query(User.id, User.name)\
+                .filter(User.role != 'admin')\
+                .filter(db.or_(User.id.like(f'%{term}%'), User.name.like(f'%{term}%')))\
+                .all()
+
+        index = StudentSearchIndex()
+        start = time.perf_counter()
+        index.rebuild(entries, 'benchmark')
+        print(f"  n-gram 索引构建耗时: {(time.perf_counter() - start) * 1000:.2f}ms")
+
+        print_result("LIKE '%关键词%' 扫描", measure(like_scan, terms))
+        print_result("前缀匹配（索引列）", measure(lambda term: _prefix_search_students(term, 20), terms))
+        print_result("n-gram 索引", measure(lambda term: index.search_any(term, limit=20), terms))
+
+        # 校验 n-gram 索引与 LIKE 扫描的结果集合一致
+        mismatches = [
+            term for term in terms
+            if {row.id for row in like_scan(term)} != {student_id for student_id, _ in index.search_any(term)}
+        ]
+        print(f"  结果一致性: {'✅ 一致' if not mismatches else f'❌ {len(mismatches)} 个查询词结果不一致'}")
+
+
+def benchmark_synthetic(size):
+    """生成大规模学生数据，测试内存索引的构建和查询延迟"""
+    print(f"\n📈 生成数据规模测试: {size} 名学生")
+    rng = random.Random(1)
+    entries = [
+        (f'2023{i:06d}', rng.choice(SURNAMES) + ''.join(rng.choice(GIVEN_NAMES) for _ in range(rng.randint(1, 2))))
+        for i in range(size)
+    ]
+    terms = sample_terms(entries)
+
+    def linear_scan(term):
+        folded = term.casefold()
+        return [(student_id, name) for student_id, name in entries if folded in student_id.casefold() or term in name]
+
+    index = StudentSearchIndex()
+    start = time.perf_counter()
+    index.rebuild(entries, 'synthetic')
+    print(f"  n-gram 索引构建耗时: {(time.perf_counter() - start) * 1000:.2f}ms")
+    print_result("线性扫描", measure(linear_scan, terms, repeat=1))
+    print_result("n-gram 索引", measure(lambda term: index.search_any(term, limit=20), terms))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='学生搜索性能测试')
+    parser.add_argument('--synthetic', type=int, default=0, help='额外测试的生成学生数量')
+    args = parser.parse_args()
+
+    benchmark_database()
+    if args.synthetic > 0:
+        benchmark_synthetic(args.synthetic)
+
+    print(f"\n" + "=" * 60)
+    print(f"✅ 搜索性能测试完成")
+    print(f"=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+相似学生查询性能测试脚本
+在聚类模型的特征空间中，对比 KD 树近邻索引与逐一计算距离（暴力搜索）的单次查询延迟（p50/p99），
+并校验两者找到的近邻距离一致
+
+用法:
+    python benchmark_similar_students.py
+    python benchmark_similar_students.py --size 200000 --queries 2000
+"""
+
+import sys
+import os
+import time
+import logging
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from ml_services import LearningBehaviorClustering, StudentFeatures
+from benchmark_incremental import generate_correlated_users
+
+
+def brute_force_neighbors(features_scaled, point, k):
+    """逐一计算到全部学生的距离，返回最近 k 个（不含自身）的距离"""
+    distances = np.sqrt(((features_scaled - point) ** 2).sum(axis=1))
+    nearest = np.argpartition(distances, k)[:k + 1]
+    return np.sort(distances[nearest])[1:]
+
+
+def percentiles(seconds):
+    return np.percentile(seconds, 50) * 1000, np.percentile(seconds, 99) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='相似学生查询性能测试')
+    parser.add_argument('--size', type=int, default=100000, help='生成的学生数')
+    parser.add_argument('--queries', type=int, default=1000, help='查询次数')
+    parser.add_argument('--k', type=int, default=10, help='每次查询的近邻数')
+    args = parser.parse_args()
+    # 生成数据中的空值会触发大量特征告警
+    logging.disable(logging.WARNING)
+
+    print("=" * 60)
+    print(f"🧭 相似学生查询测试（{args.size} 名学生，k={args.k}）")
+    print("=" * 60)
+
+    features = StudentFeatures.compute(generate_correlated_users(args.size), 'benchmark')
+    clustering = LearningBehaviorClustering()
+    clustering.train_model(features)
+
+    start = time.perf_counter()
+    clustering.build_neighbor_index(features)
+    build_seconds = time.perf_counter() - start
+
+    index = clustering.neighbor_index
+    features_scaled = index.features_scaled
+    rng = np.random.default_rng(0)
+    rows = rng.choice(len(index), min(args.queries, len(index)), replace=False)
+
+    tree_seconds, full_seconds, brute_seconds = [], [], []
+    identical = True
+    for row in rows.tolist():
+        student_id = index.user_ids[row]
+        point = features_scaled[row]
+
+        start = time.perf_counter()
+        neighbors = index.similar_students(point, args.k, exclude=student_id)
+        tree_seconds.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        clustering.find_similar_students(student_id, args.k)
+        full_seconds.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        expected = brute_force_neighbors(features_scaled, point, args.k)
+        brute_seconds.append(time.perf_counter() - start)
+
+        # 距离相同的学生先后顺序可能不同，只比较距离
+        found = np.array([neighbor['distance'] for neighbor in neighbors])
+        identical = identical and len(found) == args.k and np.allclose(found, np.round(expected, 4), atol=1e-4)
+
+    print(f"\n  索引学生数: {len(index)}, 建立索引: {build_seconds * 1000:.1f}ms")
+    for label, seconds in (
+        ('KD 树近邻查询', tree_seconds),
+        ('近邻 + 高分同学策略', full_seconds),
+        ('暴力搜索', brute_seconds)
+    ):
+        p50, p99 = percentiles(seconds)
+        print(f"  {label}: p50 {p50:7.3f}ms  p99 {p99:7.3f}ms")
+    print(f"  KD 树相对暴力搜索加速: {np.median(brute_seconds) / np.median(tree_seconds):.1f}x")
+    print(f"  近邻距离一致性: {'✅ 一致' if identical else '❌ 不一致'}")
+
+    print(f"\n" + "=" * 60)
+    print(f"{'✅' if identical else '❌'} 相似学生查询测试完成")
+    print(f"=" * 60)
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ import os
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
 sys.path.append(project_root)
-from backend.app import db, DiscussionParticipation, app
+from backend.app import db, DiscussionParticipation, app, mark_data_changed
 import pandas as pd
 
 def import_discussions_from_excel(file_path):
@@ -57,6 +57,7 @@ def import_discussions_from_excel(file_path):
 
         db.session.bulk_save_objects(records)
         db.session.commit()
+        mark_data_changed('discussion_participation')
         print(f'成功导入 {len(records)} 条讨论数据')
 
     except (IntegrityError, DataError, DatabaseError) as e:
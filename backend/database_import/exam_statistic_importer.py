@@ -7,7 +7,7 @@ from datetime import datetime
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
 sys.path.append(project_root)
-from backend.app import db, ExamStatistic, app
+from backend.app import db, ExamStatistic, app, mark_data_changed
 
 
 def import_exam_statistics(file_path):
@@ -38,6 +38,7 @@ def import_exam_statistics(file_path):
 
         db.session.bulk_save_objects(records)
         db.session.commit()
+        mark_data_changed('exam_statistic')
         print(f"成功导入{len(records)}条考试统计数据")
 
     except IntegrityError as e:
@@ -4,7 +4,7 @@ import os
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
 sys.path.append(project_root)
-from backend.app import db, HomeworkStatistic, app, User
+from backend.app import db, HomeworkStatistic, app, User, mark_data_changed
 import pandas as pd
 from datetime import datetime
 
@@ -47,6 +47,7 @@ def import_homework_statistics(file_path):
         
         db.session.bulk_save_objects(records)
         db.session.commit()
+        mark_data_changed('homework_statistic')
         print(f'成功导入 {len(records)} 条作业统计数据')
 
     except IntegrityError as e:
@@ -4,7 +4,7 @@ import os
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
 sys.path.append(project_root)
-from backend.app import db, OfflineGrade, app
+from backend.app import db, OfflineGrade, app, mark_data_changed
 import pandas as pd
 # 根据xlsx中的工作表'线下成绩统计', 导入线下成绩数据
 def import_offline_grades(file_path):
@@ -39,6 +39,7 @@ def import_offline_grades(file_path):
 
         db.session.bulk_save_objects(records)
         db.session.commit()
+        mark_data_changed('offline_grades')
         print(f'成功导入 {len(records)} 条线下成绩数据')
 
     except IntegrityError as e:
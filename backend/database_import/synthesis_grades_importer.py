@@ -5,7 +5,7 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
 sys.path.append(project_root)
 from flask import current_app
-from backend.app import db, OfflineGrade, app, SynthesisGrade
+from backend.app import db, OfflineGrade, app, SynthesisGrade, mark_data_changed
 import pandas as pd
 
 def import_synthesis_grades(file_path):
@@ -42,6 +42,7 @@ def import_synthesis_grades(file_path):
 
         db.session.bulk_save_objects(records)
         db.session.commit()
+        mark_data_changed('synthesis_grades')
         print(f'成功导入 {len(records)} 条综合成绩数据')
 
     except (IntegrityError, DataError, DatabaseError) as e:
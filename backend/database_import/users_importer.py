@@ -2,7 +2,7 @@ from sqlalchemy.exc import IntegrityError
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-from backend.app import db, bcrypt, User, app
+from backend.app import db, bcrypt, User, app, mark_data_changed
 import pandas as pd
 import os
 
@@ -30,6 +30,7 @@ def import_users_from_excel(file_path):
 
         db.session.bulk_save_objects(users)
         db.session.commit()
+        mark_data_changed('users')
         print(f'成功导入 {len(users)} 条用户数据')
 
     except IntegrityError as e:
@@ -7,7 +7,7 @@ from datetime import datetime
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
 sys.path.append(project_root)
-from backend.app import db, VideoWatchingDetail, app
+from backend.app import db, VideoWatchingDetail, app, mark_data_changed
 
 
 def import_video_watching_details(file_path):
@@ -74,6 +74,7 @@ def import_video_watching_details(file_path):
 
         db.session.bulk_save_objects(records)
         db.session.commit()
+        mark_data_changed('video_watching_details')
         print(f"成功导入{len(records)}条音视频观看数据")
 
     except IntegrityError as e:
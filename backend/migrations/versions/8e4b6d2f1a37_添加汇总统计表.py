@@ -0,0 +1,42 @@
+"""添加汇总统计表
+
+Revision ID: 8e4b6d2f1a37
+Revises: 3f1c2a7d9b04
+Create Date: 2026-10-17 23:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4b6d2f1a37'
+down_revision = '3f1c2a7d9b04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cohort_stats',
+    sa.Column('id', sa.String(length=20), nullable=False),
+    sa.Column('user_count', sa.Integer(), nullable=False),
+    sa.Column('active_users', sa.Integer(), nullable=False),
+    sa.Column('avg_comprehensive_score', sa.Float(precision=53), nullable=True),
+    sa.Column('max_comprehensive_score', sa.Float(precision=53), nullable=True),
+    sa.Column('min_comprehensive_score', sa.Float(precision=53), nullable=True),
+    sa.Column('avg_exam_score', sa.Float(precision=53), nullable=True),
+    sa.Column('max_exam_score', sa.Float(precision=53), nullable=True),
+    sa.Column('min_exam_score', sa.Float(precision=53), nullable=True),
+    sa.Column('excellent_count', sa.Integer(), nullable=False),
+    sa.Column('good_count', sa.Integer(), nullable=False),
+    sa.Column('medium_count', sa.Integer(), nullable=False),
+    sa.Column('pass_count', sa.Integer(), nullable=False),
+    sa.Column('fail_count', sa.Integer(), nullable=False),
+    sa.Column('data_version', sa.String(length=32), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('cohort_stats')
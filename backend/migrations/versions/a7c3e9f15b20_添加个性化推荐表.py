@@ -0,0 +1,30 @@
+"""添加个性化推荐表
+
+Revision ID: a7c3e9f15b20
+Revises: 8e4b6d2f1a37
+Create Date: 2026-10-18 00:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9f15b20'
+down_revision = '8e4b6d2f1a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('student_recommendations',
+    sa.Column('id', sa.String(length=80), nullable=False),
+    sa.Column('data_version', sa.String(length=32), nullable=False),
+    sa.Column('recommendations', sa.Text(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('student_recommendations')
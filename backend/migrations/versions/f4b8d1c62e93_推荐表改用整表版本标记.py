@@ -0,0 +1,33 @@
+"""推荐表改用整表版本标记
+
+Revision ID: f4b8d1c62e93
+Revises: a7c3e9f15b20
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4b8d1c62e93'
+down_revision = 'a7c3e9f15b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('materialized_versions',
+    sa.Column('id', sa.String(length=80), nullable=False),
+    sa.Column('data_version', sa.String(length=32), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('student_recommendations', schema=None) as batch_op:
+        batch_op.drop_column('data_version')
+
+
+def downgrade():
+    with op.batch_alter_table('student_recommendations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.String(length=32), nullable=False, server_default=''))
+    op.drop_table('materialized_versions')
@@ -7,10 +7,27 @@ from .prediction_model import GradePredictionModel
 from .clustering_analysis import LearningBehaviorClustering
 from .recommendation_system import PersonalizedRecommendation
 from .anomaly_detection import AnomalyDetector
+from .model_registry import ModelRegistry
+from .model_server import ModelServer
+from .neighbor_index import SimilarStudentIndex
+from .training import train_models
+from .feature_engine import FEATURE_VERSION, StudentColumns, StudentFeatures
+from .feature_store import FeatureStore
+from .compiled_trees import CompiledTrees, compile_trees
 
 __all__ = [
     'GradePredictionModel',
     'LearningBehaviorClustering', 
     'PersonalizedRecommendation',
-    'AnomalyDetector'
+    'AnomalyDetector',
+    'ModelRegistry',
+    'ModelServer',
+    'SimilarStudentIndex',
+    'train_models',
+    'FEATURE_VERSION',
+    'StudentColumns',
+    'StudentFeatures',
+    'FeatureStore',
+    'CompiledTrees',
+    'compile_trees'
 ]
\ No newline at end of file
@@ -8,11 +8,14 @@ import pandas as pd
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import RobustScaler
 from sklearn.metrics import classification_report
-import joblib
 import logging
 from datetime import datetime
 
-class AnomalyDetector:
+from .compiled_trees import CompiledTrees, compile_trees
+from .model_io import LazyEstimatorMixin, dump_model_data, load_model_data
+from .feature_engine import as_batch, anomaly_features
+
+class AnomalyDetector(LazyEstimatorMixin):
     def __init__(self, contamination=0.2):
         """
         初始化异常检测器
@@ -23,6 +26,7 @@ class AnomalyDetector:
         self.scaler = RobustScaler()
         self.is_trained = False
         self.data_size = 'unknown'
+        self.compiled = None  # 孤立森林展平后的节点数组，用于推理；只在 mmap 布局下随模型保存
         self.feature_names = [
             'performance_variability', 'completion_anomaly', 'engagement_anomaly',
             'learning_pattern_anomaly', 'academic_deviation', 'behavior_consistency'
@@ -36,92 +40,8 @@ class AnomalyDetector:
         }
         
     def prepare_features(self, users):
-        """准备异常检测特征"""
-        features = []
-        user_ids = []
-        
-        for user in users:
-            try:
-                # 作业相关特征
-                homework = user.homework_statistic[0] if user.homework_statistic else None
-                if homework:
-                    scores = [getattr(homework, f'score{i}', 0) for i in range(2, 10)]
-                    valid_scores = [s for s in scores if s > 0]
-                    
-                    homework_avg = np.mean(valid_scores) if valid_scores else 0
-                    homework_completion_rate = len(valid_scores) / len(scores)
-                    
-                    # 作业一致性（波动程度）
-                    if len(valid_scores) > 2:
-                        homework_consistency = 1 / (1 + np.std(valid_scores) / (np.mean(valid_scores) + 1e-6))
-                    else:
-                        homework_consistency = 0
-                else:
-                    homework_avg = 0
-                    homework_completion_rate = 0
-                    homework_consistency = 0
-                
-                # 讨论参与特征
-                discussion = user.discussion_participation[0] if user.discussion_participation else None
-                if discussion:
-                    discussion_posts = discussion.posted_discussions or 0
-                    discussion_replies = discussion.replied_discussions or 0
-                    total_discussions = discussion.total_discussions or 0
-                    upvotes = discussion.upvotes_received or 0
-                    
-                    # 获赞率（质量指标）
-                    total_activity = discussion_posts + discussion_replies
-                    upvotes_ratio = upvotes / max(total_activity, 1) if total_activity > 0 else 0
-                else:
-                    discussion_posts = 0
-                    discussion_replies = 0
-                    upvotes = 0
-                    upvotes_ratio = 0
-                
-                # 视频学习特征
-                video = user.video_watching_details[0] if user.video_watching_details else None
-                if video:
-                    watch_times = [getattr(video, f'watch_duration{i}', 0) or 0 for i in range(1, 8)]
-                    rumination_ratios = [getattr(video, f'rumination_ratio{i}', 0) or 0 for i in range(1, 8)]
-                    
-                    video_watch_time = sum(watch_times)
-                    valid_ratios = [r for r in rumination_ratios if r > 0]
-                    video_rumination_ratio = np.mean(valid_ratios) if valid_ratios else 0
-                else:
-                    video_watch_time = 0
-                    video_rumination_ratio = 0
-                
-                # 学习模式得分（综合评估）
-                learning_pattern_score = (
-                    homework_completion_rate * 0.3 +
-                    min(discussion_posts + discussion_replies, 20) / 20 * 0.3 +
-                    min(video_watch_time, 500) / 500 * 0.4
-                )
-                
-                # 学术表现
-                synthesis = user.synthesis_grades[0] if user.synthesis_grades else None
-                academic_performance = synthesis.comprehensive_score if synthesis else 0
-                
-                # 总体参与度得分
-                engagement_score = (
-                    homework_completion_rate * 0.4 +
-                    min(discussion_posts + discussion_replies + (upvotes * 2), 30) / 30 * 0.3 +
-                    min(video_watch_time, 400) / 400 * 0.3
-                )
-                
-                features.append([
-                    homework_avg, homework_completion_rate, homework_consistency,
-                    discussion_posts, discussion_replies, upvotes_ratio,
-                    video_watch_time, video_rumination_ratio, learning_pattern_score,
-                    academic_performance, engagement_score
-                ])
-                user_ids.append(user.id)
-                
-            except Exception as e:
-                logging.warning(f"处理用户 {user.id} 异常检测特征时出错: {str(e)}")
-                continue
-        
-        return np.array(features), user_ids
+        """准备异常检测特征，由列式特征引擎一次性计算"""
+        return anomaly_features(users)
     
     def train_model(self, users):
         """优化的异常检测模型训练"""
@@ -156,10 +76,10 @@ class AnomalyDetector:
             
             # 训练异常检测模型
             self.model.fit(features_scaled)
+            self.compiled = compile_trees(self.model)
             
             # 获取异常得分和标签
-            anomaly_scores = self.model.decision_function(features_scaled)
-            anomaly_labels = self.model.predict(features_scaled)
+            anomaly_labels, anomaly_scores = self._score(features_scaled)
             
             # 分析异常情况
             anomaly_count = sum(1 for label in anomaly_labels if label == -1)
@@ -270,20 +190,20 @@ class AnomalyDetector:
             return None
             
         try:
-            features, _ = self.prepare_features([user])
+            features, user_ids = self.prepare_features(as_batch(user))
             if len(features) == 0:
                 return None
                 
             features_scaled = self.scaler.transform(features)
             
             # 预测异常
-            anomaly_label = self.model.predict(features_scaled)[0]
-            anomaly_score = self.model.decision_function(features_scaled)[0]
+            anomaly_labels, anomaly_scores = self._score(features_scaled)
+            anomaly_label, anomaly_score = anomaly_labels[0], anomaly_scores[0]
             
-            is_anomaly = anomaly_label == -1
+            is_anomaly = bool(anomaly_label == -1)
             
             result = {
-                'user_id': user.id,
+                'user_id': user_ids[0],
                 'is_anomaly': is_anomaly,
                 'anomaly_score': float(anomaly_score),
                 'severity': self._get_anomaly_severity(anomaly_score) if is_anomaly else 'normal',
@@ -302,6 +222,17 @@ class AnomalyDetector:
             logging.error(f"异常检测失败: {str(e)}")
             return None
     
+    def _score(self, features_scaled):
+        """
+        返回 (异常标签, 异常得分)，与 self.model.predict / decision_function 逐位一致
+        predict 内部本身就是按 decision_function 是否小于0判断，这里只计算一次得分
+        """
+        if self.compiled is not None:
+            scores = self.compiled.decision_function(features_scaled)
+        else:
+            scores = self.model.decision_function(features_scaled)
+        return np.where(scores < 0, -1, 1), scores
+    
     def _generate_anomaly_recommendations(self, anomaly_types):
         """根据异常类型生成建议"""
         recommendations = []
@@ -359,8 +290,7 @@ class AnomalyDetector:
             features_scaled = self.scaler.transform(features)
             
             # 批量预测
-            anomaly_labels = self.model.predict(features_scaled)
-            anomaly_scores = self.model.decision_function(features_scaled)
+            anomaly_labels, anomaly_scores = self._score(features_scaled)
             
             # 统计结果
             anomalies = []
@@ -424,8 +354,11 @@ class AnomalyDetector:
         
         return " | ".join(report_lines)
     
-    def save_model(self, filepath):
-        """保存异常检测模型"""
+    def save_model(self, filepath, mmap=False):
+        """
+        保存异常检测模型
+        mmap: 为True时使用 mmap 布局（见 model_io），另存原始模型并保存节点数组
+        """
         if self.is_trained:
             model_data = {
                 'model': self.model,
@@ -435,15 +368,27 @@ class AnomalyDetector:
                 'anomaly_types': self.anomaly_types,
                 'anomaly_analysis': getattr(self, 'anomaly_analysis', {})
             }
-            joblib.dump(model_data, filepath)
+            estimator = None
+            if mmap and self.compiled is not None:
+                estimator = model_data.pop('model')
+                model_data['compiled'] = self.compiled.to_arrays()
+            dump_model_data(model_data, filepath, estimator)
             return True
         return False
     
-    def load_model(self, filepath):
-        """加载异常检测模型"""
+    def load_model(self, filepath, mmap_mode=None):
+        """
+        加载异常检测模型
+        mmap_mode: 'r' 时以只读方式映射文件中的数组，多个进程共享同一份页缓存
+        """
         try:
-            model_data = joblib.load(filepath)
-            self.model = model_data['model']
+            model_data = load_model_data(filepath, mmap_mode)
+            if 'compiled' in model_data:
+                self._defer_model(filepath)
+                self.compiled = CompiledTrees.from_arrays(model_data['compiled'])
+            else:
+                self.model = model_data['model']
+                self.compiled = compile_trees(self.model)
             self.scaler = model_data['scaler']
             self.contamination = model_data['contamination']
             self.feature_names = model_data['feature_names']
@@ -3,21 +3,65 @@
 基于学习行为数据对学生进行聚类分析，识别不同的学习模式
 """
 
+import os
 import numpy as np
 import pandas as pd
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import RobustScaler
 from sklearn.metrics import silhouette_score
-import joblib
+from joblib import Parallel, delayed
+from threadpoolctl import threadpool_limits
 import logging
 
+from .feature_engine import as_batch, clustering_features
+from .model_io import dump_model_data, load_model_data
+from .incremental import INCREMENTAL_MIN_SAMPLES, new_sample_mask, needs_full_retrain, remap_points
+from .neighbor_index import SimilarStudentIndex
+
+# 聚类数选择方式：tiers 按样本量分档（2/3/4），auto 按轮廓系数在候选范围内选择
+K_SELECTION_TIERS = 'tiers'
+K_SELECTION_AUTO = 'auto'
+AUTO_K_RANGE = range(2, 7)
+# 轮廓系数的计算量与样本数的平方成正比，超过该数量时只在固定的随机样本上计算
+SILHOUETTE_SAMPLE_SIZE = 2000
+SILHOUETTE_RANDOM_STATE = 42
+
+
+def silhouette_sample(n_samples, sample_size=SILHOUETTE_SAMPLE_SIZE, random_state=SILHOUETTE_RANDOM_STATE):
+    """返回计算轮廓系数所用的样本下标，样本数不超过 sample_size 时使用全部样本"""
+    if n_samples <= sample_size:
+        return np.arange(n_samples)
+    return np.sort(np.random.RandomState(random_state).choice(n_samples, sample_size, replace=False))
+
+
+def sampled_silhouette_score(features, labels, sample=None):
+    """在固定样本上计算轮廓系数，样本内聚类数不足2个或每个样本自成一类时返回None"""
+    if sample is None:
+        sample = silhouette_sample(len(features))
+    sample_labels = labels[sample]
+    if not 1 < len(np.unique(sample_labels)) < len(sample):
+        return None
+    return float(silhouette_score(features[sample], sample_labels))
+
+
+def _fit_candidate(features, n_clusters, sample):
+    model = KMeans(n_clusters=n_clusters, random_state=42, n_init=10).fit(features)
+    return n_clusters, model, sampled_silhouette_score(features, model.labels_, sample)
+
+
 class LearningBehaviorClustering:
-    def __init__(self, n_clusters=3):
+    def __init__(self, n_clusters=3, k_selection=K_SELECTION_TIERS):
         self.n_clusters = n_clusters
+        self.k_selection = k_selection
+        self.silhouette_scores = {}  # 自动选择时各候选聚类数的轮廓系数
+        self.k_source = None  # 最近一次全量训练的聚类数来源：auto 自动选择、preset 调用方指定、tiers 按样本量分档
         self.model = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
         self.scaler = RobustScaler()  # 更鲁棒的缩放器
         self.is_trained = False
         self.data_size = 'unknown'
+        self.trained_ids = []  # 已参与训练的学生，用于增量更新时识别新学生
+        self.cluster_sizes = None  # 每个聚类中心累计的样本数
+        self.neighbor_index = None  # 相似学生近邻索引，每次训练或增量更新后重建
         self.cluster_labels = {
             0: "高效学习型",
             1: "稳步学习型", 
@@ -30,118 +74,57 @@ class LearningBehaviorClustering:
         ]
         
     def prepare_features(self, users):
-        """优化的聚类特征准备"""
-        features = []
-        user_ids = []
-        
-        for user in users:
-            try:
-                # 1. 学习能力指标（基于作业表现）
-                homework = user.homework_statistic[0] if user.homework_statistic else None
-                if homework:
-                    scores = [getattr(homework, f'score{i}', 0) or 0 for i in range(2, 10)]
-                    valid_scores = [s for s in scores if s > 0]
-                    learning_ability = np.mean(valid_scores) if valid_scores else 50
-                    completion_rate = len(valid_scores) / len(scores)
-                else:
-                    learning_ability = 50
-                    completion_rate = 0
-                
-                # 2. 参与度指标（综合讨论和互动）
-                discussion = user.discussion_participation[0] if user.discussion_participation else None
-                if discussion:
-                    posted = discussion.posted_discussions or 0
-                    replied = discussion.replied_discussions or 0
-                    upvotes = discussion.upvotes_received or 0
-                    engagement_level = posted * 2 + replied * 1 + upvotes * 0.5
-                else:
-                    engagement_level = 0
-                
-                # 3. 学习投入度（视频学习时间）
-                video = user.video_watching_details[0] if user.video_watching_details else None
-                if video:
-                    watch_times = [getattr(video, f'watch_duration{i}', 0) or 0 for i in range(1, 8)]
-                    rumination_ratios = [getattr(video, f'rumination_ratio{i}', 0) or 0 for i in range(1, 8)]
-                    
-                    total_watch_time = sum(watch_times)
-                    avg_rumination = np.mean([r for r in rumination_ratios if r > 0]) if any(r > 0 for r in rumination_ratios) else 0
-                    
-                    # 投入度 = 观看时间 - 重复观看
-                    investment_degree = total_watch_time * (1 - min(avg_rumination * 0.5, 0.3))
-                else:
-                    investment_degree = 0
-                
-                # 4. 一致性得分（学习稳定性）
-                if homework and len(valid_scores) > 2:
-                    score_std = np.std(valid_scores)
-                    score_mean = np.mean(valid_scores)
-                    consistency_score = 1.0 / (1.0 + score_std / (score_mean + 1e-6))
-                else:
-                    consistency_score = 0.5
-                
-                # 5. 学术表现
-                synthesis = user.synthesis_grades[0] if user.synthesis_grades else None
-                academic_performance = synthesis.comprehensive_score if synthesis else learning_ability
-                
-                features.append([
-                    learning_ability,      # 学习能力
-                    completion_rate * 100, # 完成率（百分比）
-                    engagement_level,      # 参与度
-                    investment_degree,     # 投入度
-                    consistency_score * 100, # 一致性（百分比）
-                    academic_performance   # 学术表现
-                ])
-                user_ids.append(user.id)
-                
-            except Exception as e:
-                logging.warning(f"处理用户 {user.id} 聚类特征时出错: {str(e)}")
-                continue
-        
-        return np.array(features), user_ids
+        """优化的聚类特征准备，由列式特征引擎一次性计算"""
+        return clustering_features(users)
     
-    def train_model(self, users):
-        """优化的聚类模型训练"""
+    def train_model(self, users, n_clusters=None):
+        """
+        优化的聚类模型训练
+        n_clusters: 指定时直接使用该聚类数（如同一数据版本下已自动选出的聚类数），不再重新选择
+        """
         try:
             features, user_ids = self.prepare_features(users)
+            raw_features = features
             
             if len(features) < 3:
                 logging.warning(f"聚类数据不足: {len(features)}个样本")
                 return False
             
-            # 自适应调整聚类数
             if len(features) < 10:
-                optimal_clusters = min(2, len(features))
                 self.data_size = 'small'
             elif len(features) < 30:
-                optimal_clusters = min(3, len(features))
                 self.data_size = 'medium'
             else:
-                optimal_clusters = min(4, len(features))
                 self.data_size = 'large'
             
-            if optimal_clusters != self.n_clusters:
-                self.n_clusters = optimal_clusters
-                self.model = KMeans(n_clusters=self.n_clusters, random_state=42, n_init=10)
-                logging.info(f"自动调整聚类数为: {self.n_clusters}")
-            
             # 处理异常值
             features = self._handle_outliers(features)
             
             # 特征缩放
             features_scaled = self.scaler.fit_transform(features)
+            sample = silhouette_sample(len(features))
             
-            # 训练聚类模型
-            self.model.fit(features_scaled)
+            if n_clusters is None and self.k_selection == K_SELECTION_AUTO and len(features) > min(AUTO_K_RANGE):
+                # 并行训练各候选聚类数，选择轮廓系数最高者并直接沿用其模型
+                self.n_clusters, self.model, silhouette_avg = self._select_n_clusters(features_scaled, sample)
+                self.k_source = K_SELECTION_AUTO
+                logging.info(f"自动选择聚类数为: {self.n_clusters}, 各聚类数的轮廓系数: {self.silhouette_scores}")
+            else:
+                self._fit_fixed(features_scaled, n_clusters)
+                self.k_source = K_SELECTION_TIERS if n_clusters is None else 'preset'
+                silhouette_avg = sampled_silhouette_score(features_scaled, self.model.labels_, sample)
             
             # 评估聚类效果
-            if len(features) > self.n_clusters:
-                silhouette_avg = silhouette_score(features_scaled, self.model.labels_)
+            if silhouette_avg is not None:
                 logging.info(f"聚类完成 - 轮廓系数: {silhouette_avg:.3f}")
             
             self.is_trained = True
+            self.trained_ids = list(user_ids)
+            self.cluster_sizes = np.bincount(self.model.labels_, minlength=self.n_clusters)
             
             # 分析各聚类特征
             self._analyze_clusters(features_scaled, self.model.labels_, user_ids)
+            self._build_neighbor_index(raw_features, user_ids)
             
             return True
             
@@ -149,6 +132,132 @@ class LearningBehaviorClustering:
             logging.error(f"聚类训练失败: {str(e)}")
             return False
     
+    def _fit_fixed(self, features_scaled, n_clusters=None):
+        """按指定的聚类数训练，未指定时按样本量分档"""
+        if n_clusters is not None:
+            optimal_clusters = min(n_clusters, len(features_scaled))
+        elif len(features_scaled) < 10:
+            optimal_clusters = min(2, len(features_scaled))
+        elif len(features_scaled) < 30:
+            optimal_clusters = min(3, len(features_scaled))
+        else:
+            optimal_clusters = min(4, len(features_scaled))
+        
+        if optimal_clusters != self.n_clusters:
+            self.n_clusters = optimal_clusters
+            self.model = KMeans(n_clusters=self.n_clusters, random_state=42, n_init=10)
+            logging.info(f"自动调整聚类数为: {self.n_clusters}")
+        
+        self.model.fit(features_scaled)
+    
+    def _select_n_clusters(self, features_scaled, sample):
+        """
+        并行训练 AUTO_K_RANGE 中的各个聚类数，在同一组固定样本上比较轮廓系数
+        返回 (聚类数, 模型, 轮廓系数)
+        """
+        candidates = [k for k in AUTO_K_RANGE if k < len(features_scaled)]
+        n_jobs = min(len(candidates), os.cpu_count() or 1)
+        # KMeans 内部本身使用 OpenMP 多线程，并行训练时按任务数分配线程，避免总线程数超过CPU核数
+        with threadpool_limits(limits=max(1, (os.cpu_count() or 1) // n_jobs)):
+            results = Parallel(n_jobs=n_jobs, prefer='threads')(
+                delayed(_fit_candidate)(features_scaled, k, sample) for k in candidates
+            )
+        self.silhouette_scores = {k: score for k, _, score in results}
+        # 轮廓系数相同时选择较小的聚类数
+        return max(results, key=lambda result: (-1 if result[2] is None else result[2], -result[0]))
+    
+    def update_model(self, users):
+        """
+        增量更新：用尚未参与训练的学生更新聚类中心
+        新学生分配到最近的中心后，中心更新为 (累计样本数 × 原中心 + 新样本之和) / 新的累计样本数，
+        与 MiniBatchKMeans.partial_fit 的中心更新规则相同；缩放器按全部学生重新拟合，已有中心同步换算
+        """
+        self.k_source = None
+        if not self.is_trained:
+            return self.train_model(users)
+        
+        try:
+            features, user_ids = self.prepare_features(users)
+            new_mask = new_sample_mask(user_ids, self.trained_ids)
+            new_count = int(new_mask.sum())
+            
+            if self.cluster_sizes is None or needs_full_retrain(new_count, self.trained_ids):
+                logging.info(f"新增 {new_count} 个样本，当前模型不适合增量更新，改为全量训练")
+                return self.train_model(users)
+            if new_count < INCREMENTAL_MIN_SAMPLES:
+                logging.info(f"新增样本 {new_count} 个，暂不更新聚类中心")
+                self._build_neighbor_index(features, user_ids)
+                return True
+            
+            raw_features = features
+            features = self._handle_outliers(features)
+            old_scaler = self.scaler
+            self.scaler = RobustScaler().fit(features)
+            features_scaled = self.scaler.transform(features)
+            centers = remap_points(self.model.cluster_centers_, old_scaler, self.scaler)
+            
+            new_points = features_scaled[new_mask]
+            distances = ((new_points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+            labels = distances.argmin(axis=1)
+            sizes = self.cluster_sizes.astype(np.float64)
+            for cluster_id in range(len(centers)):
+                members = new_points[labels == cluster_id]
+                if len(members) > 0:
+                    centers[cluster_id] = (centers[cluster_id] * sizes[cluster_id] + members.sum(axis=0)) / (sizes[cluster_id] + len(members))
+                    sizes[cluster_id] += len(members)
+            
+            self.model.cluster_centers_ = centers
+            self.cluster_sizes = sizes.astype(np.int64)
+            self.trained_ids = self.trained_ids + [user_id for user_id, new in zip(user_ids, new_mask) if new]
+            self._analyze_clusters(features_scaled, self.model.predict(features_scaled), user_ids)
+            self._build_neighbor_index(raw_features, user_ids)
+            logging.info(f"聚类增量更新完成 - 新增 {new_count} 个样本")
+            return True
+            
+        except Exception as e:
+            logging.error(f"聚类增量更新失败: {str(e)}")
+            return False
+    
+    def _build_neighbor_index(self, features, user_ids):
+        """用当前缩放器在聚类特征空间中重建相似学生索引（使用未截断异常值的特征）"""
+        self.neighbor_index = SimilarStudentIndex.build(
+            features, self.scaler.transform(features), user_ids, self.feature_names
+        )
+    
+    def build_neighbor_index(self, users):
+        """为尚无相似学生索引的已训练模型（如旧版本保存的模型）建立索引"""
+        if not self.is_trained:
+            return False
+        features, user_ids = self.prepare_features(users)
+        self._build_neighbor_index(features, user_ids)
+        return True
+    
+    def find_similar_students(self, student_id, k=10, user=None):
+        """
+        查找学习行为最相似的 k 名学生，以及其中学业表现更高者与该学生的行为差异和学习策略
+        学生在索引中时直接使用索引中的特征；否则用 user（User 对象或只含该学生的 StudentFeatures）计算
+        """
+        index = self.neighbor_index
+        if not self.is_trained or index is None:
+            return None
+        
+        row = index.position(student_id)
+        if row is not None:
+            features, point = index.features[row], index.features_scaled[row]
+        elif user is not None:
+            features, _ = self.prepare_features(as_batch(user))
+            if len(features) == 0:
+                return None
+            features, point = features[0], self.scaler.transform(features)[0]
+        else:
+            return None
+        
+        return {
+            'features': dict(zip(self.feature_names, features.tolist())),
+            'similar_students': index.similar_students(point, k, exclude=student_id),
+            'higher_scorers': index.higher_scorer_strategies(point, features, k, exclude=student_id)
+        }
+    
     def _handle_outliers(self, features):
         """处理异常值"""
         features_clean = features.copy()
@@ -232,18 +341,18 @@ class LearningBehaviorClustering:
             return None
             
         try:
-            features, _ = self.prepare_features([user])
+            features, _ = self.prepare_features(as_batch(user))
             if len(features) == 0:
                 return None
                 
             features_scaled = self.scaler.transform(features)
-            cluster_id = self.model.predict(features_scaled)[0]
+            cluster_id = int(self.model.predict(features_scaled)[0])
             
             result = {
-                'cluster_id': int(cluster_id),
-                'cluster_name': self.cluster_labels.get(int(cluster_id), f"聚类{cluster_id}"),
+                'cluster_id': cluster_id,
+                'cluster_name': self.cluster_labels.get(cluster_id, f"聚类{cluster_id}"),
                 'features': features[0].tolist(),
-                'recommendations': self._generate_cluster_recommendations(int(cluster_id))
+                'recommendations': self._generate_cluster_recommendations(cluster_id)
             }
             
             if hasattr(self, 'cluster_analysis') and cluster_id in self.cluster_analysis:
@@ -313,29 +422,44 @@ class LearningBehaviorClustering:
             logging.error(f"聚类分析失败: {str(e)}")
             return None
     
-    def save_model(self, filepath):
-        """保存聚类模型"""
+    def save_model(self, filepath, mmap=False):
+        """
+        保存聚类模型
+        mmap: 与其他模型接口一致；KMeans 的数组可直接被映射，两种布局相同
+        """
         if self.is_trained:
             model_data = {
                 'model': self.model,
                 'scaler': self.scaler,
                 'cluster_labels': self.cluster_labels,
                 'feature_names': self.feature_names,
-                'cluster_analysis': getattr(self, 'cluster_analysis', {})
+                'cluster_analysis': getattr(self, 'cluster_analysis', {}),
+                'trained_ids': self.trained_ids,
+                'cluster_sizes': self.cluster_sizes,
+                'silhouette_scores': self.silhouette_scores,
+                'neighbor_index': self.neighbor_index
             }
-            joblib.dump(model_data, filepath)
+            dump_model_data(model_data, filepath)
             return True
         return False
     
-    def load_model(self, filepath):
-        """加载聚类模型"""
+    def load_model(self, filepath, mmap_mode=None):
+        """
+        加载聚类模型
+        mmap_mode: 'r' 时聚类中心等数组以只读方式映射文件
+        """
         try:
-            model_data = joblib.load(filepath)
+            model_data = load_model_data(filepath, mmap_mode)
             self.model = model_data['model']
+            self.n_clusters = self.model.n_clusters
             self.scaler = model_data['scaler']
             self.cluster_labels = model_data['cluster_labels']
             self.feature_names = model_data['feature_names']
             self.cluster_analysis = model_data.get('cluster_analysis', {})
+            self.trained_ids = model_data.get('trained_ids', [])
+            self.cluster_sizes = model_data.get('cluster_sizes')
+            self.silhouette_scores = model_data.get('silhouette_scores', {})
+            self.neighbor_index = model_data.get('neighbor_index')
             self.is_trained = True
             return True
         except Exception as e:
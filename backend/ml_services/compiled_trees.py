@@ -0,0 +1,175 @@
+"""
+树模型的数组化推理
+将训练好的 DecisionTreeRegressor / RandomForestRegressor / IsolationForest 展平为连续的节点数组，
+用向量化的逐层遍历代替 sklearn 的 predict，省去输入校验和 joblib 调度的固定开销
+计算顺序与 sklearn 相同（输入先转为 float32，各树结果按顺序累加），输出逐位一致
+"""
+
+import numpy as np
+from sklearn.ensemble import IsolationForest, RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
+
+# 批量推理时每块的行数
+APPLY_CHUNK_ROWS = 2048
+# 超过该行数时 sklearn 的 Cython 逐行遍历更快，交回原模型计算（两者结果逐位一致）
+COMPILED_MAX_ROWS = 4096
+
+
+class CompiledTrees:
+    """
+    所有树的节点依次存放在同一组数组中，节点下标为全局下标
+    叶子节点的左右子节点都指向自身，遍历固定执行 depth 层即可，无需逐行判断是否到达叶子
+    """
+    __slots__ = (
+        'estimator', 'feature', 'threshold', 'children', 'leaf_value', 'roots', 'depth', 'offset', 'denominator'
+    )
+
+    def __init__(self, estimator, feature, threshold, children, leaf_value, roots, depth, offset=None, denominator=None):
+        self.estimator = estimator
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children  # children[2 * i] 为节点 i 的左子节点，children[2 * i + 1] 为右子节点
+        self.leaf_value = leaf_value
+        self.roots = roots
+        self.depth = depth
+        self.offset = offset  # 仅孤立森林：decision_function 的偏移量
+        self.denominator = denominator  # 仅孤立森林：路径长度的归一化分母
+
+    @property
+    def is_isolation_forest(self):
+        return self.offset is not None
+
+    @classmethod
+    def from_estimator(cls, model):
+        """展平已训练的树模型"""
+        if isinstance(model, IsolationForest):
+            from sklearn.ensemble._iforest import _average_path_length
+            trees = [estimator.tree_ for estimator in model.estimators_]
+            feature_maps = model.estimators_features_
+            # 与 IsolationForest._compute_score_samples 相同：叶子贡献 = 节点深度 + 叶子样本数对应的平均路径长度 - 1
+            leaf_values = [
+                path_lengths + average_lengths - 1.0
+                for path_lengths, average_lengths in zip(
+                    model._decision_path_lengths, model._average_path_length_per_tree
+                )
+            ]
+            offset = float(model.offset_)
+            denominator = len(trees) * _average_path_length([model._max_samples])
+        elif isinstance(model, RandomForestRegressor):
+            trees = [estimator.tree_ for estimator in model.estimators_]
+            feature_maps = [None] * len(trees)
+            leaf_values = [tree.value[:, 0, 0] for tree in trees]
+            offset = denominator = None
+        elif isinstance(model, DecisionTreeRegressor):
+            trees = [model.tree_]
+            feature_maps = [None]
+            leaf_values = [model.tree_.value[:, 0, 0]]
+            offset = denominator = None
+        else:
+            raise TypeError(f"不支持的模型类型: {type(model).__name__}")
+        if any(tree.n_outputs != 1 for tree in trees):
+            raise TypeError("只支持单输出的树模型")
+
+        sizes = np.array([tree.node_count for tree in trees], dtype=np.intp)
+        roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.intp)
+        feature = np.empty(sizes.sum(), dtype=np.intp)
+        children = np.empty(2 * sizes.sum(), dtype=np.intp)
+        for tree, feature_map, root in zip(trees, feature_maps, roots):
+            nodes = slice(root, root + tree.node_count)
+            is_leaf = tree.children_left < 0
+            local = np.arange(tree.node_count)
+            # 叶子节点的特征下标置为0，比较结果无论如何都回到自身
+            tree_feature = np.where(is_leaf, 0, tree.feature)
+            if feature_map is not None:
+                tree_feature = np.where(is_leaf, 0, np.asarray(feature_map)[tree_feature])
+            feature[nodes] = tree_feature
+            children[2 * root:2 * (root + tree.node_count):2] = root + np.where(is_leaf, local, tree.children_left)
+            children[2 * root + 1:2 * (root + tree.node_count):2] = root + np.where(is_leaf, local, tree.children_right)
+        return cls(
+            estimator=model,
+            feature=feature,
+            threshold=np.ascontiguousarray(np.concatenate([tree.threshold for tree in trees]), dtype=np.float64),
+            children=children,
+            leaf_value=np.ascontiguousarray(np.concatenate(leaf_values), dtype=np.float64),
+            roots=roots,
+            depth=max(tree.max_depth for tree in trees),
+            offset=offset,
+            denominator=None if denominator is None else float(np.asarray(denominator).reshape(-1)[0])
+        )
+
+    def to_arrays(self):
+        """保存用的数组字典，不含原始 sklearn 模型；以 mmap 方式加载时各数组直接映射文件"""
+        return {slot: getattr(self, slot) for slot in self.__slots__ if slot != 'estimator'}
+
+    @classmethod
+    def from_arrays(cls, arrays, estimator=None):
+        """由 to_arrays 的结果重建；没有原始模型时大批量推理也使用节点数组"""
+        return cls(estimator=estimator, **arrays)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def apply(self, X):
+        """返回每个样本在每棵树中到达的叶子节点，形状为 (树数, 样本数)"""
+        # sklearn 的树在 float32 输入上比较 X <= threshold(float64)
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if len(X) <= APPLY_CHUNK_ROWS:
+            return self._apply(X)
+        # 分块遍历，使每层的中间数组留在CPU缓存中
+        return np.concatenate(
+            [self._apply(X[start:start + APPLY_CHUNK_ROWS]) for start in range(0, len(X), APPLY_CHUNK_ROWS)],
+            axis=1
+        )
+
+    def _apply(self, X):
+        n_samples, n_features = X.shape
+        flat = X.ravel()
+        row_offsets = np.arange(n_samples, dtype=np.intp) * n_features
+        nodes = np.repeat(self.roots[:, None], n_samples, axis=1)
+        for _ in range(self.depth):
+            # 与 sklearn 相同，x <= threshold 时进入左子树
+            go_right = ~(flat[row_offsets + self.feature[nodes]] <= self.threshold[nodes])
+            nodes = self.children[2 * nodes + go_right]
+        return nodes
+
+    def _accumulate(self, X):
+        """按树的顺序逐棵累加叶子值，与 sklearn 的累加顺序一致"""
+        values = self.leaf_value[self.apply(X)]
+        total = np.zeros(values.shape[1], dtype=np.float64)
+        for tree_values in values:
+            total += tree_values
+        return total
+
+    def predict(self, X):
+        """回归树 / 随机森林：各树预测值的平均"""
+        if self.is_isolation_forest:
+            raise TypeError("孤立森林请使用 decision_function")
+        if len(X) > COMPILED_MAX_ROWS and self.estimator is not None:
+            return self.estimator.predict(X)
+        return self._accumulate(X) / self.n_trees
+
+    def score_samples(self, X):
+        """孤立森林：与 IsolationForest.score_samples 相同"""
+        if len(X) > COMPILED_MAX_ROWS and self.estimator is not None:
+            return self.estimator.score_samples(X)
+        depths = self._accumulate(X)
+        if self.denominator == 0:
+            # 只有一个训练样本时 sklearn 将归一化路径长度记为1
+            return -(2 ** -np.ones_like(depths))
+        return -(2 ** (-(depths / self.denominator)))
+
+    def decision_function(self, X):
+        """孤立森林：与 IsolationForest.decision_function 相同，负数表示异常"""
+        return self.score_samples(X) - self.offset
+
+    def predict_labels(self, X):
+        """孤立森林：与 IsolationForest.predict 相同，异常为 -1，正常为 1"""
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+
+def compile_trees(model):
+    """模型是支持的树模型时返回 CompiledTrees，否则返回None（继续使用 sklearn 推理）"""
+    if isinstance(model, (IsolationForest, RandomForestRegressor, DecisionTreeRegressor)):
+        return CompiledTrees.from_estimator(model)
+    return None
@@ -0,0 +1,450 @@
+"""
+列式特征引擎
+将作业、讨论、视频和综合成绩数据整理为 NumPy 列，一次性用带掩码的数组运算计算各模型的全部特征
+特征定义与原先逐用户计算的实现逐位一致（包括均值、标准差的累加顺序）
+"""
+
+import logging
+import functools
+import numpy as np
+
+# 特征定义版本：修改任何特征的计算方式时递增，使特征存储和基于旧特征训练的模型失效
+FEATURE_VERSION = 1
+
+HOMEWORK_FIELDS = tuple(f'score{i}' for i in range(2, 10))
+WATCH_FIELDS = tuple(f'watch_duration{i}' for i in range(1, 8))
+RUMINATION_FIELDS = tuple(f'rumination_ratio{i}' for i in range(1, 8))
+DISCUSSION_FIELDS = ('posted_discussions', 'replied_discussions', 'upvotes_received')
+SYNTHESIS_FIELDS = ('course_points', 'comprehensive_score')
+# 各关联表参与特征计算的字段，按此顺序拼接为一行数值
+RELATION_FIELDS = (
+    ('homework_statistic', HOMEWORK_FIELDS),
+    ('discussion_participation', DISCUSSION_FIELDS),
+    ('video_watching_details', WATCH_FIELDS + RUMINATION_FIELDS),
+    ('synthesis_grades', SYNTHESIS_FIELDS),
+)
+VALUE_FIELDS = tuple(field for _, fields in RELATION_FIELDS for field in fields)
+
+
+class StudentColumns:
+    """
+    按列存放的学生学习数据，每行对应一名学生
+    空值和缺失的关联记录均记为 NaN，has_homework / has_synthesis 标记是否存在对应记录
+    """
+    __slots__ = (
+        'user_ids', 'has_homework', 'homework', 'discussion',
+        'watch', 'rumination', 'has_synthesis', 'course_points', 'comprehensive_score'
+    )
+
+    def __init__(self, user_ids, has_homework, homework, discussion, watch, rumination,
+                 has_synthesis, course_points, comprehensive_score):
+        self.user_ids = list(user_ids)
+        self.has_homework = has_homework
+        self.homework = homework
+        self.discussion = discussion
+        self.watch = watch
+        self.rumination = rumination
+        self.has_synthesis = has_synthesis
+        self.course_points = course_points
+        self.comprehensive_score = comprehensive_score
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def select(self, student_ids):
+        """只保留指定学生的数据，顺序与原有顺序一致，不存在的学号被忽略"""
+        wanted = set(student_ids)
+        rows = np.array([row for row, user_id in enumerate(self.user_ids) if user_id in wanted], dtype=np.int64)
+        return StudentColumns(
+            [self.user_ids[row] for row in rows],
+            *(getattr(self, field)[rows] for field in self.__slots__[1:])
+        )
+
+    @classmethod
+    def from_users(cls, users):
+        """从已加载关联数据的 User 对象（或学生画像）构建"""
+        user_ids, has_homework, has_synthesis, rows = [], [], [], []
+        for user in users:
+            user_ids.append(user.id)
+            values = ()
+            for relation, fields in RELATION_FIELDS:
+                records = getattr(user, relation)
+                values += _record_values(records[0], fields) if records else (None,) * len(fields)
+            has_homework.append(bool(user.homework_statistic))
+            has_synthesis.append(bool(user.synthesis_grades))
+            rows.append(values)
+        return cls._from_matrix(user_ids, has_homework, has_synthesis, _to_matrix(rows, len(VALUE_FIELDS)))
+
+    @classmethod
+    def from_row_chunks(cls, chunks):
+        """
+        从分块读取的数据库行构建，每块转换为数组后即可释放原始行
+        每行依次为 (学号, 作业记录主键, 综合成绩记录主键, *VALUE_FIELDS)，主键为空表示没有该记录
+        """
+        user_ids, has_homework, has_synthesis, blocks = [], [], [], []
+        for rows in chunks:
+            user_ids.extend(row[0] for row in rows)
+            has_homework.extend(row[1] is not None for row in rows)
+            has_synthesis.extend(row[2] is not None for row in rows)
+            blocks.append(_to_matrix([tuple(row[3:]) for row in rows], len(VALUE_FIELDS)))
+        values = np.concatenate(blocks) if blocks else np.empty((0, len(VALUE_FIELDS)))
+        return cls._from_matrix(user_ids, has_homework, has_synthesis, values)
+
+    @classmethod
+    def _from_matrix(cls, user_ids, has_homework, has_synthesis, values):
+        """按 VALUE_FIELDS 的顺序拆分数值矩阵"""
+        blocks = {}
+        offset = 0
+        for relation, fields in RELATION_FIELDS:
+            blocks[relation] = values[:, offset:offset + len(fields)]
+            offset += len(fields)
+        video = blocks['video_watching_details']
+        synthesis = blocks['synthesis_grades']
+        return cls(
+            user_ids=user_ids,
+            has_homework=np.array(has_homework, dtype=bool),
+            homework=blocks['homework_statistic'],
+            discussion=blocks['discussion_participation'],
+            watch=video[:, :len(WATCH_FIELDS)],
+            rumination=video[:, len(WATCH_FIELDS):],
+            has_synthesis=np.array(has_synthesis, dtype=bool),
+            course_points=synthesis[:, 0],
+            comprehensive_score=synthesis[:, 1]
+        )
+
+    def to_frame(self):
+        """转换为以学号为索引的 DataFrame，列名与数据表字段名一致"""
+        import pandas as pd
+        frame = pd.DataFrame(
+            np.column_stack([
+                self.homework, self.discussion, self.watch, self.rumination,
+                self.course_points, self.comprehensive_score
+            ]),
+            index=pd.Index(self.user_ids, name='id'),
+            columns=list(VALUE_FIELDS)
+        )
+        frame.insert(0, 'has_homework', self.has_homework)
+        frame.insert(1, 'has_synthesis', self.has_synthesis)
+        return frame
+
+
+class StudentFeatures:
+    """
+    预先计算的各组特征
+    sets: 特征组名 -> (特征矩阵, 目标值或None, 行号)，行号为该行对应的学生在 user_ids 中的位置
+    """
+    __slots__ = ('user_ids', 'sets', 'data_version', 'feature_version', '_positions', '_set_rows')
+
+    def __init__(self, user_ids, sets, data_version=None, feature_version=FEATURE_VERSION):
+        self.user_ids = list(user_ids)
+        self.sets = sets
+        self.data_version = data_version
+        self.feature_version = feature_version
+        self._positions = None
+        self._set_rows = None
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    @classmethod
+    def compute(cls, users, data_version=None):
+        """对 StudentColumns 或 User 对象序列计算全部已注册的特征组"""
+        columns = as_columns(users)
+        positions = {user_id: row for row, user_id in enumerate(columns.user_ids)}
+        sets = {}
+        for name, func in FEATURE_SETS.items():
+            result = func(columns)
+            targets = result[1] if len(result) == 3 else None
+            rows = np.array([positions[user_id] for user_id in result[-1]], dtype=np.int64)
+            sets[name] = (result[0], targets, rows)
+        return cls(columns.user_ids, sets, data_version)
+
+    def get(self, name):
+        """返回与对应特征函数相同格式的结果"""
+        features, targets, rows = self.sets[name]
+        user_ids = [self.user_ids[row] for row in rows]
+        if targets is None:
+            return features, user_ids
+        return features, targets, user_ids
+
+    def _lookup_tables(self):
+        """
+        首次调用时建立查找表并缓存：学号 -> 学生位置，以及各特征组中 学生位置 -> 特征矩阵行号（不在该组中为-1）
+        """
+        if self._set_rows is None:
+            set_rows = {}
+            for name, (_, _, rows) in self.sets.items():
+                inverse = np.full(len(self.user_ids), -1, dtype=np.int64)
+                inverse[rows] = np.arange(len(rows))
+                set_rows[name] = inverse
+            self._positions = {user_id: row for row, user_id in enumerate(self.user_ids)}
+            self._set_rows = set_rows
+        return self._positions, self._set_rows
+
+    def select(self, student_ids):
+        """
+        只保留指定学生的特征，顺序与原有顺序一致，不存在的学号被忽略
+        通过缓存的查找表直接取出对应行，耗时只与选取的学生数有关，单个学生的请求不随学生总数增长
+        """
+        positions, set_rows = self._lookup_tables()
+        kept = np.array(
+            sorted({positions[student_id] for student_id in student_ids if student_id in positions}), dtype=np.int64
+        )
+        sets = {}
+        for name, (features, targets, _) in self.sets.items():
+            found = set_rows[name][kept]
+            present = found >= 0
+            found = found[present]
+            sets[name] = (features[found], None if targets is None else targets[found], np.flatnonzero(present))
+        return StudentFeatures(
+            [self.user_ids[row] for row in kept], sets, self.data_version, self.feature_version
+        )
+
+
+def as_columns(users):
+    """接受 StudentColumns 或 User 对象序列"""
+    if isinstance(users, StudentColumns):
+        return users
+    return StudentColumns.from_users(users)
+
+
+def as_batch(user):
+    """单个学生的预测接口既可传入 User 对象，也可传入只含一名学生的 StudentColumns / StudentFeatures"""
+    if isinstance(user, (StudentColumns, StudentFeatures)):
+        return user
+    return [user]
+
+
+def student_ids_of(users):
+    """返回批量数据中全部学生的学号"""
+    if isinstance(users, (StudentColumns, StudentFeatures)):
+        return list(users.user_ids)
+    return [user.id for user in users]
+
+
+def _record_values(record, fields):
+    return tuple(getattr(record, field, 0) for field in fields)
+
+
+def _to_matrix(rows, width):
+    # None 在转换为浮点数组时变为 NaN
+    return np.array(rows, dtype=np.float64).reshape(len(rows), width)
+
+
+def _masked_row_sum(values, mask):
+    """
+    逐行对 mask 选中的值求和
+    NumPy 对少于8个元素的数组顺序累加，对8个元素使用成对求和；先将有效值左对齐再按同样的顺序累加，
+    结果与对每行有效值列表调用 np.sum 逐位相同
+    """
+    rows, width = values.shape
+    if width > 8:
+        raise ValueError('最多支持8列')
+    if width == 0:
+        return np.zeros(rows)
+    order = np.argsort(~mask, axis=1, kind='stable')
+    packed = np.take_along_axis(np.where(mask, values, 0.0), order, axis=1)
+    total = packed[:, 0].copy()
+    for column in range(1, width):
+        total += packed[:, column]
+    if width == 8:
+        pairwise = ((packed[:, 0] + packed[:, 1]) + (packed[:, 2] + packed[:, 3])) + \
+                   ((packed[:, 4] + packed[:, 5]) + (packed[:, 6] + packed[:, 7]))
+        total = np.where(mask.all(axis=1), pairwise, total)
+    return total
+
+
+def _masked_row_stats(values, mask):
+    """返回 (有效值个数, 均值, 总体标准差)，与 np.mean / np.std 的计算过程一致；没有有效值的行均值和标准差为 NaN"""
+    count = mask.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = _masked_row_sum(values, mask) / count
+        deviation = np.where(mask, values - mean[:, None], 0.0)
+        std = np.sqrt(_masked_row_sum(deviation * deviation, mask) / count)
+    return count, mean, std
+
+
+def _homework_stats(columns):
+    """作业成绩：空值按0处理，大于0的成绩视为有效"""
+    scores = np.nan_to_num(columns.homework, nan=0.0)
+    valid = scores > 0
+    count, mean, std = _masked_row_stats(scores, valid)
+    completion_rate = count / len(HOMEWORK_FIELDS)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        consistency = 1.0 / (1.0 + std / (mean + 1e-6))
+    return count, mean, std, completion_rate, consistency
+
+
+def _discussion_counts(columns):
+    posts, replies, upvotes = np.nan_to_num(columns.discussion, nan=0.0).T
+    return posts, replies, upvotes
+
+
+def _video_stats(columns):
+    """返回 (总观看时长, 正的反刍比均值)，没有正反刍比时为0"""
+    watch = np.nan_to_num(columns.watch, nan=0.0)
+    total_watch = _masked_row_sum(watch, np.ones(watch.shape, dtype=bool))
+    ratios = np.nan_to_num(columns.rumination, nan=0.0)
+    positive = ratios > 0
+    count, mean, _ = _masked_row_stats(ratios, positive)
+    return total_watch, np.where(count > 0, mean, 0.0)
+
+
+def _upvotes_ratio(upvotes, activity):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(activity > 0, upvotes / np.maximum(activity, 1), 0.0)
+
+
+def _select_ids(columns, keep):
+    return [columns.user_ids[row] for row in np.flatnonzero(keep)]
+
+
+# 已注册的特征组：名称 -> 特征函数
+FEATURE_SETS = {}
+
+
+def feature_set(name):
+    """
+    注册特征组
+    特征函数接收 StudentColumns；包装后也可传入 User 对象序列，传入 StudentFeatures 时直接返回预先计算的结果
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(users):
+            if isinstance(users, StudentFeatures):
+                return users.get(name)
+            return func(as_columns(users))
+        FEATURE_SETS[name] = wrapper
+        return wrapper
+    return decorator
+
+
+def _prediction_features(columns, default_homework_avg):
+    count, mean, _, completion_rate, consistency = _homework_stats(columns)
+    homework_avg = np.where(count > 0, mean, default_homework_avg)
+    homework_consistency = np.where(count > 2, consistency, 0.5)
+
+    posts, replies, upvotes = _discussion_counts(columns)
+    discussion_activity = posts + replies
+    upvotes_ratio = _upvotes_ratio(upvotes, discussion_activity)
+
+    total_watch, avg_rumination = _video_stats(columns)
+    video_engagement = total_watch * (1 - np.minimum(avg_rumination, 0.5))
+
+    learning_consistency = (
+        homework_consistency * 0.4 +
+        np.minimum(completion_rate, 1.0) * 0.3 +
+        np.minimum(discussion_activity / 10, 1.0) * 0.3
+    )
+
+    # 课程积分为空或为0时使用作业均分
+    course_points = np.nan_to_num(columns.course_points, nan=0.0)
+    base_performance = np.where(columns.has_synthesis & (course_points != 0), course_points, homework_avg)
+    targets = np.where(columns.has_synthesis, columns.comprehensive_score, 0.0)
+    keep = targets > 0
+
+    features = np.column_stack([
+        homework_avg, completion_rate, homework_consistency, discussion_activity,
+        upvotes_ratio, video_engagement, learning_consistency, base_performance
+    ])
+    return features[keep], targets[keep], _select_ids(columns, keep)
+
+
+@feature_set('prediction')
+def prediction_features(columns):
+    """
+    成绩预测特征，只保留综合成绩大于0的学生
+    返回 (特征矩阵, 目标值, 用户ID列表)
+    """
+    return _prediction_features(columns, default_homework_avg=50)
+
+
+@feature_set('optimized_prediction')
+def optimized_prediction_features(columns):
+    """优化版成绩预测特征，没有有效作业成绩时作业均分默认为30"""
+    return _prediction_features(columns, default_homework_avg=30)
+
+
+@feature_set('clustering')
+def clustering_features(columns):
+    """学习行为聚类特征，返回 (特征矩阵, 用户ID列表)"""
+    count, mean, _, completion_rate, consistency = _homework_stats(columns)
+    learning_ability = np.where(count > 0, mean, 50)
+    consistency_score = np.where(count > 2, consistency, 0.5)
+
+    posts, replies, upvotes = _discussion_counts(columns)
+    engagement_level = posts * 2 + replies * 1 + upvotes * 0.5
+
+    total_watch, avg_rumination = _video_stats(columns)
+    investment_degree = total_watch * (1 - np.minimum(avg_rumination * 0.5, 0.3))
+
+    academic_performance = np.where(columns.has_synthesis, columns.comprehensive_score, learning_ability)
+
+    features = np.column_stack([
+        learning_ability, completion_rate * 100, engagement_level,
+        investment_degree, consistency_score * 100, academic_performance
+    ])
+    return features, list(columns.user_ids)
+
+
+@feature_set('anomaly')
+def anomaly_features(columns):
+    """
+    异常检测特征，返回 (特征矩阵, 用户ID列表)
+    作业记录中存在空成绩的学生无法计算作业特征，与原实现一样跳过
+    """
+    skipped = columns.has_homework & np.isnan(columns.homework).any(axis=1)
+    for row in np.flatnonzero(skipped):
+        logging.warning(f"处理用户 {columns.user_ids[row]} 异常检测特征时出错: 作业成绩存在空值")
+    keep = ~skipped
+
+    count, mean, _, completion_rate, consistency = _homework_stats(columns)
+    homework_avg = np.where(count > 0, mean, 0.0)
+    homework_consistency = np.where(count > 2, consistency, 0.0)
+
+    posts, replies, upvotes = _discussion_counts(columns)
+    upvotes_ratio = _upvotes_ratio(upvotes, posts + replies)
+
+    video_watch_time, video_rumination_ratio = _video_stats(columns)
+
+    learning_pattern_score = (
+        completion_rate * 0.3 +
+        np.minimum(posts + replies, 20) / 20 * 0.3 +
+        np.minimum(video_watch_time, 500) / 500 * 0.4
+    )
+    academic_performance = np.where(columns.has_synthesis, columns.comprehensive_score, 0.0)
+    engagement_score = (
+        completion_rate * 0.4 +
+        np.minimum(posts + replies + (upvotes * 2), 30) / 30 * 0.3 +
+        np.minimum(video_watch_time, 400) / 400 * 0.3
+    )
+
+    features = np.column_stack([
+        homework_avg, completion_rate, homework_consistency,
+        posts, replies, upvotes_ratio,
+        video_watch_time, video_rumination_ratio, learning_pattern_score,
+        academic_performance, engagement_score
+    ])
+    return features[keep], _select_ids(columns, keep)
+
+
+@feature_set('optimized_clustering')
+def optimized_clustering_features(columns):
+    """优化版聚类特征：[学习能力, 完成率, 讨论数, 观看时长]"""
+    count, mean, _, completion_rate, _ = _homework_stats(columns)
+    learning_ability = np.where(count > 0, mean, 30)
+    posts, replies, _ = _discussion_counts(columns)
+    total_watch, _ = _video_stats(columns)
+    features = np.column_stack([learning_ability, completion_rate * 100, posts + replies, total_watch])
+    return features, list(columns.user_ids)
+
+
+@feature_set('optimized_anomaly')
+def optimized_anomaly_features(columns):
+    """优化版异常检测特征：[成绩波动, 完成率, 讨论数, 反刍比]"""
+    count, _, std, completion_rate, _ = _homework_stats(columns)
+    performance_anomaly = np.where(count > 1, std, 0.0)
+    posts, replies, _ = _discussion_counts(columns)
+    _, avg_rumination = _video_stats(columns)
+    features = np.column_stack([performance_anomaly, completion_rate, posts + replies, avg_rumination])
+    return features, list(columns.user_ids)
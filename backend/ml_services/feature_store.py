@@ -0,0 +1,105 @@
+"""
+学生特征存储
+将各组特征预先计算后保存为运行时目录下的 npz 文件，训练和推理直接读取特征矩阵
+文件中记录特征版本和数据版本，任一与当前不一致时视为过期
+"""
+
+import os
+import threading
+import logging
+import numpy as np
+
+from .feature_engine import FEATURE_VERSION, StudentFeatures
+
+
+class FeatureStore:
+    def __init__(self, path):
+        self.path = path
+        self._features = None  # 当前进程中已加载的特征
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _is_current(features, data_version):
+        return (
+            features is not None
+            and features.feature_version == FEATURE_VERSION
+            and features.data_version == data_version
+        )
+
+    def read(self):
+        """读取特征文件，文件不存在或损坏时返回None"""
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                names = [str(name) for name in data['set_names']]
+                sets = {}
+                for name in names:
+                    targets = data[f'{name}.targets'] if f'{name}.targets' in data.files else None
+                    sets[name] = (data[f'{name}.features'], targets, data[f'{name}.rows'])
+                return StudentFeatures(
+                    [str(user_id) for user_id in data['user_ids']],
+                    sets,
+                    data_version=str(data['data_version']),
+                    feature_version=int(data['feature_version'])
+                )
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"特征文件读取失败: {str(e)}")
+            return None
+
+    def save(self, features):
+        """原子写入特征文件"""
+        arrays = {
+            'user_ids': np.array(features.user_ids, dtype=str),
+            'set_names': np.array(list(features.sets), dtype=str),
+            'data_version': np.array(features.data_version or '', dtype=str),
+            'feature_version': np.array(features.feature_version, dtype=np.int64)
+        }
+        for name, (matrix, targets, rows) in features.sets.items():
+            arrays[f'{name}.features'] = matrix
+            arrays[f'{name}.rows'] = rows
+            if targets is not None:
+                arrays[f'{name}.targets'] = targets
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        # 传入文件对象，避免 np.savez 自动追加 .npz 后缀
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, self.path)
+        self._features = features
+
+    def refresh(self, data_version, columns):
+        """根据 StudentColumns 重新计算全部特征并保存"""
+        features = StudentFeatures.compute(columns, data_version)
+        self.save(features)
+        logging.info(f"特征存储已刷新: {len(features)} 名学生, 数据版本 {data_version}")
+        return features
+
+    def restamp(self, previous_version, data_version):
+        """
+        数据变化不影响特征时，将基于 previous_version 的特征沿用到新数据版本
+        返回是否成功；特征文件已过期时返回False，需要重新计算
+        """
+        with self._lock:
+            features = self.read()
+            if not self._is_current(features, previous_version):
+                return False
+            features.data_version = data_version
+            self.save(features)
+            return True
+
+    def get(self, data_version, load_columns):
+        """
+        返回基于当前数据版本的特征
+        依次使用进程内缓存、特征文件，都已过期时调用 load_columns() 重新计算，多个线程同时发现过期时只计算一次
+        """
+        features = self._features
+        if self._is_current(features, data_version):
+            return features
+        with self._lock:
+            if self._is_current(self._features, data_version):
+                return self._features
+            features = self.read()
+            if self._is_current(features, data_version):
+                self._features = features
+                return features
+            return self.refresh(data_version, load_columns())
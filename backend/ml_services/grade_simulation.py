@@ -0,0 +1,116 @@
+"""
+成绩模拟（what-if）
+在一名学生的原始学习数据上施加多组假设的改变（补交作业、提高作业成绩、增加观看时长、多参与讨论），
+把每组改变作为一行拼成 StudentColumns，由列式特征引擎一次计算特征，预测模型一次完成全部情景的预测
+"""
+
+import itertools
+import numpy as np
+
+from .feature_engine import StudentColumns, HOMEWORK_FIELDS
+
+# 单次模拟最多包含的情景数
+MAX_SCENARIOS = 5000
+# 补交作业未指定成绩、且该学生没有有效作业成绩时使用的成绩
+DEFAULT_COMPLETED_SCORE = 60.0
+
+# 可模拟的改变：参数名 -> (最小值, 最大值, 默认值, 说明)
+SIMULATION_PARAMETERS = {
+    'completed_homework': (0, len(HOMEWORK_FIELDS), 0, '补交的缺交作业次数，按作业顺序补交'),
+    'completed_homework_score': (0, 100, None, '补交作业的成绩，默认为该学生已有作业的平均分'),
+    'homework_score_delta': (-100, 100, 0, '已有作业成绩的增减，结果限制在0到100之间'),
+    'extra_watch_time': (0, 100000, 0, '增加的视频观看时长（与 watch_duration 字段单位相同），平均分配到各章节'),
+    'extra_posts': (0, 10000, 0, '增加的发帖数'),
+    'extra_replies': (0, 10000, 0, '增加的回帖数')
+}
+
+
+def expand_grid(grid):
+    """
+    将 参数名 -> 取值列表 的网格展开为情景列表（笛卡尔积，最后一个参数变化最快）
+    返回 (参数名列表, 情景列表)
+    """
+    if not isinstance(grid, dict) or not grid:
+        raise ValueError('grid 必须是非空对象')
+    names = list(grid)
+    for name in names:
+        if not isinstance(grid[name], list) or not grid[name]:
+            raise ValueError(f'grid 中 {name} 的取值必须是非空列表')
+    size = int(np.prod([len(grid[name]) for name in names]))
+    if size > MAX_SCENARIOS:
+        raise ValueError(f'网格展开后有 {size} 个情景，单次最多 {MAX_SCENARIOS} 个')
+    return names, [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def scenario_arrays(scenarios):
+    """校验情景并转换为 参数名 -> 数组，缺少的参数取默认值（补交成绩缺省时为 NaN）"""
+    if not isinstance(scenarios, list) or not scenarios:
+        raise ValueError('情景列表不能为空')
+    if len(scenarios) > MAX_SCENARIOS:
+        raise ValueError(f'单次最多 {MAX_SCENARIOS} 个情景')
+    if not all(isinstance(scenario, dict) for scenario in scenarios):
+        raise ValueError('每个情景必须是 参数名 -> 取值 的对象')
+    arrays = {}
+    for name, (low, high, default, _) in SIMULATION_PARAMETERS.items():
+        values = []
+        for scenario in scenarios:
+            value = scenario.get(name, default)
+            if value is None and default is None:
+                values.append(np.nan)
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+                raise ValueError(f'{name} 必须是 {low} 到 {high} 之间的数字')
+            values.append(value)
+        arrays[name] = np.array(values, dtype=np.float64)
+    unknown = {name for scenario in scenarios for name in scenario} - set(SIMULATION_PARAMETERS)
+    if unknown:
+        raise ValueError(f'不支持的参数: {", ".join(sorted(unknown))}')
+    arrays['completed_homework'] = np.floor(arrays['completed_homework'])
+    return arrays
+
+
+def perturb_columns(columns, scenarios, baseline=False):
+    """
+    以 columns 中的第一名学生为基础，每个情景生成一行改变后的原始数据
+    columns: 只含该学生的 StudentColumns；scenarios: 情景列表（见 SIMULATION_PARAMETERS）
+    baseline: 为True时在最前面加一行不做任何改变的基准情景
+    """
+    arrays = scenario_arrays(scenarios)
+    if baseline:
+        defaults = {name: np.nan if default is None else default for name, (_, _, default, _) in SIMULATION_PARAMETERS.items()}
+        arrays = {name: np.concatenate([[defaults[name]], values]) for name, values in arrays.items()}
+    count = len(arrays['completed_homework'])
+
+    def repeat(values):
+        return np.repeat(values[:1], count, axis=0)
+
+    homework = np.nan_to_num(repeat(columns.homework), nan=0.0)
+    valid = homework > 0
+    # 补交作业默认取已有有效成绩的平均分
+    valid_scores = homework[0][valid[0]]
+    default_score = valid_scores.mean() if len(valid_scores) else DEFAULT_COMPLETED_SCORE
+    fill_score = np.where(np.isnan(arrays['completed_homework_score']), default_score, arrays['completed_homework_score'])
+
+    homework = np.where(valid, np.clip(homework + arrays['homework_score_delta'][:, None], 0, 100), homework)
+    missing = ~valid
+    fill = missing & (np.cumsum(missing, axis=1) <= arrays['completed_homework'][:, None])
+    homework = np.where(fill, fill_score[:, None], homework)
+
+    discussion = np.nan_to_num(repeat(columns.discussion), nan=0.0)
+    discussion[:, 0] += arrays['extra_posts']
+    discussion[:, 1] += arrays['extra_replies']
+
+    watch = np.nan_to_num(repeat(columns.watch), nan=0.0)
+    watch += arrays['extra_watch_time'][:, None] / watch.shape[1]
+
+    return StudentColumns(
+        user_ids=[columns.user_ids[0]] * count,
+        has_homework=repeat(columns.has_homework) | (arrays['completed_homework'] > 0),
+        homework=homework,
+        discussion=discussion,
+        watch=watch,
+        rumination=repeat(columns.rumination),
+        has_synthesis=repeat(columns.has_synthesis),
+        course_points=repeat(columns.course_points),
+        comprehensive_score=repeat(columns.comprehensive_score)
+    )
@@ -0,0 +1,42 @@
+"""
+增量更新工具
+模型在缩放后的特征空间中训练，重新拟合缩放器后需要把已有模型的参数换算到新的特征空间
+RobustScaler / StandardScaler 对每个特征都是单调递增的仿射变换：换算后决策树的划分结果不变（仅受 float32 舍入影响），
+聚类中心在原始特征空间中的位置不变，但各特征缩放比例变化后，最近中心的判断可能随之变化
+"""
+
+import numpy as np
+
+# 新增学生超过已训练学生的该比例时改为全量重新训练
+INCREMENTAL_MAX_RATIO = 0.5
+# 新增学生少于该数量时暂不更新，留到下次与更多新学生一起更新
+INCREMENTAL_MIN_SAMPLES = 5
+
+
+def new_sample_mask(user_ids, trained_ids):
+    """标记尚未参与训练的学生"""
+    trained = set(trained_ids)
+    return np.array([user_id not in trained for user_id in user_ids], dtype=bool)
+
+
+def needs_full_retrain(new_count, trained_ids):
+    """模型没有记录已训练学生（旧版本模型）或新增学生过多时需要全量重新训练"""
+    return not trained_ids or new_count > len(trained_ids) * INCREMENTAL_MAX_RATIO
+
+
+def remap_points(points, old_scaler, new_scaler):
+    """将旧缩放空间中的点（如聚类中心）换算到新缩放空间"""
+    return new_scaler.transform(old_scaler.inverse_transform(points))
+
+
+def remap_tree_thresholds(estimators, old_scaler, new_scaler):
+    """将决策树的分裂阈值换算到新缩放空间（原地修改）"""
+    for estimator in estimators:
+        tree = estimator.tree_
+        nodes = np.flatnonzero(tree.feature >= 0)
+        if len(nodes) == 0:
+            continue
+        features = tree.feature[nodes]
+        points = np.zeros((len(nodes), tree.n_features))
+        points[np.arange(len(nodes)), features] = tree.threshold[nodes]
+        tree.threshold[nodes] = remap_points(points, old_scaler, new_scaler)[np.arange(len(nodes)), features]
@@ -0,0 +1,62 @@
+"""
+模型文件读写
+mmap 布局：模型文件不压缩，numpy 数组原样存放在文件中，加载时通过 joblib.load(mmap_mode='r') 直接映射，
+同一台机器上的多个 gunicorn worker 共享操作系统页缓存中的同一份数据，而不是各自持有一份副本
+sklearn 的树在反序列化时会把节点复制到私有内存，无法共享，因此树模型在 mmap 布局下保存展平后的节点数组用于推理，
+原始 sklearn 模型另存为同名的 .estimator 文件，只在训练、增量更新等需要时才加载
+"""
+
+import os
+import joblib
+
+ESTIMATOR_SUFFIX = '.estimator'
+
+
+def estimator_path(filepath):
+    """mmap 布局下原始 sklearn 模型的文件路径"""
+    return filepath + ESTIMATOR_SUFFIX
+
+
+def dump_model_data(model_data, filepath, estimator=None):
+    """
+    保存模型数据（不压缩，数组可被映射）
+    estimator: 提供时单独保存为 .estimator 文件，model_data 中不再包含它
+    """
+    if estimator is not None:
+        joblib.dump(estimator, estimator_path(filepath))
+    joblib.dump(model_data, filepath)
+
+
+def load_model_data(filepath, mmap_mode=None):
+    """加载模型数据；mmap_mode='r' 时数组以只读方式映射文件"""
+    return joblib.load(filepath, mmap_mode=mmap_mode)
+
+
+def remove_model_files(filepath):
+    """删除模型文件及其 .estimator 文件"""
+    for path in (filepath, estimator_path(filepath)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class LazyEstimatorMixin:
+    """
+    self.model 在 mmap 布局加载后延迟读取：推理只使用节点数组，首次访问 self.model 时才从 .estimator 文件加载
+    """
+
+    @property
+    def model(self):
+        if self._model is None and getattr(self, '_estimator_path', None):
+            self._model = joblib.load(self._estimator_path)
+            self._estimator_path = None
+        return self._model
+
+    @model.setter
+    def model(self, value):
+        self._model = value
+        self._estimator_path = None
+
+    def _defer_model(self, filepath):
+        """记录 .estimator 文件路径，暂不加载"""
+        self._model = None
+        self._estimator_path = estimator_path(filepath)
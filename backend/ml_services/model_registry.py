@@ -0,0 +1,149 @@
+"""
+模型注册表
+将训练好的模型以版本化文件的形式持久化，请求路径只需加载已训练的模型
+"""
+
+import os
+import json
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+from .model_io import remove_model_files
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+class ModelRegistry:
+    MANIFEST_FILE = 'manifest.json'
+    LOCK_FILE = 'manifest.lock'
+
+    def __init__(self, root_dir, keep_versions=3, mmap_mode=None):
+        """
+        初始化模型注册表
+        root_dir: 模型文件根目录
+        keep_versions: 每个模型保留的历史版本数
+        mmap_mode: 为 'r' 时模型以 mmap 布局保存并以只读映射方式加载，多个 worker 进程共享同一份模型数组
+        """
+        self.root_dir = root_dir
+        self.keep_versions = keep_versions
+        self.mmap_mode = mmap_mode
+        self._lock = threading.Lock()
+        os.makedirs(root_dir, exist_ok=True)
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.root_dir, self.MANIFEST_FILE)
+
+    def read_manifest(self):
+        """读取清单文件"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.error(f"模型清单读取失败: {str(e)}")
+            return {}
+
+    @contextmanager
+    def _manifest_lock(self):
+        """
+        清单读-改-写的互斥锁：线程锁保证同一进程内互斥，文件锁保证与训练子进程、其他 worker 进程互斥
+        """
+        with self._lock, open(os.path.join(self.root_dir, self.LOCK_FILE), 'a+b') as lock_file:
+            if os.name == 'nt':
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            else:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if os.name == 'nt':
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _write_manifest(self, manifest):
+        """原子写入清单文件：先写临时文件再替换，读取方不会读到写了一半的清单"""
+        tmp_path = f'{self.manifest_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def get_entry(self, name):
+        """获取模型当前版本的清单条目"""
+        return self.read_manifest().get(name)
+
+    def save(self, name, model, data_version, metadata=None):
+        """保存模型为新版本，并更新清单"""
+        version = datetime.now().strftime('%Y%m%d%H%M%S%f')
+        relative_path = os.path.join(name, f'{version}.joblib')
+        filepath = os.path.join(self.root_dir, relative_path)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+        if not model.save_model(filepath, mmap=self.mmap_mode is not None):
+            logging.warning(f"模型 {name} 未训练，跳过保存")
+            return None
+
+        entry = {
+            'version': version,
+            'path': relative_path,
+            'data_version': data_version,
+            'trained_at': datetime.now().isoformat()
+        }
+        if metadata:
+            entry.update(metadata)
+
+        # 其他进程可能同时保存别的模型，必须在锁内重新读取清单后再修改，避免覆盖对方的条目
+        with self._manifest_lock():
+            manifest = self.read_manifest()
+            manifest[name] = entry
+            self._write_manifest(manifest)
+
+        self._prune_versions(name, version)
+        logging.info(f"模型 {name} 已保存为版本 {version}")
+        return entry
+
+    def load(self, name, model_factory, data_version=None, feature_version=None):
+        """
+        从文件加载模型当前版本，每次调用都加载新的模型对象；请求路径通过 ModelServer 共享已加载的模型
+        model_factory: 无参构造函数，用于创建空模型后调用 load_model
+        data_version: 指定时，只返回基于该数据版本训练的模型
+        feature_version: 指定时，只返回基于该特征版本训练的模型（保存时通过 metadata 记录）
+        """
+        entry = self.get_entry(name)
+        if not entry:
+            return None
+        if data_version is not None and entry.get('data_version') != data_version:
+            return None
+        if feature_version is not None and entry.get('feature_version') != feature_version:
+            return None
+        return self.load_entry(name, entry, model_factory)
+
+    def load_entry(self, name, entry, model_factory):
+        """按清单条目加载指定版本的模型"""
+        model = model_factory()
+        if not model.load_model(os.path.join(self.root_dir, entry['path']), mmap_mode=self.mmap_mode):
+            return None
+        logging.info(f"模型 {name} 已加载版本 {entry['version']}")
+        return model
+
+    def _prune_versions(self, name, current_version):
+        """清理超出保留数量的历史版本"""
+        model_dir = os.path.join(self.root_dir, name)
+        try:
+            versions = sorted(
+                f for f in os.listdir(model_dir) if f.endswith('.joblib')
+            )
+            for filename in versions[:-self.keep_versions]:
+                if filename != f'{current_version}.joblib':
+                    remove_model_files(os.path.join(model_dir, filename))
+        except OSError as e:
+            logging.warning(f"清理模型 {name} 历史版本失败: {str(e)}")
@@ -0,0 +1,138 @@
+"""
+模型热更新
+后台线程定期检查模型注册表的清单文件，发现新版本后在后台加载，加载完成后整体替换内存中的模型引用，无需重启进程：
+- 替换只是一次引用赋值，处理中的请求继续使用它已取到的旧模型对象，之后的请求取到新模型
+- 清单文件通过 os.replace 原子写入，文件的 inode 或修改时间变化即表示有新版本，不变时不读取清单
+- 旧版本文件被注册表清理后，以 mmap 方式映射的旧模型仍可继续使用（已删除文件的映射在解除前一直有效）
+"""
+
+import os
+import time
+import threading
+import logging
+from datetime import datetime
+
+
+class ModelServer:
+
+    def __init__(self, registry, model_factories, poll_interval=2.0):
+        """
+        初始化模型热更新服务
+        registry: ModelRegistry
+        model_factories: 模型名 -> 无参构造函数，只加载其中列出的模型
+        poll_interval: 检查清单文件的间隔（秒）
+        """
+        self.registry = registry
+        self.model_factories = dict(model_factories)
+        self.poll_interval = poll_interval
+        self._served = {}  # 模型名 -> (清单条目, 模型对象)；每次替换生成新字典，读取方无需加锁
+        self._status = {}  # 模型名 -> 最近一次替换的耗时信息
+        self._signature = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.swap_count = 0
+        self.error_count = 0
+
+    def get(self, name):
+        """返回当前提供服务的 (清单条目, 模型)，尚未加载时返回 (None, None)"""
+        return self._served.get(name, (None, None))
+
+    def start(self):
+        """启动后台检查线程；fork 出的 worker 进程中线程不会被继承，再次调用时重新启动"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name='model-server', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台检查线程"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"模型热更新检查失败: {str(e)}")
+
+    def _manifest_signature(self):
+        try:
+            stat = os.stat(self.registry.manifest_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def refresh(self):
+        """
+        清单文件有变化时加载新版本并替换，返回本次替换的模型名列表
+        加载失败的模型保留旧版本继续服务，下次检查时重试
+        """
+        with self._refresh_lock:
+            signature = self._manifest_signature()
+            if signature is None or signature == self._signature:
+                return []
+            changed_at = signature[1] / 1e9
+            manifest = self.registry.read_manifest()
+            swapped = []
+            failed = False
+            for name, model_factory in self.model_factories.items():
+                entry = manifest.get(name)
+                current = self.get(name)[0]
+                if not entry or (current and current['version'] == entry['version']):
+                    continue
+                start = time.perf_counter()
+                model = self.registry.load_entry(name, entry, model_factory)
+                if model is None:
+                    self.error_count += 1
+                    failed = True
+                    logging.error(f"模型 {name} 版本 {entry['version']} 加载失败，继续使用当前版本")
+                    continue
+                self._swap(name, entry, model, time.perf_counter() - start, time.time() - changed_at)
+                swapped.append(name)
+            if not failed:
+                self._signature = signature
+            return swapped
+
+    def publish(self, name, entry, model):
+        """本进程保存新版本后直接替换，不再从文件重新加载；已在服务更新的版本时忽略"""
+        with self._refresh_lock:
+            current = self.get(name)[0]
+            # 版本号为保存时间，可直接比较先后
+            if current and current['version'] > entry['version']:
+                return
+            self._swap(name, entry, model, 0.0, 0.0)
+
+    def _swap(self, name, entry, model, load_seconds, swap_delay):
+        served = dict(self._served)
+        served[name] = (entry, model)
+        self._served = served
+        self._status[name] = {
+            'load_seconds': round(load_seconds, 4),
+            'swap_delay_seconds': round(swap_delay, 4),
+            'swapped_at': datetime.now().isoformat()
+        }
+        self.swap_count += 1
+        logging.info(f"模型 {name} 已切换到版本 {entry['version']}，加载耗时 {load_seconds:.3f}s")
+
+    def status(self):
+        """各模型当前提供服务的版本及最近一次替换的耗时"""
+        models = {}
+        for name, (entry, _) in self._served.items():
+            models[name] = {
+                'version': entry['version'],
+                'data_version': entry.get('data_version'),
+                'trained_at': entry.get('trained_at'),
+                **self._status.get(name, {})
+            }
+        return {
+            'models': models,
+            'poll_interval': self.poll_interval,
+            'watching': self._thread is not None and self._thread.is_alive(),
+            'swap_count': self.swap_count,
+            'error_count': self.error_count
+        }
@@ -0,0 +1,116 @@
+"""
+相似学生近邻索引
+在聚类模型的特征空间（学习能力、完成率、讨论投入、视频投入、稳定性、学业表现）中，
+用聚类模型的缩放器把各特征换算到同一尺度后建立 KD 树，单次查询约 O(log n)，无需与全体学生逐一比较
+特征只有6维，KD 树的查询比 BallTree 更快
+"""
+
+import numpy as np
+from sklearn.neighbors import KDTree
+
+# 学业表现在聚类特征中的列号，用于筛选成绩更高的相似学生
+ACADEMIC_PERFORMANCE_COLUMN = 5
+# 查找成绩更高的相似学生时，候选近邻数为 k 的倍数
+HIGHER_SCORER_CANDIDATES = 10
+# 高分同学的特征均值比当前学生高出该值（缩放后的单位）以上时才给出对应策略
+STRATEGY_MIN_GAP = 0.1
+# 各行为特征对应的学习策略，成绩更高的相似学生在该特征上明显高于当前学生时给出
+BEHAVIOR_STRATEGIES = {
+    'learning_ability': '提高作业质量，认真订正错题',
+    'completion_rate': '按时完成每一次作业',
+    'engagement_level': '更多地参与课程讨论，主动提问和回复',
+    'investment_degree': '增加视频学习时间，减少反复回看',
+    'consistency_score': '保持稳定的学习节奏，避免成绩大起大落'
+}
+
+
+class SimilarStudentIndex:
+    """
+    tree: 缩放后特征上的 KD 树
+    features: 原始（未缩放）特征，用于展示和比较
+    """
+
+    def __init__(self, tree, user_ids, features, feature_names):
+        self.tree = tree
+        self.user_ids = list(user_ids)
+        self.features = features
+        self.feature_names = list(feature_names)
+        self._positions = None
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    @classmethod
+    def build(cls, features, features_scaled, user_ids, feature_names, leaf_size=40):
+        """由聚类特征及其缩放结果建立索引"""
+        tree = KDTree(np.ascontiguousarray(features_scaled, dtype=np.float64), leaf_size=leaf_size)
+        return cls(tree, user_ids, np.asarray(features, dtype=np.float64), feature_names)
+
+    @property
+    def features_scaled(self):
+        """KD 树中保存的缩放后特征（不复制）"""
+        return np.asarray(self.tree.data)
+
+    def position(self, student_id):
+        """学生在索引中的行号，不在索引中时返回None"""
+        if self._positions is None:
+            self._positions = {user_id: row for row, user_id in enumerate(self.user_ids)}
+        return self._positions.get(student_id)
+
+    def _query(self, point_scaled, k, exclude):
+        """返回 (距离, 行号)，按距离从近到远排列，不含学号为 exclude 的学生"""
+        k = min(k + 1, len(self.user_ids))
+        distances, rows = self.tree.query(np.asarray(point_scaled, dtype=np.float64).reshape(1, -1), k=k)
+        return [
+            (distance, row) for distance, row in zip(distances[0].tolist(), rows[0].tolist())
+            if self.user_ids[row] != exclude
+        ]
+
+    def similar_students(self, point_scaled, k=10, exclude=None):
+        """学习行为最相似的 k 名学生"""
+        return [
+            {
+                'student_id': self.user_ids[row],
+                'distance': round(distance, 4),
+                'features': dict(zip(self.feature_names, self.features[row].tolist()))
+            }
+            for distance, row in self._query(point_scaled, k, exclude)[:k]
+        ]
+
+    def higher_scorer_strategies(self, point_scaled, features, k=10, exclude=None):
+        """
+        在学习行为相似的学生中找出学业表现高于当前学生的 k 名，比较他们与当前学生的各项行为特征
+        features: 当前学生未缩放的特征
+        返回高分同学名单、各特征的均值差，以及按差距（以缩放后的单位计）从大到小排列的学习策略
+        """
+        score = features[ACADEMIC_PERFORMANCE_COLUMN]
+        candidates = self._query(point_scaled, k * HIGHER_SCORER_CANDIDATES, exclude)
+        rows = [row for _, row in candidates if self.features[row, ACADEMIC_PERFORMANCE_COLUMN] > score][:k]
+        if not rows:
+            return {'students': [], 'comparison': [], 'strategies': []}
+
+        peers = self.features[rows]
+        peer_mean = peers.mean(axis=0)
+        # 各特征的差距以缩放后的单位比较，使不同量纲的特征可以排序
+        scaled_gap = self.features_scaled[rows].mean(axis=0) - np.asarray(point_scaled, dtype=np.float64).reshape(-1)
+        comparison = []
+        for column, name in enumerate(self.feature_names):
+            comparison.append({
+                'feature': name,
+                'student_value': round(float(features[column]), 2),
+                'peer_average': round(float(peer_mean[column]), 2),
+                'difference': round(float(peer_mean[column] - features[column]), 2),
+                'scaled_gap': float(scaled_gap[column])
+            })
+        strategies = [
+            BEHAVIOR_STRATEGIES[item['feature']]
+            for item in sorted(comparison, key=lambda item: -item['scaled_gap'])
+            if item['feature'] in BEHAVIOR_STRATEGIES and item['scaled_gap'] > STRATEGY_MIN_GAP
+        ]
+        for item in comparison:
+            item['scaled_gap'] = round(item['scaled_gap'], 4)
+        return {
+            'students': [self.user_ids[row] for row in rows],
+            'comparison': comparison,
+            'strategies': strategies
+        }
@@ -12,11 +12,16 @@ from sklearn.cluster import KMeans, DBSCAN
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler, RobustScaler
 from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import mean_squared_error, r2_score, silhouette_score
+from sklearn.metrics import mean_squared_error, r2_score
 import joblib
 import os
 import logging
 
+from .clustering_analysis import sampled_silhouette_score
+from .feature_engine import (
+    as_batch, optimized_prediction_features, optimized_clustering_features, optimized_anomaly_features
+)
+
 class OptimizedGradePredictionModel:
     """优化的成绩预测模型"""
     
@@ -47,93 +52,9 @@ class OptimizedGradePredictionModel:
         ]
         
     def prepare_features(self, users):
-        """优化的特征准备"""
-        features = []
-        targets = []
-        
-        for user in users:
-            try:
-                # 1. 作业特征（更鲁棒的处理）
-                homework = user.homework_statistic[0] if user.homework_statistic else None
-                if homework:
-                    scores = [getattr(homework, f'score{i}', 0) or 0 for i in range(2, 10)]
-                    valid_scores = [s for s in scores if s > 0]
-                    
-                    homework_avg = np.mean(valid_scores) if valid_scores else 30  # 默认值
-                    homework_completion_rate = len(valid_scores) / len(scores)
-                    
-                    # 作业一致性（新特征）
-                    if len(valid_scores) > 2:
-                        homework_consistency = 1.0 / (1.0 + np.std(valid_scores) / (np.mean(valid_scores) + 1e-6))
-                    else:
-                        homework_consistency = 0.5
-                else:
-                    homework_avg = 30
-                    homework_completion_rate = 0
-                    homework_consistency = 0.5
-                
-                # 2. 讨论特征（合并处理）
-                discussion = user.discussion_participation[0] if user.discussion_participation else None
-                if discussion:
-                    posts = discussion.posted_discussions or 0
-                    replies = discussion.replied_discussions or 0
-                    upvotes = discussion.upvotes_received or 0
-                    
-                    discussion_activity = posts + replies
-                    upvotes_ratio = upvotes / max(discussion_activity, 1) if discussion_activity > 0 else 0
-                else:
-                    discussion_activity = 0
-                    upvotes_ratio = 0
-                
-                # 3. 视频学习特征（综合指标）
-                video = user.video_watching_details[0] if user.video_watching_details else None
-                if video:
-                    watch_times = [getattr(video, f'watch_duration{i}', 0) or 0 for i in range(1, 8)]
-                    rumination_ratios = [getattr(video, f'rumination_ratio{i}', 0) or 0 for i in range(1, 8)]
-                    
-                    total_watch_time = sum(watch_times)
-                    avg_rumination = np.mean([r for r in rumination_ratios if r > 0]) if any(r > 0 for r in rumination_ratios) else 0
-                    
-                    # 视频投入度 = 观看时间 - 重复观看惩罚
-                    video_engagement = total_watch_time * (1 - min(avg_rumination, 0.5))
-                else:
-                    video_engagement = 0
-                
-                # 4. 学习一致性指标（新特征）
-                learning_consistency = (
-                    homework_consistency * 0.4 + 
-                    min(homework_completion_rate, 1.0) * 0.3 + 
-                    min(discussion_activity / 10, 1.0) * 0.3
-                )
-                
-                # 5. 基础表现指标
-                synthesis = user.synthesis_grades[0] if user.synthesis_grades else None
-                if synthesis:
-                    base_performance = synthesis.course_points or homework_avg
-                    target = synthesis.comprehensive_score
-                else:
-                    base_performance = homework_avg
-                    target = 0
-                
-                # 只包含有效目标的数据
-                if target > 0:
-                    features.append([
-                        homework_avg,
-                        homework_completion_rate,
-                        homework_consistency,
-                        discussion_activity,
-                        upvotes_ratio,
-                        video_engagement,
-                        learning_consistency,
-                        base_performance
-                    ])
-                    targets.append(target)
-                    
-            except Exception as e:
-                logging.warning(f"处理用户 {user.id} 数据时出错: {str(e)}")
-                continue
-        
-        return np.array(features), np.array(targets)
+        """优化的特征准备（列式特征引擎，作业默认均分为30）"""
+        features, targets, _ = optimized_prediction_features(users)
+        return features, targets
     
     def train_model(self, users):
         """优化的模型训练"""
@@ -205,7 +126,7 @@ class OptimizedGradePredictionModel:
             return None
             
         try:
-            features, _ = self.prepare_features([user])
+            features, _ = self.prepare_features(as_batch(user))
             if len(features) == 0:
                 return None
                 
@@ -216,7 +137,7 @@ class OptimizedGradePredictionModel:
             confidence = self._calculate_confidence(features[0])
             
             # 特征重要性（仅对支持的模型）
-            feature_importance = self._get_feature_importance()
+            feature_importance = self.get_feature_importance()
             
             return {
                 'predicted_score': max(0, min(100, float(prediction))),  # 限制在合理范围
@@ -241,7 +162,7 @@ class OptimizedGradePredictionModel:
         else:
             return 'low'
     
-    def _get_feature_importance(self):
+    def get_feature_importance(self):
         """获取特征重要性"""
         try:
             if hasattr(self.model, 'feature_importances_'):
@@ -327,8 +248,8 @@ class OptimizedClusteringModel:
             self.model.fit(features_scaled)
             
             # 评估聚类效果
-            if len(features) > self.n_clusters:
-                silhouette_avg = silhouette_score(features_scaled, self.model.labels_)
+            silhouette_avg = sampled_silhouette_score(features_scaled, self.model.labels_)
+            if silhouette_avg is not None:
                 logging.info(f"聚类完成 - 轮廓系数: {silhouette_avg:.3f}")
             
             self.is_trained = True
@@ -340,43 +261,7 @@ class OptimizedClusteringModel:
     
     def _prepare_clustering_features(self, users):
         """准备聚类特征"""
-        features = []
-        user_ids = []
-        
-        for user in users:
-            try:
-                # 学习能力指标
-                homework = user.homework_statistic[0] if user.homework_statistic else None
-                if homework:
-                    scores = [getattr(homework, f'score{i}', 0) or 0 for i in range(2, 10)]
-                    valid_scores = [s for s in scores if s > 0]
-                    learning_ability = np.mean(valid_scores) if valid_scores else 30
-                    completion_rate = len(valid_scores) / len(scores)
-                else:
-                    learning_ability = 30
-                    completion_rate = 0
-                
-                # 参与度指标
-                discussion = user.discussion_participation[0] if user.discussion_participation else None
-                engagement = (discussion.posted_discussions or 0) + (discussion.replied_discussions or 0) if discussion else 0
-                
-                # 学习投入度
-                video = user.video_watching_details[0] if user.video_watching_details else None
-                if video:
-                    watch_times = [getattr(video, f'watch_duration{i}', 0) or 0 for i in range(1, 8)]
-                    investment = sum(watch_times)
-                else:
-                    investment = 0
-                
-                features.append([learning_ability, completion_rate * 100, engagement, investment])
-                user_ids.append(user.id)
-                
-            except Exception as e:
-                logging.warning(f"处理用户 {user.id} 聚类特征时出错: {str(e)}")
-                continue
-        
-        return np.array(features), user_ids
-
+        return optimized_clustering_features(users)
 
 class OptimizedAnomalyDetector:
     """优化的异常检测模型"""
@@ -423,39 +308,4 @@ class OptimizedAnomalyDetector:
     
     def _prepare_anomaly_features(self, users):
         """准备异常检测特征"""
-        features = []
-        user_ids = []
-        
-        for user in users:
-            try:
-                # 综合多个维度的异常指标
-                homework = user.homework_statistic[0] if user.homework_statistic else None
-                if homework:
-                    scores = [getattr(homework, f'score{i}', 0) or 0 for i in range(2, 10)]
-                    valid_scores = [s for s in scores if s > 0]
-                    performance_anomaly = np.std(valid_scores) if len(valid_scores) > 1 else 0
-                    completion_anomaly = len(valid_scores) / len(scores)
-                else:
-                    performance_anomaly = 0
-                    completion_anomaly = 0
-                
-                # 行为异常指标
-                discussion = user.discussion_participation[0] if user.discussion_participation else None
-                behavior_anomaly = (discussion.posted_discussions or 0) + (discussion.replied_discussions or 0) if discussion else 0
-                
-                # 学习模式异常
-                video = user.video_watching_details[0] if user.video_watching_details else None
-                if video:
-                    rumination_ratios = [getattr(video, f'rumination_ratio{i}', 0) or 0 for i in range(1, 8)]
-                    pattern_anomaly = np.mean([r for r in rumination_ratios if r > 0]) if any(r > 0 for r in rumination_ratios) else 0
-                else:
-                    pattern_anomaly = 0
-                
-                features.append([performance_anomaly, completion_anomaly, behavior_anomaly, pattern_anomaly])
-                user_ids.append(user.id)
-                
-            except Exception as e:
-                logging.warning(f"处理用户 {user.id} 异常特征时出错: {str(e)}")
-                continue
-        
-        return np.array(features), user_ids
\ No newline at end of file
+        return optimized_anomaly_features(users)
\ No newline at end of file
@@ -11,116 +11,46 @@ from sklearn.linear_model import Ridge
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import mean_squared_error, r2_score
 from sklearn.preprocessing import RobustScaler
-import joblib
 import os
 import logging
 
-class GradePredictionModel:
+from .feature_engine import as_batch, as_columns, student_ids_of, prediction_features
+from .grade_simulation import perturb_columns
+from .compiled_trees import CompiledTrees, compile_trees
+from .model_io import LazyEstimatorMixin, dump_model_data, load_model_data
+from .incremental import INCREMENTAL_MIN_SAMPLES, new_sample_mask, needs_full_retrain, remap_tree_thresholds
+
+class GradePredictionModel(LazyEstimatorMixin):
     def __init__(self):
         # 自适应模型选择
         self.model = None
         self.scaler = RobustScaler()  # 更鲁棒的缩放器
         self.is_trained = False
         self.data_size = 'unknown'
+        self.trained_ids = []  # 已参与训练的学生，用于增量更新时识别新学生
+        self.compiled = None  # 树模型展平后的节点数组，用于推理；只在 mmap 布局下随模型保存
+        self._feature_importance = None  # 特征重要性缓存，mmap 布局加载时无需读取原始模型
         self.feature_names = [
             'homework_avg', 'homework_completion_rate', 'homework_consistency',
             'discussion_activity', 'upvotes_ratio', 'video_engagement',
             'learning_consistency', 'base_performance'
         ]
         
-    def prepare_features(self, users):
-        """优化的特征准备"""
-        features = []
-        targets = []
-        
-        for user in users:
-            try:
-                # 1. 作业特征（更鲁棒的处理）
-                homework = user.homework_statistic[0] if user.homework_statistic else None
-                if homework:
-                    scores = [getattr(homework, f'score{i}', 0) or 0 for i in range(2, 10)]
-                    valid_scores = [s for s in scores if s > 0]
-                    
-                    homework_avg = np.mean(valid_scores) if valid_scores else 50  # 默认值
-                    homework_completion_rate = len(valid_scores) / len(scores)
-                    
-                    # 作业一致性（新特征）
-                    if len(valid_scores) > 2:
-                        homework_consistency = 1.0 / (1.0 + np.std(valid_scores) / (np.mean(valid_scores) + 1e-6))
-                    else:
-                        homework_consistency = 0.5
-                else:
-                    homework_avg = 50
-                    homework_completion_rate = 0
-                    homework_consistency = 0.5
-                
-                # 2. 讨论特征（合并处理）
-                discussion = user.discussion_participation[0] if user.discussion_participation else None
-                if discussion:
-                    posts = discussion.posted_discussions or 0
-                    replies = discussion.replied_discussions or 0
-                    upvotes = discussion.upvotes_received or 0
-                    
-                    discussion_activity = posts + replies
-                    upvotes_ratio = upvotes / max(discussion_activity, 1) if discussion_activity > 0 else 0
-                else:
-                    discussion_activity = 0
-                    upvotes_ratio = 0
-                
-                # 3. 视频学习特征（综合指标）
-                video = user.video_watching_details[0] if user.video_watching_details else None
-                if video:
-                    watch_times = [getattr(video, f'watch_duration{i}', 0) or 0 for i in range(1, 8)]
-                    rumination_ratios = [getattr(video, f'rumination_ratio{i}', 0) or 0 for i in range(1, 8)]
-                    
-                    total_watch_time = sum(watch_times)
-                    avg_rumination = np.mean([r for r in rumination_ratios if r > 0]) if any(r > 0 for r in rumination_ratios) else 0
-                    
-                    # 视频投入度 = 观看时间 - 重复观看惩罚
-                    video_engagement = total_watch_time * (1 - min(avg_rumination, 0.5))
-                else:
-                    video_engagement = 0
-                
-                # 4. 学习一致性指标（新特征）
-                learning_consistency = (
-                    homework_consistency * 0.4 + 
-                    min(homework_completion_rate, 1.0) * 0.3 + 
-                    min(discussion_activity / 10, 1.0) * 0.3
-                )
-                
-                # 5. 基础表现指标
-                synthesis = user.synthesis_grades[0] if user.synthesis_grades else None
-                if synthesis:
-                    base_performance = synthesis.course_points or homework_avg
-                    target = synthesis.comprehensive_score
-                else:
-                    base_performance = homework_avg
-                    target = 0
-                
-                # 只包含有效目标的数据
-                if target > 0:
-                    features.append([
-                        homework_avg,
-                        homework_completion_rate,
-                        homework_consistency,
-                        discussion_activity,
-                        upvotes_ratio,
-                        video_engagement,
-                        learning_consistency,
-                        base_performance
-                    ])
-                    targets.append(target)
-                    
-            except Exception as e:
-                logging.warning(f"处理用户 {user.id} 数据时出错: {str(e)}")
-                continue
-        
-        return np.array(features), np.array(targets)
+    def prepare_features(self, users, return_user_ids=False):
+        """
+        优化的特征准备，由列式特征引擎一次性计算全部用户的特征
+        users: User 对象序列、StudentColumns 或 StudentFeatures
+        return_user_ids: 为True时额外返回每一行特征对应的用户ID
+        """
+        features, targets, user_ids = prediction_features(users)
+        if return_user_ids:
+            return features, targets, user_ids
+        return features, targets
     
     def train_model(self, users):
         """优化的模型训练"""
         try:
-            features, targets = self.prepare_features(users)
+            features, targets, user_ids = self.prepare_features(users, return_user_ids=True)
             
             if len(features) < 3:
                 logging.warning(f"训练数据不足，当前有{len(features)}个有效样本，至少需要3个样本")
@@ -168,12 +98,53 @@ class GradePredictionModel:
                 logging.info(f"小数据集训练完成 - MSE: {mse:.2f}, R2: {r2:.3f}")
             
             self.is_trained = True
+            self.trained_ids = list(user_ids)
+            self.compiled = compile_trees(self.model)
+            self._feature_importance = None
             return True
             
         except Exception as e:
             logging.error(f"模型训练失败: {str(e)}")
             return False
     
+    def update_model(self, users, new_estimators=10):
+        """
+        增量更新：只用尚未参与训练的学生更新模型
+        随机森林保留已有的树，新增 new_estimators 棵只用新学生训练的树；缩放器按全部学生重新拟合，已有树的分裂阈值同步换算
+        岭回归、决策树（小数据集）或新增学生过多时改为全量重新训练
+        """
+        if not self.is_trained:
+            return self.train_model(users)
+        
+        try:
+            features, targets, user_ids = self.prepare_features(users, return_user_ids=True)
+            new_mask = new_sample_mask(user_ids, self.trained_ids)
+            new_count = int(new_mask.sum())
+            
+            if not isinstance(self.model, RandomForestRegressor) or needs_full_retrain(new_count, self.trained_ids):
+                logging.info(f"新增 {new_count} 个样本，当前模型不适合增量更新，改为全量训练")
+                return self.train_model(users)
+            if new_count < INCREMENTAL_MIN_SAMPLES:
+                logging.info(f"新增样本 {new_count} 个，暂不更新模型")
+                return True
+            
+            features = self._handle_outliers(features)
+            old_scaler = self.scaler
+            self.scaler = RobustScaler().fit(features)
+            remap_tree_thresholds(self.model.estimators_, old_scaler, self.scaler)
+            
+            self.model.set_params(warm_start=True, n_estimators=len(self.model.estimators_) + new_estimators)
+            self.model.fit(self.scaler.transform(features[new_mask]), targets[new_mask])
+            self.trained_ids = self.trained_ids + [user_id for user_id, new in zip(user_ids, new_mask) if new]
+            self.compiled = compile_trees(self.model)
+            self._feature_importance = None
+            logging.info(f"增量更新完成 - 新增 {new_count} 个样本，共 {len(self.model.estimators_)} 棵树")
+            return True
+            
+        except Exception as e:
+            logging.error(f"模型增量更新失败: {str(e)}")
+            return False
+    
     def _handle_outliers(self, features):
         """处理异常值"""
         features_clean = features.copy()
@@ -199,18 +170,18 @@ class GradePredictionModel:
             return None
             
         try:
-            features, _ = self.prepare_features([user])
+            features, _ = self.prepare_features(as_batch(user))
             if len(features) == 0:
                 return None
                 
             features_scaled = self.scaler.transform(features)
-            prediction = self.model.predict(features_scaled)[0]
+            prediction = self._predict(features_scaled)[0]
             
             # 计算置信度
             confidence = self._calculate_confidence(features[0])
             
             # 获取特征重要性
-            feature_importance = self._get_feature_importance()
+            feature_importance = self.get_feature_importance()
             
             return {
                 'predicted_score': max(0, min(100, float(prediction))),  # 限制在合理范围
@@ -223,6 +194,59 @@ class GradePredictionModel:
             logging.error(f"预测失败: {str(e)}")
             return None
     
+    def predict_grades(self, users):
+        """
+        批量预测成绩：一次构建特征矩阵，一次标准化和预测
+        返回 (预测结果列表, 无法预测的用户ID列表)，与 predict_grade 一样只预测有综合成绩的用户
+        users: User 对象序列、StudentColumns 或 StudentFeatures
+        """
+        if not self.is_trained:
+            return None, student_ids_of(users)
+        
+        features, _, user_ids = self.prepare_features(users, return_user_ids=True)
+        predicted_ids = set(user_ids)
+        skipped = [user_id for user_id in student_ids_of(users) if user_id not in predicted_ids]
+        if len(features) == 0:
+            return [], skipped
+        
+        predictions = np.clip(self._predict(self.scaler.transform(features)), 0, 100)
+        # 与 _calculate_confidence 相同的规则：按非零特征占比分级
+        completeness = np.count_nonzero(features > 0, axis=1) / features.shape[1]
+        confidences = np.where(completeness > 0.8, 'high', np.where(completeness > 0.5, 'medium', 'low'))
+        
+        results = [
+            {
+                'student_id': user_id,
+                'predicted_score': float(score),
+                'confidence': str(confidence)
+            }
+            for user_id, score, confidence in zip(user_ids, predictions, confidences)
+        ]
+        return results, skipped
+    
+    def simulate_grades(self, user, scenarios):
+        """
+        成绩模拟：在一名学生的原始数据上施加多组假设的改变（见 grade_simulation），一次计算特征、一次预测
+        user: User 对象或只含该学生的 StudentColumns
+        返回 (不做改变时的预测成绩, 与 scenarios 顺序一致的预测成绩数组)，与 predict_grade 一样限制在0到100之间；
+        该学生没有综合成绩而无法预测时返回None；情景参数不合法时抛出 ValueError
+        """
+        if not self.is_trained:
+            return None
+        
+        columns = perturb_columns(as_columns(as_batch(user)), scenarios, baseline=True)
+        features, _ = self.prepare_features(columns)
+        if len(features) == 0:
+            return None
+        predictions = np.clip(self._predict(self.scaler.transform(features)), 0, 100)
+        return float(predictions[0]), predictions[1:]
+    
+    def _predict(self, features_scaled):
+        """树模型使用展平后的节点数组推理，结果与 self.model.predict 逐位一致"""
+        if self.compiled is not None:
+            return self.compiled.predict(features_scaled)
+        return self.model.predict(features_scaled)
+    
     def _calculate_confidence(self, features):
         """计算预测置信度"""
         # 基于特征完整性计算置信度
@@ -235,8 +259,13 @@ class GradePredictionModel:
         else:
             return 'low'
     
-    def _get_feature_importance(self):
+    def get_feature_importance(self):
         """获取特征重要性"""
+        if self._feature_importance is None:
+            self._feature_importance = self._compute_feature_importance()
+        return dict(self._feature_importance)
+    
+    def _compute_feature_importance(self):
         try:
             if hasattr(self.model, 'feature_importances_'):
                 return dict(zip(self.feature_names, self.model.feature_importances_))
@@ -279,26 +308,46 @@ class GradePredictionModel:
         
         return recommendations[:4]  # 最多返回4条建议
     
-    def save_model(self, filepath):
-        """保存模型"""
+    def save_model(self, filepath, mmap=False):
+        """
+        保存模型
+        mmap: 为True时使用 mmap 布局（见 model_io），树模型另存原始模型并保存节点数组
+        """
         if self.is_trained:
             model_data = {
                 'model': self.model,
                 'scaler': self.scaler,
-                'feature_names': self.feature_names
+                'feature_names': self.feature_names,
+                'trained_ids': self.trained_ids
             }
-            joblib.dump(model_data, filepath)
+            estimator = None
+            if mmap and self.compiled is not None:
+                estimator = model_data.pop('model')
+                model_data['compiled'] = self.compiled.to_arrays()
+                model_data['feature_importance'] = self.get_feature_importance()
+            dump_model_data(model_data, filepath, estimator)
             return True
         return False
     
-    def load_model(self, filepath):
-        """加载模型"""
+    def load_model(self, filepath, mmap_mode=None):
+        """
+        加载模型
+        mmap_mode: 'r' 时以只读方式映射文件中的数组，多个进程共享同一份页缓存
+        """
         try:
             if os.path.exists(filepath):
-                model_data = joblib.load(filepath)
-                self.model = model_data['model']
+                model_data = load_model_data(filepath, mmap_mode)
+                if 'compiled' in model_data:
+                    self._defer_model(filepath)
+                    self.compiled = CompiledTrees.from_arrays(model_data['compiled'])
+                    self._feature_importance = model_data['feature_importance']
+                else:
+                    self.model = model_data['model']
+                    self.compiled = compile_trees(self.model)
+                    self._feature_importance = None
                 self.scaler = model_data['scaler'] 
                 self.feature_names = model_data['feature_names']
+                self.trained_ids = model_data.get('trained_ids', [])
                 self.is_trained = True
                 return True
         except Exception as e:
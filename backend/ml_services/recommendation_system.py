@@ -3,11 +3,59 @@
 基于学生的学习行为和成绩数据，提供个性化的学习建议和资源推荐
 """
 
+import json
 import numpy as np
 import pandas as pd
 from datetime import datetime
 import logging
 
+from .feature_engine import HOMEWORK_FIELDS, as_batch, as_columns, _masked_row_stats, _masked_row_sum
+
+# 批量分析的规则，顺序与逐个学生分析时追加的顺序一致
+STRENGTH_RULES = ('作业完成质量高', '课程讨论参与度高', '视频学习时间充足', '学习表现稳定')
+WEAKNESS_RULES = (
+    '作业成绩需要提升', '作业完成率偏低', '课程讨论参与度低',
+    '视频学习时间不足', '视频重复观看率高，理解存在困难', '学习表现波动较大'
+)
+LEARNING_TYPES = ('unknown', 'high_performer', 'steady_learner', 'struggling_student', 'passive_learner')
+
+
+def _rule_bits(matches):
+    """将 (学生数, 规则数) 的布尔矩阵按位压缩为每个学生一个整数"""
+    return (matches.astype(np.int64) << np.arange(matches.shape[1], dtype=np.int64)).sum(axis=1)
+
+
+def _rule_labels(rules, bits):
+    return [rule for i, rule in enumerate(rules) if bits >> i & 1]
+
+
+def _analysis_rows(batch):
+    """逐个学生取出分析结果，格式与逐个学生分析时相同"""
+    values = {field: batch[field].tolist() for field in (
+        'homework_performance', 'discussion_activity', 'video_engagement', 'learning_consistency',
+        'overall_score', 'homework_completion_rate', 'video_rumination', 'learning_type',
+        'strength_bits', 'weakness_bits'
+    )}
+    for row in range(len(batch['user_ids'])):
+        overall_score = values['overall_score'][row]
+        analysis = {
+            'homework_performance': values['homework_performance'][row],
+            'discussion_activity': int(values['discussion_activity'][row]),
+            'video_engagement': values['video_engagement'][row],
+            'learning_consistency': values['learning_consistency'][row],
+            'overall_score': None if overall_score != overall_score else overall_score,
+            'strengths': _rule_labels(STRENGTH_RULES, values['strength_bits'][row]),
+            'weaknesses': _rule_labels(WEAKNESS_RULES, values['weakness_bits'][row]),
+            'learning_type': LEARNING_TYPES[values['learning_type'][row]]
+        }
+        # 只有存在有效作业成绩 / 视频记录的学生才有这两项（NaN 表示没有）
+        for field in ('homework_completion_rate', 'video_rumination'):
+            value = values[field][row]
+            if value == value:
+                analysis[field] = value
+        yield analysis
+
+
 class PersonalizedRecommendation:
     def __init__(self):
         self.learning_resources = {
@@ -67,124 +115,133 @@ class PersonalizedRecommendation:
     def generate_personalized_recommendations(self, user):
         """为用户生成个性化推荐"""
         try:
-            # 分析用户学习状况
-            analysis = self._analyze_user_performance(user)
-            
-            # 生成推荐内容
-            recommendations = {
-                'learning_resources': self._recommend_learning_resources(analysis),
-                'study_strategies': self._recommend_study_strategies(analysis),
-                'improvement_areas': self._identify_improvement_areas(analysis),
-                'weekly_goals': self._suggest_weekly_goals(analysis),
-                'performance_insights': analysis
-            }
-            
-            return recommendations
-            
+            return self.batch_generate_recommendations(as_batch(user))[0]
         except Exception as e:
             logging.error(f"生成个性化推荐失败: {str(e)}")
             return None
-    
+
+    def batch_generate_recommendations(self, users):
+        """
+        一次为全部学生生成个性化推荐，返回与学号顺序一致的推荐列表
+        各条规则在特征数组上用布尔掩码一次求值；资源、策略、改进领域和周目标只取决于弱项组合与学习类型，
+        每种组合只生成一次，由相同组合的学生共享
+        """
+        batch, profile_keys, profiles = self._batch_profiles(users)
+        recommendations = []
+        for key, analysis in zip(profile_keys, _analysis_rows(batch)):
+            recommendation = dict(profiles[key])
+            recommendation['performance_insights'] = analysis
+            recommendations.append(recommendation)
+        return recommendations
+
+    def batch_recommendation_json(self, users):
+        """
+        与 batch_generate_recommendations 相同，但直接返回 [(学号, 推荐JSON)]，用于批量写入推荐表
+        每种组合共享的部分只序列化一次
+        """
+        batch, profile_keys, profiles = self._batch_profiles(users)
+        # 去掉结尾的 }，拼接各学生的 performance_insights
+        prefixes = {key: json.dumps(profile, ensure_ascii=False)[:-1] for key, profile in profiles.items()}
+        return [
+            (user_id, f'{prefixes[key]}, "performance_insights": {json.dumps(analysis, ensure_ascii=False)}}}')
+            for user_id, key, analysis in zip(batch['user_ids'], profile_keys, _analysis_rows(batch))
+        ]
+
+    def _batch_profiles(self, users):
+        """批量分析，并为出现的每种（弱项组合, 学习类型）生成一次推荐内容"""
+        batch = self.analyze_performance_batch(users)
+        profile_keys = (batch['weakness_bits'] * len(LEARNING_TYPES) + batch['learning_type']).tolist()
+        profiles = {}
+        for key in set(profile_keys):
+            weakness_bits, type_index = divmod(key, len(LEARNING_TYPES))
+            profile = {
+                'weaknesses': _rule_labels(WEAKNESS_RULES, weakness_bits),
+                'learning_type': LEARNING_TYPES[type_index]
+            }
+            profiles[key] = {
+                'learning_resources': self._recommend_learning_resources(profile),
+                'study_strategies': self._recommend_study_strategies(profile),
+                'improvement_areas': self._identify_improvement_areas(profile),
+                'weekly_goals': self._suggest_weekly_goals(profile)
+            }
+        return batch, profile_keys, profiles
+
+    def analyze_performance_batch(self, users):
+        """
+        批量分析学习表现，返回各项指标的数组（每个学生一行）
+        strength_bits / weakness_bits 的第 i 位表示 STRENGTH_RULES / WEAKNESS_RULES 中的第 i 条成立，
+        learning_type 为 LEARNING_TYPES 中的下标
+        空值按0处理；讨论、视频记录的字段全部为空时视为没有该记录
+        """
+        columns = as_columns(users)
+        n = len(columns)
+        strengths = np.zeros((n, len(STRENGTH_RULES)), dtype=bool)
+        weaknesses = np.zeros((n, len(WEAKNESS_RULES)), dtype=bool)
+
+        # 作业表现：大于0的成绩视为有效
+        scores = np.nan_to_num(columns.homework, nan=0.0)
+        valid = scores > 0
+        count, mean, std = _masked_row_stats(scores, valid)
+        has_scores = columns.has_homework & (count > 0)
+        homework_performance = np.where(has_scores, mean, 0.0)
+        completion_rate = count / len(HOMEWORK_FIELDS)
+        strengths[:, 0] = has_scores & (homework_performance >= 85)
+        weaknesses[:, 0] = has_scores & (homework_performance < 60)
+        weaknesses[:, 1] = has_scores & (completion_rate < 0.8)
+
+        # 讨论活跃度
+        has_discussion = ~np.isnan(columns.discussion).all(axis=1)
+        posts, replies, upvotes = np.nan_to_num(columns.discussion, nan=0.0).T
+        discussion_activity = np.where(has_discussion, posts + replies + upvotes, 0.0)
+        strengths[:, 1] = has_discussion & (discussion_activity >= 15)
+        weaknesses[:, 2] = has_discussion & (discussion_activity < 5)
+
+        # 视频学习
+        has_video = ~(np.isnan(columns.watch).all(axis=1) & np.isnan(columns.rumination).all(axis=1))
+        watch = np.nan_to_num(columns.watch, nan=0.0)
+        total_watch = np.where(has_video, _masked_row_sum(watch, np.ones(watch.shape, dtype=bool)), 0.0)
+        ratios = np.nan_to_num(columns.rumination, nan=0.0)
+        positive = ratios > 0
+        rumination_count, rumination_mean, _ = _masked_row_stats(ratios, positive)
+        avg_rumination = np.where(rumination_count > 0, rumination_mean, 0.0)
+        strengths[:, 2] = has_video & (total_watch >= 300)  # 5小时以上
+        weaknesses[:, 3] = has_video & (total_watch < 120)  # 2小时以下
+        weaknesses[:, 4] = has_video & (avg_rumination > 0.3)
+
+        # 综合成绩决定学习类型
+        comprehensive = columns.comprehensive_score
+        has_score = columns.has_synthesis & ~np.isnan(comprehensive)
+        learning_type = np.select(
+            [~has_score, comprehensive >= 90, comprehensive >= 75, comprehensive >= 60],
+            [0, 1, 2, 3],
+            default=4
+        )
+
+        # 学习一致性：有效作业成绩超过2次时计算
+        has_consistency = columns.has_homework & (count > 2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            consistency = np.where(has_consistency & (mean > 0), 1 / (1 + std / mean), 0.0)
+        strengths[:, 3] = has_consistency & (consistency > 0.8)
+        weaknesses[:, 5] = has_consistency & (consistency < 0.5)
+
+        return {
+            'user_ids': columns.user_ids,
+            'homework_performance': homework_performance,
+            'homework_completion_rate': np.where(has_scores, completion_rate, np.nan),
+            'discussion_activity': discussion_activity,
+            'video_engagement': total_watch,
+            'video_rumination': np.where(has_video, avg_rumination, np.nan),
+            'learning_consistency': consistency,
+            'overall_score': np.where(has_score, comprehensive, np.where(columns.has_synthesis, np.nan, 0.0)),
+            'learning_type': learning_type,
+            'strength_bits': _rule_bits(strengths),
+            'weakness_bits': _rule_bits(weaknesses)
+        }
+
     def _analyze_user_performance(self, user):
         """分析用户学习表现"""
-        analysis = {
-            'homework_performance': 0,
-            'discussion_activity': 0,
-            'video_engagement': 0,
-            'learning_consistency': 0,
-            'overall_score': 0,
-            'strengths': [],
-            'weaknesses': [],
-            'learning_type': 'unknown'
-        }
-        
-        try:
-            # 作业表现分析
-            homework = user.homework_statistic[0] if user.homework_statistic else None
-            if homework:
-                scores = [getattr(homework, f'score{i}', 0) for i in range(2, 10)]
-                valid_scores = [s for s in scores if s > 0]
-                
-                if valid_scores:
-                    analysis['homework_performance'] = np.mean(valid_scores)
-                    analysis['homework_completion_rate'] = len(valid_scores) / len(scores)
-                    
-                    if analysis['homework_performance'] >= 85:
-                        analysis['strengths'].append('作业完成质量高')
-                    elif analysis['homework_performance'] < 60:
-                        analysis['weaknesses'].append('作业成绩需要提升')
-                    
-                    if analysis['homework_completion_rate'] < 0.8:
-                        analysis['weaknesses'].append('作业完成率偏低')
-            
-            # 讨论活跃度分析
-            discussion = user.discussion_participation[0] if user.discussion_participation else None
-            if discussion:
-                total_activity = (
-                    discussion.posted_discussions + 
-                    discussion.replied_discussions + 
-                    discussion.upvotes_received
-                )
-                analysis['discussion_activity'] = total_activity
-                
-                if total_activity >= 15:
-                    analysis['strengths'].append('课程讨论参与度高')
-                elif total_activity < 5:
-                    analysis['weaknesses'].append('课程讨论参与度低')
-            
-            # 视频学习分析
-            video = user.video_watching_details[0] if user.video_watching_details else None
-            if video:
-                watch_times = [getattr(video, f'watch_duration{i}', 0) for i in range(1, 8)]
-                rumination_ratios = [getattr(video, f'rumination_ratio{i}', 0) for i in range(1, 8)]
-                
-                total_watch_time = sum(watch_times)
-                avg_rumination = np.mean([r for r in rumination_ratios if r > 0]) if any(r > 0 for r in rumination_ratios) else 0
-                
-                analysis['video_engagement'] = total_watch_time
-                analysis['video_rumination'] = avg_rumination
-                
-                if total_watch_time >= 300:  # 5小时以上
-                    analysis['strengths'].append('视频学习时间充足')
-                elif total_watch_time < 120:  # 2小时以下
-                    analysis['weaknesses'].append('视频学习时间不足')
-                
-                if avg_rumination > 0.3:
-                    analysis['weaknesses'].append('视频重复观看率高，理解存在困难')
-            
-            # 综合成绩分析
-            synthesis = user.synthesis_grades[0] if user.synthesis_grades else None
-            if synthesis:
-                analysis['overall_score'] = synthesis.comprehensive_score
-                
-                if synthesis.comprehensive_score >= 90:
-                    analysis['learning_type'] = 'high_performer'
-                elif synthesis.comprehensive_score >= 75:
-                    analysis['learning_type'] = 'steady_learner'
-                elif synthesis.comprehensive_score >= 60:
-                    analysis['learning_type'] = 'struggling_student'
-                else:
-                    analysis['learning_type'] = 'passive_learner'
-            
-            # 学习一致性分析
-            if homework:
-                scores = [getattr(homework, f'score{i}', 0) for i in range(2, 10)]
-                non_zero_scores = [s for s in scores if s > 0]
-                if len(non_zero_scores) > 2:
-                    score_std = np.std(non_zero_scores)
-                    score_mean = np.mean(non_zero_scores)
-                    analysis['learning_consistency'] = 1 / (1 + score_std / score_mean) if score_mean > 0 else 0
-                    
-                    if analysis['learning_consistency'] > 0.8:
-                        analysis['strengths'].append('学习表现稳定')
-                    elif analysis['learning_consistency'] < 0.5:
-                        analysis['weaknesses'].append('学习表现波动较大')
-        
-        except Exception as e:
-            logging.warning(f"分析用户表现时出错: {str(e)}")
-        
-        return analysis
-    
+        return next(_analysis_rows(self.analyze_performance_batch(as_batch(user))))
+
     def _recommend_learning_resources(self, analysis):
         """推荐学习资源"""
         recommendations = []
@@ -208,7 +265,7 @@ class PersonalizedRecommendation:
         elif analysis['learning_type'] in ['struggling_student', 'passive_learner']:
             recommendations.extend(self.learning_resources['programming'][:2])
         
-        return list(set(recommendations))[:6]  # 去重并限制数量
+        return list(dict.fromkeys(recommendations))[:6]  # 按推荐顺序去重并限制数量
     
     def _recommend_study_strategies(self, analysis):
         """推荐学习策略"""
@@ -312,31 +369,49 @@ class PersonalizedRecommendation:
         
         return goals[:4]  # 限制目标数量
     
-    def get_learning_path_recommendation(self, user, target_score=None):
-        """生成学习路径推荐"""
+    def get_learning_path_recommendation(self, user, target_score=None, analysis=None):
+        """
+        生成学习路径推荐
+        analysis: 已有的 _analyze_user_performance 结果，传入时不再重新分析
+        """
+        paths = self.get_learning_path_recommendations(user, [target_score], analysis)
+        return paths[0] if paths else None
+    
+    def get_learning_path_recommendations(self, user, target_scores, analysis=None):
+        """
+        对同一名学生的多个目标分数生成学习路径，学习表现只分析一次
+        target_scores 中的None表示以当前成绩加10分为目标；结果与 target_scores 顺序一致
+        """
         try:
-            analysis = self._analyze_user_performance(user)
-            current_score = analysis.get('overall_score', 0)
-            target = target_score or (current_score + 10)
-            
-            # 计算需要改进的分数
-            score_gap = target - current_score
-            
-            learning_path = {
-                'current_level': self._get_level_description(current_score),
-                'target_level': self._get_level_description(target),
-                'score_gap': score_gap,
-                'estimated_weeks': max(2, int(score_gap / 2)),  # 估算需要的周数
-                'milestones': self._generate_milestones(current_score, target),
-                'priority_actions': self._get_priority_actions(analysis, score_gap)
-            }
-            
-            return learning_path
+            if analysis is None:
+                analysis = self._analyze_user_performance(user)
+            return [self._learning_path(analysis, target_score) for target_score in target_scores]
             
         except Exception as e:
             logging.error(f"生成学习路径推荐失败: {str(e)}")
             return None
     
+    def _learning_path(self, analysis, target_score):
+        """根据学习表现分析结果生成到达目标分数的学习路径"""
+        # 综合成绩记录中成绩为空时按0分处理；目标分数0是有效目标，只有None表示未指定
+        current_score = analysis.get('overall_score')
+        if current_score is None:
+            current_score = 0
+        target = current_score + 10 if target_score is None else target_score
+        
+        # 计算需要改进的分数
+        score_gap = target - current_score
+        
+        return {
+            'target_score': target,
+            'current_level': self._get_level_description(current_score),
+            'target_level': self._get_level_description(target),
+            'score_gap': score_gap,
+            'estimated_weeks': max(2, int(score_gap / 2)),  # 估算需要的周数
+            'milestones': self._generate_milestones(current_score, target),
+            'priority_actions': self._get_priority_actions(analysis, score_gap)
+        }
+    
     def _get_level_description(self, score):
         """获取分数等级描述"""
         if score >= 90:
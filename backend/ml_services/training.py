@@ -0,0 +1,112 @@
+"""
+模型训练编排
+将预先计算的学生特征（或列式数据）传给进程池，并行训练各个模型
+"""
+
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from .prediction_model import GradePredictionModel
+from .clustering_analysis import LearningBehaviorClustering
+from .anomaly_detection import AnomalyDetector
+
+MODEL_CLASSES = {
+    'prediction_model': GradePredictionModel,
+    'clustering_model': LearningBehaviorClustering,
+    'anomaly_model': AnomalyDetector
+}
+MODEL_LABELS = {
+    'prediction_model': '预测模型',
+    'clustering_model': '聚类模型',
+    'anomaly_model': '异常检测模型'
+}
+def _fit_model(name, snapshot, base_model=None, options=None):
+    """
+    在工作进程中训练单个模型，返回 (是否成功, 模型, 耗时)
+    base_model: 已训练的模型，提供且支持 update_model 时在其基础上增量更新，否则全量训练
+    options: 全量训练时的参数，'init' 传给模型构造函数，'train' 传给 train_model
+    """
+    started_at = time.time()
+    options = options or {}
+    if base_model is not None and hasattr(base_model, 'update_model'):
+        model = base_model
+        success = model.update_model(snapshot)
+    else:
+        model = MODEL_CLASSES[name](**options.get('init', {}))
+        success = model.train_model(snapshot, **options.get('train', {}))
+    return bool(success), model if success else None, round(time.time() - started_at, 3)
+
+
+def train_models(snapshot, model_names=None, max_workers=None, on_start=None, on_done=None, base_models=None,
+                 model_options=None):
+    """
+    并行训练多个模型
+    snapshot: StudentFeatures 或 StudentColumns
+    base_models: 模型名 -> 已训练的模型，用于增量更新；未提供的模型全量训练
+    model_options: 模型名 -> 全量训练参数，格式见 _fit_model
+    on_start(name): 模型开始训练时回调
+    on_done(name, success, model, elapsed, error): 模型训练结束时回调（在当前进程中按完成顺序调用）
+    返回 (results, errors, models)，results 与 errors 的格式与训练接口一致
+    """
+    model_names = list(model_names or MODEL_CLASSES)
+    base_models = base_models or {}
+    model_options = model_options or {}
+    results = {name: False for name in model_names}
+    errors = []
+    models = {}
+
+    def record(name, success, model, elapsed, error):
+        results[name] = success
+        if success:
+            models[name] = model
+        if error:
+            errors.append(error)
+        if on_done:
+            on_done(name, success, model, elapsed, error)
+
+    workers = max_workers or min(len(model_names), os.cpu_count() or 1)
+    pending = list(model_names)
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {}
+                for name in model_names:
+                    if on_start:
+                        on_start(name)
+                    futures[executor.submit(
+                        _fit_model, name, snapshot, base_models.get(name), model_options.get(name)
+                    )] = name
+                for future in as_completed(futures):
+                    name = futures[future]
+                    pending.remove(name)
+                    try:
+                        success, model, elapsed = future.result()
+                        error = None if success else f'{MODEL_LABELS[name]}训练失败'
+                    except BrokenProcessPool:
+                        pending.append(name)
+                        raise
+                    except Exception as e:
+                        success, model, elapsed = False, None, None
+                        error = f'{MODEL_LABELS[name]}训练失败: {str(e)}'
+                        logging.error(error, exc_info=True)
+                    record(name, success, model, elapsed, error)
+        except (BrokenProcessPool, OSError) as e:
+            # 无法创建或维持进程池时，剩余模型在当前进程中顺序训练
+            logging.warning(f"进程池不可用，改为顺序训练: {str(e)}")
+
+    for name in pending:
+        if on_start:
+            on_start(name)
+        try:
+            success, model, elapsed = _fit_model(name, snapshot, base_models.get(name), model_options.get(name))
+            error = None if success else f'{MODEL_LABELS[name]}训练失败'
+        except Exception as e:
+            success, model, elapsed = False, None, None
+            error = f'{MODEL_LABELS[name]}训练失败: {str(e)}'
+            logging.error(error, exc_info=True)
+        record(name, success, model, elapsed, error)
+
+    return results, errors, models
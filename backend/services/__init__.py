@@ -0,0 +1,29 @@
+"""
+后端业务服务模块
+提供运行时数据目录、数据版本等与Web请求解耦的公共服务
+"""
+
+from .runtime import (
+    runtime_path, get_data_version, bump_data_version, get_registration_version, bump_registration_version,
+    get_rewrite_version, bump_rewrite_version
+)
+from .rank_index import RankIndex
+from .lru_cache import VersionedLRUCache
+from .search_index import StudentSearchIndex
+from .job_store import JobStore
+from .result_cache import ResultCache
+
+__all__ = [
+    'runtime_path',
+    'get_data_version',
+    'bump_data_version',
+    'get_registration_version',
+    'bump_registration_version',
+    'get_rewrite_version',
+    'bump_rewrite_version',
+    'RankIndex',
+    'VersionedLRUCache',
+    'StudentSearchIndex',
+    'JobStore',
+    'ResultCache'
+]
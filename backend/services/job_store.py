@@ -0,0 +1,156 @@
+"""
+后台任务表
+使用本地 SQLite 文件记录任务状态，Web 进程与训练子进程通过它共享进度，无需额外的消息队列
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+from contextlib import contextmanager
+
+# 任务和单个模型的状态
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_SUCCEEDED = 'succeeded'
+STATUS_PARTIAL = 'partial'
+STATUS_FAILED = 'failed'
+ACTIVE_STATUSES = (STATUS_PENDING, STATUS_RUNNING)
+# 超过该时间仍未被工作进程领取的任务视为已失效（秒）
+PENDING_TIMEOUT = 120
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # 进程存在但无权发送信号（例如Windows或其他用户的进程）
+        return True
+    return True
+
+
+class JobStore:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                'id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, '
+                'created_at REAL NOT NULL, started_at REAL, finished_at REAL, '
+                'pid INTEGER, data_version TEXT, total_samples INTEGER, message TEXT, '
+                'models TEXT NOT NULL, errors TEXT NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_jobs_kind_created ON jobs (kind, created_at)')
+
+    @contextmanager
+    def _connect(self):
+        # isolation_level=None 时由 BEGIN IMMEDIATE 显式加写锁，保证读-改-写的原子性
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    @staticmethod
+    def _to_dict(row):
+        job = dict(row)
+        job['models'] = json.loads(job['models'])
+        job['errors'] = json.loads(job['errors'])
+        return job
+
+    def create(self, kind, model_names):
+        """创建任务；同类任务仍在进行时返回已有任务，第二个返回值表示是否为新建"""
+        with self._transaction() as conn:
+            row = conn.execute(
+                'SELECT * FROM jobs WHERE kind = ? AND status IN (?, ?) ORDER BY created_at DESC LIMIT 1',
+                (kind, *ACTIVE_STATUSES)
+            ).fetchone()
+            if row and self._is_alive(row):
+                return self._to_dict(row), False
+
+            job_id = uuid.uuid4().hex
+            models = {name: {'status': STATUS_PENDING} for name in model_names}
+            conn.execute(
+                'INSERT INTO jobs (id, kind, status, created_at, models, errors) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, kind, STATUS_PENDING, time.time(), json.dumps(models), '[]')
+            )
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            return self._to_dict(row), True
+
+    @staticmethod
+    def _is_alive(row):
+        """进行中的任务是否仍有进程在处理"""
+        if row['status'] == STATUS_PENDING:
+            return time.time() - row['created_at'] < PENDING_TIMEOUT
+        return row['status'] == STATUS_RUNNING and _pid_alive(row['pid'])
+
+    def get(self, job_id):
+        """读取任务；进行中的任务已无进程处理时标记为失败"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        if row['status'] in ACTIVE_STATUSES and not self._is_alive(row):
+            self.finish(job_id, STATUS_FAILED, '任务进程异常退出', only_if_active=True)
+            return self.get(job_id)
+        return self._to_dict(row)
+
+    def start(self, job_id, pid, data_version=None):
+        """工作进程领取任务"""
+        self.update(job_id, status=STATUS_RUNNING, started_at=time.time(), pid=pid, data_version=data_version)
+
+    def update(self, job_id, **fields):
+        """更新任务的标量字段"""
+        allowed = {'status', 'started_at', 'finished_at', 'pid', 'data_version', 'total_samples', 'message'}
+        unknown = set(fields) - allowed
+        if unknown:
+            raise ValueError(f'未知的任务字段: {", ".join(sorted(unknown))}')
+        assignments = ', '.join(f'{field} = ?' for field in fields)
+        with self._transaction() as conn:
+            conn.execute(f'UPDATE jobs SET {assignments} WHERE id = ?', (*fields.values(), job_id))
+
+    def update_model(self, job_id, name, **state):
+        """更新单个模型的状态字段"""
+        with self._transaction() as conn:
+            row = conn.execute('SELECT models FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is None:
+                return
+            models = json.loads(row['models'])
+            models.setdefault(name, {}).update(state)
+            conn.execute('UPDATE jobs SET models = ? WHERE id = ?', (json.dumps(models, ensure_ascii=False), job_id))
+
+    def add_error(self, job_id, error):
+        with self._transaction() as conn:
+            row = conn.execute('SELECT errors FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is None:
+                return
+            errors = json.loads(row['errors'])
+            errors.append(error)
+            conn.execute('UPDATE jobs SET errors = ? WHERE id = ?', (json.dumps(errors, ensure_ascii=False), job_id))
+
+    def finish(self, job_id, status, message=None, only_if_active=False):
+        """结束任务；only_if_active 为True时不覆盖已结束任务的状态"""
+        with self._transaction() as conn:
+            sql = 'UPDATE jobs SET status = ?, finished_at = ?, message = ? WHERE id = ?'
+            params = [status, time.time(), message, job_id]
+            if only_if_active:
+                sql += ' AND status IN (?, ?)'
+                params.extend(ACTIVE_STATUSES)
+            conn.execute(sql, params)
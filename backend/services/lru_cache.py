@@ -0,0 +1,48 @@
+"""
+按数据版本失效的有界LRU缓存
+数据版本变化时整体清空，容量满时淘汰最久未使用的条目
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class VersionedLRUCache:
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._data_version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, data_version):
+        """读取缓存，数据版本不一致或未命中时返回None"""
+        with self._lock:
+            if data_version != self._data_version:
+                self._data.clear()
+                self._data_version = data_version
+            if key not in self._data:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def set(self, key, value, data_version):
+        """写入缓存，基于旧数据版本计算的结果直接丢弃"""
+        with self._lock:
+            if data_version != self._data_version:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._data_version = None
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,59 @@
+"""
+综合成绩排名索引
+在内存中维护升序排列的成绩数组，通过二分查找在 O(log n) 内计算排名、百分位和总人数
+"""
+
+import threading
+import numpy as np
+
+
+class RankIndex:
+    def __init__(self):
+        # (升序成绩数组, 数据版本) 作为整体替换，保证读取时的一致性
+        self._state = (np.empty(0), None)
+        self._rebuild_lock = threading.Lock()
+        self.rebuilding = False
+
+    @property
+    def data_version(self):
+        return self._state[1]
+
+    @property
+    def total(self):
+        return len(self._state[0])
+
+    def is_current(self, data_version):
+        """索引是否基于指定数据版本构建"""
+        return self._state[1] == data_version
+
+    def rebuild(self, scores, data_version):
+        """使用全部综合成绩重建索引"""
+        sorted_scores = np.sort(np.asarray(scores, dtype=float))
+        self._state = (sorted_scores, data_version)
+
+    def try_begin_rebuild(self):
+        """标记开始重建，已有重建任务时返回False"""
+        with self._rebuild_lock:
+            if self.rebuilding:
+                return False
+            self.rebuilding = True
+            return True
+
+    def end_rebuild(self):
+        with self._rebuild_lock:
+            self.rebuilding = False
+
+    def lookup(self, score):
+        """
+        查询成绩的排名
+        并列成绩取相同名次（排名 = 严格高于该成绩的人数 + 1）
+        百分位为不高于该成绩的人数占比
+        """
+        scores, _ = self._state
+        total = len(scores)
+        not_greater = int(np.searchsorted(scores, score, side='right'))
+        return {
+            'rank': total - not_greater + 1,
+            'percentile': round(not_greater / total * 100, 2) if total else 0,
+            'total': total
+        }
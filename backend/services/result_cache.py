@@ -0,0 +1,130 @@
+"""
+分析结果缓存
+聚类分析、异常检测等整体分析接口的结果只在数据或模型变化时才改变，
+以 (接口, 数据版本, 模型版本) 为主键把序列化后的响应体保存在本地 SQLite 文件中：
+所有 gunicorn worker 共享同一份缓存，进程重启后仍然有效，命中时按主键直接读取，无需重新计算
+命中 / 未命中计数先在进程内累加，定期合并写入文件，读取缓存本身不产生写事务
+"""
+
+import time
+import atexit
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# 每个接口保留的缓存条数，数据或模型更新后旧条目不会再被读取，只保留最近几条
+KEEP_ENTRIES = 4
+# 进程内的命中计数写入文件的间隔（秒）
+STATS_FLUSH_INTERVAL = 10.0
+
+
+class ResultCache:
+    def __init__(self, db_path, keep_entries=KEEP_ENTRIES, stats_flush_interval=STATS_FLUSH_INTERVAL):
+        self.db_path = db_path
+        self.keep_entries = keep_entries
+        self.stats_flush_interval = stats_flush_interval
+        self._pending_stats = {}  # 接口 -> [命中次数, 未命中次数]，尚未写入文件
+        self._stats_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        # 进程退出前写入尚未合并的计数
+        atexit.register(self.flush_stats)
+        with self._connect() as conn:
+            # WAL 模式下读取不会被其他 worker 的写入阻塞
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'endpoint TEXT NOT NULL, data_version TEXT NOT NULL, model_version TEXT NOT NULL, '
+                'body TEXT NOT NULL, created_at REAL NOT NULL, '
+                'PRIMARY KEY (endpoint, data_version, model_version)) WITHOUT ROWID'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS stats ('
+                'endpoint TEXT PRIMARY KEY, hits INTEGER NOT NULL DEFAULT 0, misses INTEGER NOT NULL DEFAULT 0)'
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _count(self, endpoint, hit):
+        """在进程内计数，距上次写入超过 stats_flush_interval 时合并写入文件"""
+        with self._stats_lock:
+            counts = self._pending_stats.setdefault(endpoint, [0, 0])
+            counts[0 if hit else 1] += 1
+            due = time.monotonic() - self._last_flush >= self.stats_flush_interval
+        if due:
+            self.flush_stats()
+
+    def flush_stats(self):
+        """将进程内累加的命中 / 未命中次数合并写入文件"""
+        with self._stats_lock:
+            pending, self._pending_stats = self._pending_stats, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT INTO stats (endpoint, hits, misses) VALUES (?, ?, ?) '
+                'ON CONFLICT(endpoint) DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses',
+                [(endpoint, hits, misses) for endpoint, (hits, misses) in pending.items()]
+            )
+
+    def get(self, endpoint, data_version, model_version):
+        """读取缓存的响应体并计数；model_version 为None（尚无可用模型）或未命中时返回None"""
+        row = None
+        if model_version is not None:
+            with self._connect() as conn:
+                row = conn.execute(
+                    'SELECT body FROM results WHERE endpoint = ? AND data_version = ? AND model_version = ?',
+                    (endpoint, data_version, model_version)
+                ).fetchone()
+        self._count(endpoint, row is not None)
+        return row[0] if row else None
+
+    def set(self, endpoint, data_version, model_version, body):
+        """写入响应体，并清理该接口超出保留条数的旧条目"""
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                'INSERT OR REPLACE INTO results (endpoint, data_version, model_version, body, created_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (endpoint, data_version, model_version, body, time.time())
+            )
+            conn.execute(
+                'DELETE FROM results WHERE endpoint = ? AND (data_version, model_version) NOT IN ('
+                'SELECT data_version, model_version FROM results WHERE endpoint = ? ORDER BY created_at DESC LIMIT ?)',
+                (endpoint, endpoint, self.keep_entries)
+            )
+            conn.execute('COMMIT')
+
+    def stats(self):
+        """
+        各接口的命中、未命中次数、命中率及当前缓存条数
+        先写入本进程的计数；其他 worker 尚未写入的计数（最多 stats_flush_interval 秒）不包含在内
+        """
+        self.flush_stats()
+        with self._connect() as conn:
+            counters = conn.execute('SELECT endpoint, hits, misses FROM stats').fetchall()
+            entries = dict(conn.execute('SELECT endpoint, COUNT(*) FROM results GROUP BY endpoint').fetchall())
+        return {
+            endpoint: {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+                'entries': entries.get(endpoint, 0)
+            }
+            for endpoint, hits, misses in counters
+        }
+
+    def clear(self):
+        """清空缓存和计数"""
+        with self._stats_lock:
+            self._pending_stats = {}
+        with self._connect() as conn:
+            conn.execute('DELETE FROM results')
+            conn.execute('DELETE FROM stats')
@@ -0,0 +1,91 @@
+"""
+运行时数据目录与数据版本
+数据版本是一个保存在文件中的标记，每次导入数据后更新，
+多个gunicorn worker及命令行导入脚本通过它感知数据变化
+注册版本是另一个同样方式保存的标记，只在用户注册后更新：新注册的学生还没有任何学习数据，
+只影响学生名单（管理员看板、搜索索引），不应使模型、特征等基于学习数据的派生结果失效
+改写版本记录已有学生的学习数据最近一次被修改的时间，在数据版本更新之前写入：
+基于更早数据版本训练的模型不能只用新增学生增量更新，必须全量训练
+"""
+
+import os
+import time
+import logging
+
+RUNTIME_DIR = os.getenv(
+    'RUNTIME_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'runtime')
+)
+DATA_VERSION_FILE = 'data_version'
+REGISTRATION_VERSION_FILE = 'registration_version'
+REWRITE_VERSION_FILE = 'rewrite_version'
+
+_version_cache = {}  # 标记文件名 -> (文件状态, 版本)
+
+
+def runtime_path(*parts):
+    """返回运行时目录下的路径，并确保其父目录存在"""
+    path = os.path.join(RUNTIME_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def _read_version(name):
+    """读取版本标记文件，文件未变化时直接返回缓存值"""
+    path = runtime_path(name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return '0'
+
+    stat_key = (stat.st_mtime_ns, stat.st_size)
+    cached_stat, version = _version_cache.get(name, (None, '0'))
+    if cached_stat != stat_key:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                version = f.read().strip() or '0'
+            _version_cache[name] = (stat_key, version)
+        except OSError as e:
+            logging.warning(f"版本标记 {name} 读取失败: {str(e)}")
+    return version
+
+
+def _bump_version(name):
+    """更新版本标记（使用纳秒时间戳，避免多进程读改写冲突）"""
+    path = runtime_path(name)
+    version = str(time.time_ns())
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(tmp_path, path)
+    return version
+
+
+def get_data_version():
+    """读取当前数据版本"""
+    return _read_version(DATA_VERSION_FILE)
+
+
+def bump_data_version():
+    """更新数据版本"""
+    return _bump_version(DATA_VERSION_FILE)
+
+
+def get_registration_version():
+    """读取当前注册版本"""
+    return _read_version(REGISTRATION_VERSION_FILE)
+
+
+def bump_registration_version():
+    """用户注册后更新注册版本"""
+    return _bump_version(REGISTRATION_VERSION_FILE)
+
+
+def get_rewrite_version():
+    """读取已有学生学习数据最近一次被修改时的改写版本"""
+    return _read_version(REWRITE_VERSION_FILE)
+
+
+def bump_rewrite_version():
+    """已有学生的学习数据被修改时，在更新数据版本之前调用"""
+    return _bump_version(REWRITE_VERSION_FILE)
@@ -0,0 +1,146 @@
+"""
+学生搜索索引
+在内存中为学号和姓名建立 n-gram 倒排索引，子串查询只需对候选集做校验，无需全表扫描
+中文姓名通常只有2-3个字，同时索引单字和二元组以支持单字查询
+"""
+
+import heapq
+import threading
+
+
+def match_score(value, term):
+    """
+    计算匹配得分，越小越靠前：完全匹配为0，前缀匹配为1，其余子串匹配为 2 + 出现位置
+    不匹配时返回None
+    """
+    position = value.find(term)
+    if position < 0:
+        return None
+    if position == 0:
+        return 0 if len(value) == len(term) else 1
+    return 2 + position
+
+
+def _ngrams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _rank(scores, ids, limit):
+    """按 (得分, 学号) 排序；指定 limit 时只取前 limit 个，避免对大结果集全排序"""
+    key = lambda position: (scores[position], ids[position])
+    if limit is not None:
+        return heapq.nsmallest(limit, scores, key=key)
+    return sorted(scores, key=key)
+
+
+class _FieldIndex:
+    """单个字段的 n-gram 倒排索引"""
+
+    def __init__(self, values):
+        self.values = values
+        self.unigrams = {}
+        self.bigrams = {}
+        for position, value in enumerate(values):
+            for gram in _ngrams(value, 1):
+                self.unigrams.setdefault(gram, []).append(position)
+            for gram in _ngrams(value, 2):
+                self.bigrams.setdefault(gram, []).append(position)
+
+    def candidates(self, term):
+        """返回可能包含查询词的记录下标（需再校验）"""
+        if len(term) == 1:
+            return self.unigrams.get(term, [])
+        postings = []
+        for gram in _ngrams(term, 2):
+            posting = self.bigrams.get(gram)
+            if not posting:
+                return []
+            postings.append(posting)
+        # 取最短的倒排列表作为候选集，逐条校验比对大列表求交集更快
+        return min(postings, key=len)
+
+    def match(self, term):
+        """返回 {记录下标: 匹配得分}"""
+        scores = {}
+        for position in self.candidates(term):
+            score = match_score(self.values[position], term)
+            if score is not None:
+                scores[position] = score
+        return scores
+
+
+class StudentSearchIndex:
+    def __init__(self):
+        # (学号列表, 姓名列表, 学号索引, 姓名索引, 数据版本) 作为整体替换，保证读取时的一致性
+        self._state = ([], [], _FieldIndex([]), _FieldIndex([]), None)
+        self._rebuild_lock = threading.Lock()
+
+    @property
+    def data_version(self):
+        return self._state[4]
+
+    @property
+    def total(self):
+        return len(self._state[0])
+
+    def is_current(self, data_version):
+        """索引是否基于指定数据版本构建"""
+        return self._state[4] == data_version
+
+    def rebuild(self, students, data_version):
+        """使用 (学号, 姓名) 列表重建索引，学号和姓名均按 casefold 后的值索引，查询不区分大小写"""
+        ids = [str(student_id) for student_id, _ in students]
+        names = [name or '' for _, name in students]
+        self._state = (
+            ids,
+            names,
+            _FieldIndex([student_id.casefold() for student_id in ids]),
+            _FieldIndex([name.casefold() for name in names]),
+            data_version
+        )
+
+    def ensure_current(self, data_version, load_students):
+        """索引过期时调用 load_students() 重建，多个线程同时发现过期时只重建一次"""
+        if self.is_current(data_version):
+            return
+        with self._rebuild_lock:
+            if not self.is_current(data_version):
+                self.rebuild(load_students(), data_version)
+
+    def search(self, id_term=None, name_term=None, limit=None):
+        """
+        按学号和姓名子串搜索，两个条件同时给出时取交集
+        返回按匹配得分排序的学号列表，得分相同时学号较小的靠前
+        """
+        ids, _, id_index, name_index, _ = self._state
+        scores = None
+        for field_index, term in ((id_index, id_term), (name_index, name_term)):
+            if not term:
+                continue
+            field_scores = field_index.match(term.casefold())
+            if scores is None:
+                scores = field_scores
+            else:
+                scores = {
+                    position: score + field_scores[position]
+                    for position, score in scores.items()
+                    if position in field_scores
+                }
+        if scores is None:
+            return []
+
+        ranked = _rank(scores, ids, limit)
+        return [ids[position] for position in ranked]
+
+    def search_any(self, term, limit=None):
+        """在学号或姓名中搜索同一个查询词，取两者中较好的得分排序，返回 (学号, 姓名) 列表"""
+        ids, names, id_index, name_index, _ = self._state
+        if not term:
+            return []
+        term = term.casefold()
+        scores = id_index.match(term)
+        for position, score in name_index.match(term).items():
+            if position not in scores or score < scores[position]:
+                scores[position] = score
+        ranked = _rank(scores, ids, limit)
+        return [(ids[position], names[position]) for position in ranked]
@@ -0,0 +1,108 @@
+"""
+后端测试公共配置
+测试使用临时目录中的 SQLite 数据库和运行时目录，不需要 MySQL；环境变量须在导入 app 之前设置
+"""
+
+import os
+import sys
+import random
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_TEST_DIR = tempfile.mkdtemp(prefix='backend-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_TEST_DIR, 'test.db')}"
+os.environ['RUNTIME_DIR'] = os.path.join(_TEST_DIR, 'runtime')
+os.environ.setdefault('JWT_SECRET_KEY', 'test-secret-key-for-pytest-0123456789abcdef')
+
+STUDENT_COUNT = 60
+
+
+def seed_students(app_module, count=STUDENT_COUNT, seed=0):
+    """重建数据库并写入 count 名学生（含缺失记录和空值）及一名管理员"""
+    rng = random.Random(seed)
+    db = app_module.db
+    db.drop_all()
+    db.create_all()
+    rows = [app_module.User(id='admin1', name='管理员', password='x', phone_number='1', role='admin')]
+    for i in range(count):
+        student_id = f'2023{i:04d}'
+        name = rng.choice('张王李赵刘陈') + rng.choice(['伟', '芳', '娜', '敏', '静'])
+        rows.append(app_module.User(id=student_id, name=name, password='x', phone_number='139'))
+        rows.append(app_module.SynthesisGrade(
+            id=student_id, name=name, course_points=rng.choice([None, 0, rng.uniform(40, 100)]),
+            comprehensive_score=round(rng.uniform(30, 100))
+        ))
+        rows.append(app_module.HomeworkStatistic(
+            id=student_id, name=name,
+            **{f'score{k}': rng.choice([0, rng.uniform(20, 100), rng.uniform(50, 100)]) for k in range(2, 10)}
+        ))
+        rows.append(app_module.ExamStatistic(id=student_id, name=name, score=rng.uniform(0, 100)))
+        rows.append(app_module.DiscussionParticipation(
+            id=student_id, name=name, total_discussions=rng.randint(0, 20),
+            posted_discussions=rng.choice([None, rng.randint(0, 10)]), replied_discussions=rng.randint(0, 10),
+            replied_topics=rng.randint(0, 5), upvotes_received=rng.choice([None, rng.randint(0, 15)])
+        ))
+        video = {}
+        for k in range(1, 8):
+            video[f'watch_duration{k}'] = rng.choice([0, rng.uniform(0, 120)])
+            video[f'rumination_ratio{k}'] = rng.choice([0, rng.uniform(0, 1.5)])
+        rows.append(app_module.VideoWatchingDetail(id=student_id, name=name, **video))
+        rows.append(app_module.OfflineGrade(id=student_id, name=name, comprehensive_score=rng.uniform(40, 100)))
+    db.session.add_all(rows)
+    db.session.commit()
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    """导入 app 模块并写入测试数据，整个测试会话共用"""
+    import app as app_module
+    with app_module.app.app_context():
+        seed_students(app_module)
+        app_module.mark_data_changed('users')
+    return app_module
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app_module):
+    """返回指定用户的 JWT 请求头，Origin 与前端开发服务器一致"""
+    from flask_jwt_extended import create_access_token
+
+    def headers(user_id='admin1'):
+        with app_module.app.app_context():
+            return {
+                'Authorization': f'Bearer {create_access_token(identity=user_id)}',
+                'Origin': 'http://localhost:5173'
+            }
+    return headers
+
+
+@pytest.fixture
+def count_queries(app_module):
+    """统计代码块执行的 SQL 语句数"""
+    from sqlalchemy import event
+
+    @contextmanager
+    def counter():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app_module.app.app_context():
+            engine = app_module.db.engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+    return counter
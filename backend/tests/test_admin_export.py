@@ -0,0 +1,56 @@
+"""
+学生数据导出测试：流式导出的 CSV 和 NDJSON 与 /api/admin-stats 的学生列表内容、顺序和搜索结果一致；
+查询出错时返回500
+"""
+
+import csv
+import io
+import json
+
+import pytest
+
+PARAMS = [
+    {'sort_by': 'comprehensive_score', 'sort_order': 'desc'},
+    {'sort_by': 'exam_score', 'sort_order': 'asc'},
+    {'sort_by': 'activity', 'sort_order': 'desc'},
+    {'sort_by': 'comprehensive_score', 'sort_order': 'asc', 'search_name': '张'},
+    {'sort_by': 'exam_score', 'sort_order': 'desc', 'search_id': '2023001'}
+]
+
+
+def _listed_students(client, headers, params):
+    response = client.get('/api/admin-stats', headers=headers, query_string=params)
+    assert response.status_code == 200
+    return response.get_json()['data']['students']
+
+
+@pytest.mark.parametrize('params', PARAMS)
+def test_export_matches_student_list(app_module, client, auth_headers, params):
+    headers = auth_headers('admin1')
+    expected = _listed_students(client, headers, params)
+    assert expected
+
+    response = client.get('/api/admin-stats/export', headers=headers, query_string={**params, 'format': 'ndjson'})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert [json.loads(line) for line in response.get_data(as_text=True).splitlines()] == expected
+
+    response = client.get('/api/admin-stats/export', headers=headers, query_string={**params, 'format': 'csv'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    text = response.get_data(as_text=True)
+    assert text.startswith('\ufeff')
+    rows = list(csv.reader(io.StringIO(text[1:])))
+    assert rows[0] == [title for _, title in app_module.ADMIN_EXPORT_COLUMNS]
+    assert rows[1:] == [[str(student[key]) for key, _ in app_module.ADMIN_EXPORT_COLUMNS] for student in expected]
+
+
+def test_export_query_error(app_module, client, auth_headers, monkeypatch):
+    def fail(*args):
+        raise RuntimeError('数据库不可用')
+
+    monkeypatch.setattr(app_module, '_build_admin_student_query', fail)
+    response = client.get('/api/admin-stats/export', headers=auth_headers('admin1'))
+    assert response.status_code == 500
+    assert response.get_json()['status'] == 1
+    assert 'Access-Control-Allow-Origin' in response.headers
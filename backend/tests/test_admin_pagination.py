@@ -0,0 +1,121 @@
+"""
+学生列表游标分页测试：三种排序方式的升序和降序下，逐页拼接的结果与不分页的列表完全相同（无重复、无遗漏），
+包括没有成绩记录（排序字段为空）和排序值相同的学生；游标格式错误时返回400，游标所在的学生被删除后仍能继续翻页
+"""
+
+import base64
+import json
+
+import pytest
+
+SORTS = [(sort_by, sort_order) for sort_by in ('comprehensive_score', 'exam_score', 'activity') for sort_order in ('desc', 'asc')]
+# 没有任何成绩和讨论记录的学生
+NULL_STUDENTS = ['20990001', '20990002', '20990003']
+# 各项成绩都相同的学生，综合成绩最高
+TIED_STUDENTS = ['20990011', '20990012', '20990013', '20990014']
+
+
+def _delete_students(app_module, student_ids):
+    for model in (app_module.SynthesisGrade, app_module.ExamStatistic, app_module.DiscussionParticipation, app_module.User):
+        model.query.filter(model.id.in_(student_ids)).delete(synchronize_session=False)
+    app_module.db.session.commit()
+
+
+@pytest.fixture(scope='module')
+def extra_students(app_module):
+    with app_module.app.app_context():
+        rows = [app_module.User(id=student_id, name='空值', password='x', phone_number='1') for student_id in NULL_STUDENTS]
+        for student_id in TIED_STUDENTS:
+            rows += [
+                app_module.User(id=student_id, name='并列', password='x', phone_number='1'),
+                app_module.SynthesisGrade(id=student_id, name='并列', comprehensive_score=101),
+                app_module.ExamStatistic(id=student_id, name='并列', score=55.5),
+                app_module.DiscussionParticipation(id=student_id, name='并列', total_discussions=7)
+            ]
+        app_module.db.session.add_all(rows)
+        app_module.db.session.commit()
+        app_module.mark_data_changed('users')
+    yield
+    with app_module.app.app_context():
+        _delete_students(app_module, NULL_STUDENTS + TIED_STUDENTS)
+        app_module.mark_data_changed()
+
+
+def _full_list(client, headers, params):
+    response = client.get('/api/admin-stats', headers=headers, query_string=params)
+    assert response.status_code == 200
+    return response.get_json()['data']['students']
+
+
+def _pages(client, headers, params, limit, after=None):
+    """从 after 开始逐页读取直到最后一页，返回各页的学生列表"""
+    pages = []
+    while True:
+        query = {**params, 'limit': limit}
+        if after:
+            query['after'] = after
+        response = client.get('/api/admin-stats', headers=headers, query_string=query)
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        assert len(data['students']) <= limit
+        pages.append(data['students'])
+        after = data['nextCursor']
+        if after is None:
+            return pages
+        assert len(data['students']) == limit
+
+
+@pytest.mark.parametrize('sort_by, sort_order', SORTS)
+@pytest.mark.parametrize('limit', [1, 7, 500])
+def test_pages_concatenate_to_full_list(client, auth_headers, extra_students, sort_by, sort_order, limit):
+    headers = auth_headers('admin1')
+    params = {'sort_by': sort_by, 'sort_order': sort_order}
+    expected = _full_list(client, headers, params)
+    students = [student for page in _pages(client, headers, params, limit) for student in page]
+    assert students == expected
+
+    ids = [student['id'] for student in students]
+    assert len(set(ids)) == len(ids)
+    assert set(NULL_STUDENTS + TIED_STUDENTS) <= set(ids)
+    # 空值排在升序的最前面、降序的最后面
+    null_positions = sorted(ids.index(student_id) for student_id in NULL_STUDENTS)
+    if sort_order == 'asc':
+        assert null_positions == [0, 1, 2]
+    else:
+        assert null_positions == [len(ids) - 3, len(ids) - 2, len(ids) - 1]
+
+
+def test_pages_with_search(client, auth_headers, extra_students):
+    headers = auth_headers('admin1')
+    params = {'sort_by': 'exam_score', 'sort_order': 'desc', 'search_id': '2099'}
+    expected = _full_list(client, headers, params)
+    assert [student['id'] for student in expected] == TIED_STUDENTS[::-1] + NULL_STUDENTS[::-1]
+    assert [student for page in _pages(client, headers, params, 2) for student in page] == expected
+
+
+@pytest.mark.parametrize('cursor', [
+    'not a cursor',
+    base64.urlsafe_b64encode(b'{"a": 1}').decode(),
+    base64.urlsafe_b64encode(json.dumps(['90', '20230001']).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps([90, 20230001]).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps([90]).encode()).decode()
+])
+def test_malformed_cursor(client, auth_headers, cursor):
+    response = client.get('/api/admin-stats', headers=auth_headers('admin1'), query_string={'limit': 5, 'after': cursor})
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 1
+
+
+def test_cursor_student_deleted(app_module, client, auth_headers, extra_students):
+    headers = auth_headers('admin1')
+    params = {'sort_by': 'comprehensive_score', 'sort_order': 'desc'}
+    expected = _full_list(client, headers, params)
+    # 并列最高分的学生按学号降序排在最前，第一页的最后一名即游标所在的学生
+    first = client.get('/api/admin-stats', headers=headers, query_string={**params, 'limit': 2}).get_json()['data']
+    assert [student['id'] for student in first['students']] == ['20990014', '20990013']
+
+    with app_module.app.app_context():
+        _delete_students(app_module, ['20990013'])
+        app_module.mark_data_changed()
+    rest = [student for page in _pages(client, headers, params, 5, after=first['nextCursor']) for student in page]
+    assert rest == expected[2:]
@@ -0,0 +1,76 @@
+"""
+聚类数自动选择测试：明显分离的数据选出正确的聚类数（含超过轮廓系数采样规模的数据）；
+同一数据版本下再次训练沿用清单中记录的聚类数，不再重新选择
+"""
+
+import numpy as np
+import pytest
+
+from ml_services import LearningBehaviorClustering, train_models
+from ml_services.clustering_analysis import SILHOUETTE_SAMPLE_SIZE, silhouette_sample
+
+MODEL_NAME = 'clustering_model'
+
+
+def _blobs(n_clusters, n_samples, seed=0):
+    """在6维空间中生成 n_clusters 个相距很远的紧密簇"""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(-50, 50, size=(n_clusters, 6))
+    labels = np.arange(n_samples) % n_clusters
+    return centers[labels] + rng.normal(scale=0.5, size=(n_samples, 6))
+
+
+@pytest.mark.parametrize('n_clusters', [2, 3, 5])
+@pytest.mark.parametrize('n_samples', [300, SILHOUETTE_SAMPLE_SIZE + 500])
+def test_selects_separated_clusters(n_clusters, n_samples):
+    features = _blobs(n_clusters, n_samples)
+    sample = silhouette_sample(n_samples)
+    assert len(sample) == min(n_samples, SILHOUETTE_SAMPLE_SIZE)
+
+    model = LearningBehaviorClustering(k_selection='auto')
+    k, kmeans, score = model._select_n_clusters(features, sample)
+    assert k == n_clusters
+    assert kmeans.n_clusters == n_clusters
+    assert score == max(model.silhouette_scores.values())
+    assert sorted(model.silhouette_scores) == [2, 3, 4, 5, 6]
+
+
+def test_chosen_k_is_reused_within_data_version(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'CLUSTER_K_SELECTION', 'auto')
+    searches = []
+    original = LearningBehaviorClustering._select_n_clusters
+
+    def select_n_clusters(self, features_scaled, sample):
+        searches.append(len(features_scaled))
+        return original(self, features_scaled, sample)
+
+    monkeypatch.setattr(LearningBehaviorClustering, '_select_n_clusters', select_n_clusters)
+
+    with app_module.app.app_context():
+        # 已有学生的数据被修改，模型需要全量训练
+        app_module.mark_data_changed()
+        data_version = app_module.get_data_version()
+        try:
+            model = app_module._get_trained_model(MODEL_NAME)
+            assert len(searches) == 1
+            assert model.k_source == 'auto'
+            entry = app_module._get_model_registry().get_entry(MODEL_NAME)
+            assert entry['n_clusters'] == model.n_clusters
+            assert entry['k_data_version'] == data_version
+
+            # 同一数据版本下再次全量训练（如训练任务）直接使用记录的聚类数
+            options = app_module._model_train_options(MODEL_NAME, data_version)
+            assert options['train'] == {'n_clusters': model.n_clusters}
+            results, errors, models = train_models(
+                app_module.load_student_features(), [MODEL_NAME], model_options={MODEL_NAME: options}
+            )
+            assert results == {MODEL_NAME: True} and errors == []
+            assert len(searches) == 1
+            assert models[MODEL_NAME].n_clusters == model.n_clusters
+            assert models[MODEL_NAME].k_source == 'preset'
+
+            # 数据版本变化后重新选择
+            assert 'train' not in app_module._model_train_options(MODEL_NAME, 'next-version')
+        finally:
+            # 恢复按样本量分档训练的模型
+            app_module.mark_data_changed()
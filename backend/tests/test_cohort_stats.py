@@ -0,0 +1,45 @@
+"""
+汇总统计物化表测试：GET 请求不写表，并发创建汇总行时不报错
+"""
+
+
+def _row(app_module):
+    return app_module.db.session.get(app_module.CohortStat, app_module.COHORT_STATS_KEY)
+
+
+def test_stale_stats_are_computed_without_writing(app_module):
+    with app_module.app.app_context():
+        expected = app_module._query_admin_aggregates()
+        row = _row(app_module)
+        row.data_version = 'stale'
+        row.user_count = -1
+        app_module.db.session.commit()
+        try:
+            assert app_module._query_admin_aggregates() == expected
+            app_module.db.session.expire_all()
+            assert _row(app_module).data_version == 'stale'
+        finally:
+            app_module.refresh_cohort_stats()
+        assert app_module.check_cohort_stats() == []
+
+
+def test_concurrent_insert_of_stats_row(app_module, monkeypatch):
+    with app_module.app.app_context():
+        # 模拟另一个进程已插入汇总行、本进程读取时还看不到的情况
+        session = app_module.db.session
+        original_get = session.get
+        calls = []
+
+        def get_missing_once(model, key, *args, **kwargs):
+            calls.append(key)
+            if len(calls) == 1:
+                return None
+            return original_get(model, key, *args, **kwargs)
+
+        monkeypatch.setattr(session, 'get', get_missing_once)
+        row = app_module.refresh_cohort_stats()
+        monkeypatch.undo()
+
+        assert len(calls) == 2
+        assert row.data_version == app_module.get_data_version()
+        assert app_module.check_cohort_stats() == []
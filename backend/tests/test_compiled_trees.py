@@ -0,0 +1,74 @@
+"""
+树模型数组化推理一致性测试：展平后的节点数组（ml_services/compiled_trees.py）与 sklearn 的输出逐位比较
+孤立森林的展平依赖 sklearn 的私有属性（_decision_path_lengths、_average_path_length_per_tree），
+升级 sklearn 后由本测试发现不兼容
+"""
+
+import logging
+
+import numpy as np
+import pytest
+from sklearn.tree import DecisionTreeRegressor
+
+from ml_services import GradePredictionModel, AnomalyDetector, StudentFeatures, compile_trees
+from ml_services.compiled_trees import COMPILED_MAX_ROWS
+from benchmark_features import generate_users
+from benchmark_incremental import generate_correlated_users
+
+SIZE = 2000
+
+
+def assert_identical(sklearn_func, compiled_func, X):
+    """整批和逐行比较（批量不超过 COMPILED_MAX_ROWS，保证走节点数组的计算路径）"""
+    X = X[:COMPILED_MAX_ROWS]
+    assert np.array_equal(sklearn_func(X), compiled_func(X))
+    for i in range(min(len(X), 100)):
+        assert np.array_equal(sklearn_func(X[i:i + 1]), compiled_func(X[i:i + 1]))
+
+
+@pytest.fixture(scope='module')
+def features():
+    # 生成数据中的空值会触发大量特征告警
+    logging.disable(logging.WARNING)
+    try:
+        yield StudentFeatures.compute(generate_correlated_users(SIZE), 'test')
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def _scaled_features(model, features):
+    X, _ = model.prepare_features(features)
+    return model.scaler.transform(X)
+
+
+def test_random_forest(features):
+    model = GradePredictionModel()
+    assert model.train_model(features)
+    assert_identical(model.model.predict, model.compiled.predict, _scaled_features(model, features))
+
+
+def test_decision_tree(features):
+    # 中型数据集使用决策树
+    model = GradePredictionModel()
+    assert model.train_model(features.select(features.user_ids[:40]))
+    assert isinstance(model.model, DecisionTreeRegressor)
+    tree = compile_trees(model.model)
+    assert_identical(model.model.predict, tree.predict, _scaled_features(model, features))
+
+
+def test_random_forest_after_update(features):
+    # 增量更新换算已有树的分裂阈值并新增树，重新展平后仍与 sklearn 一致
+    model = GradePredictionModel()
+    assert model.train_model(features.select(features.user_ids[:1500]))
+    tree_count = len(model.model.estimators_)
+    assert model.update_model(features)
+    assert len(model.model.estimators_) > tree_count
+    assert_identical(model.model.predict, model.compiled.predict, _scaled_features(model, features))
+
+
+def test_isolation_forest(features):
+    detector = AnomalyDetector()
+    assert detector.train_model(StudentFeatures.compute(generate_users(SIZE), 'test'))
+    X = _scaled_features(detector, features)
+    assert_identical(detector.model.decision_function, detector.compiled.decision_function, X)
+    assert_identical(detector.model.predict, detector.compiled.predict_labels, X)
@@ -0,0 +1,87 @@
+"""
+数据导入接口测试：每个工作表由对应的导入器按实际数据来源调用一次 mark_data_changed，接口本身不再重复调用
+只新增数据、不影响特征的工作表导入后不更新改写版本，汇总统计只刷新该数据来源影响的部分
+"""
+
+import io
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('openpyxl')
+
+NEW_STUDENTS = ['20239901', '20239902']
+
+
+def _exam_workbook():
+    """生成只含考试统计工作表的 Excel 文件：前3行为表头说明，第1、2、7列为姓名、学号、成绩"""
+    rows = [['姓名', '学号', '', '', '', '', '成绩']]
+    rows += [[f'新生{i}', student_id, '', '', '', '', 80 + i] for i, student_id in enumerate(NEW_STUDENTS)]
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        pd.DataFrame(rows).to_excel(writer, sheet_name='考试统计', header=False, index=False, startrow=3)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.fixture
+def import_exam_sheet(app_module, client, auth_headers):
+    """通过接口上传考试统计工作表，测试结束后删除导入的记录"""
+    def upload():
+        response = client.post(
+            '/api/import-data', headers=auth_headers('admin1'),
+            data={'file': (_exam_workbook(), 'exam.xlsx')}, content_type='multipart/form-data'
+        )
+        assert response.status_code == 200
+        assert response.get_json()['results'] == [{'sheet': '考试统计', 'success': True, 'message': '导入成功'}]
+        return response
+
+    yield upload
+    with app_module.app.app_context():
+        app_module.ExamStatistic.query.filter(app_module.ExamStatistic.id.in_(NEW_STUDENTS)).delete()
+        app_module.db.session.commit()
+        app_module.mark_data_changed('exam_statistic')
+
+
+def test_import_marks_data_changed_once(app_module, import_exam_sheet, monkeypatch):
+    sources = []
+    original = app_module.refresh_feature_store
+
+    def refresh_feature_store(source=None, previous_version=None):
+        sources.append(source)
+        return original(source, previous_version)
+
+    monkeypatch.setattr(app_module, 'refresh_feature_store', refresh_feature_store)
+    with app_module.app.app_context():
+        data_version = app_module.get_data_version()
+
+    import_exam_sheet()
+    assert sources == ['exam_statistic']
+    with app_module.app.app_context():
+        assert app_module.get_data_version() != data_version
+        assert app_module.ExamStatistic.query.filter(app_module.ExamStatistic.id.in_(NEW_STUDENTS)).count() == 2
+
+
+def test_add_only_import_keeps_rewrite_version(app_module, import_exam_sheet):
+    # 考试统计不影响特征，导入后已训练的模型仍可增量更新
+    with app_module.app.app_context():
+        rewrite_version = app_module.get_rewrite_version()
+    import_exam_sheet()
+    with app_module.app.app_context():
+        assert app_module.get_rewrite_version() == rewrite_version
+        assert int(app_module.get_data_version()) > int(rewrite_version)
+
+
+def test_import_refreshes_only_affected_cohort_sections(app_module, import_exam_sheet, monkeypatch):
+    computed = []
+    original = app_module._compute_cohort_sections
+
+    def compute_cohort_sections(sections):
+        computed.append(tuple(sections))
+        return original(sections)
+
+    monkeypatch.setattr(app_module, '_compute_cohort_sections', compute_cohort_sections)
+    import_exam_sheet()
+    assert computed == [('exam',)]
+    with app_module.app.app_context():
+        assert app_module.check_cohort_stats() == []
@@ -0,0 +1,72 @@
+"""
+特征引擎一致性测试：列式特征引擎与改造前逐用户计算的参照实现（benchmark_features.py）逐位比较；
+从预先计算的特征中选取部分学生与只对这些学生计算的结果相同
+"""
+
+import numpy as np
+import pytest
+
+from ml_services.feature_engine import FEATURE_SETS as FEATURE_SETS_BY_NAME, StudentColumns, StudentFeatures
+from benchmark_features import FEATURE_SETS, generate_users
+
+
+def assert_identical(expected, actual):
+    """逐位比较两个实现的输出（数组按形状和数值比较，NaN 视为相等）"""
+    assert len(expected) == len(actual)
+    for left, right in zip(expected, actual):
+        if isinstance(left, np.ndarray):
+            left = left.reshape(len(left), -1)
+            right = np.asarray(right).reshape(len(right), -1)
+            assert left.shape == right.shape
+            assert np.array_equal(left, right, equal_nan=True)
+        else:
+            assert list(left) == list(right)
+
+
+@pytest.fixture(scope='module')
+def synthetic_users():
+    return generate_users(3000)
+
+
+@pytest.mark.parametrize('label, legacy, engine', FEATURE_SETS, ids=[label for label, _, _ in FEATURE_SETS])
+def test_engine_matches_legacy_on_synthetic_users(synthetic_users, label, legacy, engine):
+    expected = legacy(synthetic_users)
+    assert_identical(expected, engine(synthetic_users))
+    # 传入预先构建的列式数据与传入用户对象结果相同
+    assert_identical(expected, engine(StudentColumns.from_users(synthetic_users)))
+
+
+@pytest.mark.parametrize('label, legacy, engine', FEATURE_SETS, ids=[label for label, _, _ in FEATURE_SETS])
+def test_engine_matches_legacy_on_database_profiles(app_module, label, legacy, engine):
+    with app_module.app.app_context():
+        users = app_module.load_student_profiles()
+        columns = app_module.load_student_columns()
+    assert users
+    assert_identical(legacy(users), engine(users))
+    assert_identical(legacy(users), engine(columns))
+
+
+def test_select_matches_features_computed_on_subset(synthetic_users):
+    features = StudentFeatures.compute(synthetic_users)
+    rng = np.random.default_rng(0)
+    picked = [synthetic_users[row] for row in sorted(rng.choice(len(synthetic_users), 200, replace=False))]
+    expected = StudentFeatures.compute(picked)
+
+    # 传入顺序打乱、含重复和不存在的学号，结果仍按原有顺序
+    student_ids = [user.id for user in picked]
+    selected = features.select(student_ids[::-1] + student_ids[:5] + ['missing'])
+    assert selected.user_ids == expected.user_ids
+    for name in FEATURE_SETS_BY_NAME:
+        assert_identical(expected.get(name), selected.get(name))
+
+    # 逐个选取单个学生，与从全部学生的结果中按学号筛选一致（不在某个特征组中的学生该组为空）
+    for user in picked[:20]:
+        selected = features.select([user.id])
+        for name in FEATURE_SETS_BY_NAME:
+            *arrays, user_ids = features.get(name)
+            keep = [row for row, user_id in enumerate(user_ids) if user_id == user.id]
+            *selected_arrays, selected_ids = selected.get(name)
+            assert selected_ids == [user_ids[row] for row in keep]
+            for array, selected_array in zip(arrays, selected_arrays):
+                assert np.array_equal(array[keep], selected_array, equal_nan=True)
+    assert len(features.select([])) == 0
@@ -0,0 +1,104 @@
+"""
+成绩模拟接口测试：grid / scenarios 参数校验，超出范围的参数返回400、改变后的作业成绩和预测成绩限制在0到100之间；
+模型已提供服务、需要增量更新或 worker 刚启动时，每次模拟都只查询一次数据库
+"""
+
+import numpy as np
+import pytest
+
+from ml_services import FeatureStore
+from ml_services.grade_simulation import perturb_columns, MAX_SCENARIOS
+
+STUDENT_ID = '20230002'
+
+
+def _simulate(client, headers, **body):
+    return client.post('/api/ml/simulate-grade', headers=headers, json={'student_id': STUDENT_ID, **body})
+
+
+def test_grid_expands_to_scenarios(client, auth_headers):
+    grid = {'completed_homework': [0, 1, 2], 'extra_watch_time': [0, 60]}
+    response = _simulate(client, auth_headers(STUDENT_ID), grid=grid)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['axes'] == grid
+    assert [(item['completed_homework'], item['extra_watch_time']) for item in data['scenarios']] == [
+        (0, 0), (0, 60), (1, 0), (1, 60), (2, 0), (2, 60)
+    ]
+    # 不做改变的情景与基准成绩相同
+    assert data['scenarios'][0]['predicted_score'] == data['baseline_score']
+    assert data['scenarios'][0]['change'] == 0
+
+
+@pytest.mark.parametrize('body', [
+    {'grid': {}},
+    {'grid': []},
+    {'grid': {'extra_posts': []}},
+    {'grid': {'extra_posts': 3}},
+    {'grid': {'extra_posts': list(range(MAX_SCENARIOS + 1))}},
+    {'scenarios': []},
+    {'scenarios': [1]},
+    {'scenarios': [{'unknown_parameter': 1}]},
+    {'scenarios': [{'extra_posts': True}]},
+    {'scenarios': [{'extra_posts': '3'}]},
+    {'scenarios': [{'extra_posts': -1}]},
+    {'scenarios': [{'completed_homework': 9}]},
+    {'scenarios': [{'homework_score_delta': 101}]},
+    {'grid': {'completed_homework_score': [50, 120]}}
+])
+def test_invalid_parameters(client, auth_headers, body):
+    response = _simulate(client, auth_headers(STUDENT_ID), **body)
+    assert response.status_code == 400
+    assert response.get_json()['error']
+
+
+def test_missing_student(client, auth_headers):
+    response = client.post('/api/ml/simulate-grade', headers=auth_headers(), json={
+        'student_id': 'unknown', 'scenarios': [{'extra_posts': 1}]
+    })
+    assert response.status_code == 404
+
+
+def test_values_are_clamped(app_module, client, auth_headers):
+    with app_module.app.app_context():
+        columns = app_module.load_student_columns([STUDENT_ID])
+    scenarios = [{'homework_score_delta': 100}, {'homework_score_delta': -100}, {'completed_homework': 8}]
+    homework = perturb_columns(columns, scenarios).homework
+    assert homework.min() >= 0 and homework.max() <= 100
+    # 已有的有效作业成绩加满后为100，减到底后为0；补交作业只填补缺交的作业
+    valid = np.nan_to_num(columns.homework[0]) > 0
+    assert (homework[0][valid] == 100).all()
+    assert (homework[1][valid] == 0).all()
+    assert (homework[2] > 0).all()
+
+    response = _simulate(client, auth_headers(STUDENT_ID), scenarios=scenarios + [{'extra_watch_time': 100000}])
+    assert response.status_code == 200
+    for item in response.get_json()['scenarios']:
+        assert 0 <= item['predicted_score'] <= 100
+
+
+def _assert_single_query(client, headers, count_queries):
+    with count_queries() as statements:
+        response = _simulate(client, headers, grid={'extra_posts': [0, 5], 'extra_replies': [0, 5]})
+    assert response.status_code == 200
+    assert len(statements) == 1
+
+
+def test_single_query_per_simulation(app_module, client, auth_headers, count_queries, monkeypatch, tmp_path):
+    headers = auth_headers(STUDENT_ID)
+    assert _simulate(client, headers, scenarios=[{'extra_posts': 1}]).status_code == 200
+    # 模型已提供服务
+    _assert_single_query(client, headers, count_queries)
+
+    # 数据版本变化后模型需要增量更新，且特征存储尚未更新（如刷新失败）
+    with app_module.app.app_context():
+        app_module.mark_data_changed('exam_statistic')
+    monkeypatch.setattr(app_module, '_feature_store', FeatureStore(str(tmp_path / 'student_features.npz')))
+    assert app_module._get_current_model('prediction_model') is None
+    _assert_single_query(client, headers, count_queries)
+    assert app_module._get_current_model('prediction_model') is not None
+
+    # worker 刚启动，模型尚未加载
+    app_module._model_server.stop()
+    app_module._model_server = None
+    _assert_single_query(client, headers, count_queries)
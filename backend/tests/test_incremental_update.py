@@ -0,0 +1,74 @@
+"""
+模型增量更新测试：只新增学生时增量更新，已有学生的数据被修改后全量训练
+"""
+
+import pytest
+
+from ml_services import GradePredictionModel, LearningBehaviorClustering
+
+MODELS = [('prediction_model', GradePredictionModel), ('clustering_model', LearningBehaviorClustering)]
+
+
+@pytest.fixture
+def update_calls(monkeypatch):
+    """记录各模型 update_model 的调用次数"""
+    calls = []
+    for name, model_class in MODELS:
+        original = model_class.update_model
+
+        def recording(self, *args, name=name, original=original, **kwargs):
+            calls.append(name)
+            return original(self, *args, **kwargs)
+
+        monkeypatch.setattr(model_class, 'update_model', recording)
+    return calls
+
+
+def _served_models(app_module):
+    with app_module.app.app_context():
+        return {name: app_module._get_trained_model(name) for name, _ in MODELS}
+
+
+def _predicted_scores(app_module, model):
+    with app_module.app.app_context():
+        users = app_module.load_student_features()
+    return [model.predict_grade(users.select([student_id])) for student_id in users.user_ids[:10]]
+
+
+def test_changed_rows_trigger_full_training(app_module, update_calls):
+    db = app_module.db
+    before = _served_models(app_module)
+    scores_before = _predicted_scores(app_module, before['prediction_model'])
+    with app_module.app.app_context():
+        db.session.query(app_module.SynthesisGrade).update(
+            {'comprehensive_score': app_module.SynthesisGrade.comprehensive_score / 2}, synchronize_session=False
+        )
+        db.session.commit()
+        app_module.mark_data_changed('synthesis_grades')
+    try:
+        after = _served_models(app_module)
+        assert update_calls == []
+        # 综合成绩减半后重新训练的模型预测结果随之变化
+        assert _predicted_scores(app_module, after['prediction_model']) != scores_before
+        with app_module.app.app_context():
+            data_version = app_module.get_data_version()
+            for name, _ in MODELS:
+                assert app_module._get_model_registry().get_entry(name)['data_version'] == data_version
+    finally:
+        with app_module.app.app_context():
+            db.session.query(app_module.SynthesisGrade).update(
+                {'comprehensive_score': app_module.SynthesisGrade.comprehensive_score * 2}, synchronize_session=False
+            )
+            db.session.commit()
+            app_module.mark_data_changed('synthesis_grades')
+
+
+def test_added_students_update_incrementally(app_module, update_calls):
+    _served_models(app_module)
+    with app_module.app.app_context():
+        for i in range(3):
+            app_module.db.session.add(app_module.User(id=f'2024{i:04d}', name='新生', password='x', phone_number='1'))
+        app_module.db.session.commit()
+        app_module.mark_data_changed('users')
+    _served_models(app_module)
+    assert sorted(update_calls) == sorted(name for name, _ in MODELS)
@@ -0,0 +1,34 @@
+"""
+学习路径测试：目标分数0是有效目标；学习表现分析中没有有效综合成绩（overall_score 为None）时按当前0分计算
+"""
+
+from ml_services import PersonalizedRecommendation
+
+STUDENT_ID = '20230005'
+
+
+def test_zero_target(client, auth_headers):
+    response = client.post('/api/ml/learning-path', headers=auth_headers(STUDENT_ID), json={
+        'student_id': STUDENT_ID, 'target_scores': [0, 90]
+    })
+    assert response.status_code == 200
+    data = response.get_json()
+    paths = data['learning_paths']
+    assert [path['target_score'] for path in paths] == [0, 90]
+    assert paths[0]['score_gap'] == -data['current_score']
+
+    # 未指定目标时以当前成绩加10分为目标
+    response = client.post('/api/ml/learning-path', headers=auth_headers(STUDENT_ID), json={'student_id': STUDENT_ID})
+    assert response.get_json()['learning_paths'][0]['target_score'] == data['current_score'] + 10
+
+
+def test_missing_overall_score(app_module):
+    recommender = PersonalizedRecommendation()
+    with app_module.app.app_context():
+        analysis = recommender._analyze_user_performance(app_module.load_student_profile(STUDENT_ID))
+    analysis['overall_score'] = None
+
+    paths = recommender.get_learning_path_recommendations(None, [None, 0, 75], analysis)
+    assert paths is not None
+    assert [path['target_score'] for path in paths] == [10, 0, 75]
+    assert [path['score_gap'] for path in paths] == [10, 0, 75]
@@ -0,0 +1,69 @@
+"""
+模型注册表测试：多个进程同时保存不同模型时不会覆盖彼此的清单条目；注册表不持有已保存或已加载的模型对象
+"""
+
+import gc
+import weakref
+import multiprocessing
+
+import pytest
+
+from ml_services import ModelRegistry
+
+PROCESSES = 4
+SAVES_PER_PROCESS = 20
+
+
+class FileModel:
+    """只写入一个小文件的模型，用于测试清单更新"""
+
+    def __init__(self, value=None):
+        self.value = value
+
+    def save_model(self, filepath, mmap=False):
+        with open(filepath, 'w') as f:
+            f.write(str(self.value))
+        return True
+
+    def load_model(self, filepath, mmap_mode=None):
+        with open(filepath) as f:
+            self.value = f.read()
+        return True
+
+
+def _save_repeatedly(root_dir, name):
+    registry = ModelRegistry(root_dir, keep_versions=2)
+    for i in range(SAVES_PER_PROCESS):
+        assert registry.save(name, FileModel(f'{name}-{i}'), 'test')
+
+
+def test_concurrent_saves_from_processes(tmp_path):
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        pytest.skip('需要 fork 启动方式')
+    ctx = multiprocessing.get_context('fork')
+    names = [f'model_{i}' for i in range(PROCESSES)]
+    processes = [ctx.Process(target=_save_repeatedly, args=(str(tmp_path), name)) for name in names]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0] * PROCESSES
+
+    registry = ModelRegistry(str(tmp_path))
+    assert sorted(registry.read_manifest()) == names
+    for name in names:
+        assert registry.load(name, FileModel).value == f'{name}-{SAVES_PER_PROCESS - 1}'
+
+
+def test_registry_keeps_no_model_objects(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    model = FileModel('saved')
+    registry.save('model', model, 'test')
+    saved = weakref.ref(model)
+    del model
+    gc.collect()
+    assert saved() is None
+
+    first = registry.load('model', FileModel)
+    assert first.value == 'saved'
+    assert registry.load('model', FileModel) is not first
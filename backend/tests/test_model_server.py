@@ -0,0 +1,117 @@
+"""
+模型热更新测试：多个请求线程持续使用模型，同时其他线程保存新版本并调用 refresh / publish，检查：
+- 切换过程中所有请求都成功，没有加载失败
+- 每个新版本在限定时间内完成切换，较旧的版本不会覆盖较新的版本
+- 切换完成后的请求都使用最新版本
+注册表只保留 1 个版本，旧版本文件在切换后立即被删除，处理中的请求仍使用已映射的旧模型
+"""
+
+import time
+import logging
+import threading
+
+import numpy as np
+import pytest
+
+from ml_services import GradePredictionModel, ModelRegistry, ModelServer, StudentFeatures
+from benchmark_incremental import generate_correlated_users
+
+MODEL_NAME = 'prediction_model'
+VERSIONS = 4
+REQUEST_THREADS = 4
+# 单个版本从保存到完成切换允许的最长时间（秒）
+MAX_SWAP_SECONDS = 5.0
+
+
+@pytest.fixture(scope='module')
+def trained_models():
+    """预先训练若干个模型，每个使用随机抽取的一半学生"""
+    logging.disable(logging.WARNING)
+    try:
+        features = StudentFeatures.compute(generate_correlated_users(600), 'test')
+        rng = np.random.default_rng(0)
+        models = []
+        for _ in range(VERSIONS):
+            model = GradePredictionModel()
+            assert model.train_model(features.select(rng.choice(features.user_ids, len(features) // 2, replace=False)))
+            models.append(model)
+        yield features, models
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def test_concurrent_refresh_and_publish(tmp_path, trained_models):
+    features, models = trained_models
+    registry = ModelRegistry(str(tmp_path), keep_versions=1, mmap_mode='r')
+    registry.save(MODEL_NAME, models[0], 'test')
+    server = ModelServer(registry, {MODEL_NAME: GradePredictionModel}, poll_interval=0.05)
+    assert server.refresh() == [MODEL_NAME]
+
+    batch = features.select(features.user_ids[:100])
+    stats = {'requests': 0, 'errors': [], 'versions': set()}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def run_requests():
+        while not stop.is_set():
+            entry, model = server.get(MODEL_NAME)
+            try:
+                results, skipped = model.predict_grades(batch)
+                error = None if len(results) + len(skipped) == len(batch) else '预测结果数量不正确'
+            except Exception as e:
+                error = repr(e)
+            with lock:
+                stats['requests'] += 1
+                stats['versions'].add(entry['version'])
+                if error:
+                    stats['errors'].append(error)
+
+    def run_refresh():
+        while not stop.is_set():
+            server.refresh()
+
+    threads = [threading.Thread(target=run_requests) for _ in range(REQUEST_THREADS)]
+    threads += [threading.Thread(target=run_refresh) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    server.start()
+
+    try:
+        previous = registry.get_entry(MODEL_NAME)
+        for model in models[1:]:
+            entry = registry.save(MODEL_NAME, model, 'test')
+            saved_at = time.perf_counter()
+            # 保存方直接发布、后台检查线程和 refresh 线程同时从文件加载，较旧的版本同时被重复发布
+            publishers = [
+                threading.Thread(target=server.publish, args=(MODEL_NAME, entry, model)),
+                threading.Thread(target=server.publish, args=(MODEL_NAME, previous, models[0]))
+            ]
+            for publisher in publishers:
+                publisher.start()
+            for publisher in publishers:
+                publisher.join()
+            while server.get(MODEL_NAME)[0]['version'] < entry['version']:
+                assert time.perf_counter() - saved_at < MAX_SWAP_SECONDS
+                time.sleep(0.001)
+            assert server.get(MODEL_NAME)[0]['version'] == entry['version']
+            previous = entry
+
+        # 切换完成后新请求都使用最新版本
+        time.sleep(0.1)
+        with lock:
+            stats['versions'] = set()
+        requests_before = stats['requests']
+        time.sleep(0.3)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        server.stop()
+
+    latest = registry.get_entry(MODEL_NAME)['version']
+    assert stats['errors'] == []
+    assert server.error_count == 0
+    assert stats['requests'] > requests_before
+    assert stats['versions'] == {latest}
+    assert server.get(MODEL_NAME)[0]['version'] == latest
+    assert server.status()['models'][MODEL_NAME]['version'] == latest
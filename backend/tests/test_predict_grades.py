@@ -0,0 +1,68 @@
+"""
+批量成绩预测接口测试：学号列表与 "all" 两种方式，不存在的学号列入 missing，没有综合成绩的学生列入 skipped；
+预测结果与单个预测接口一致
+"""
+
+import pytest
+
+NO_GRADE_STUDENT = '20239990'
+
+
+@pytest.fixture(scope='module')
+def student_without_grades(app_module):
+    """新增一名只有用户记录、没有综合成绩的学生"""
+    with app_module.app.app_context():
+        app_module.db.session.add(app_module.User(id=NO_GRADE_STUDENT, name='无成绩', password='x', phone_number='1'))
+        app_module.db.session.commit()
+        app_module.mark_data_changed('users')
+    yield NO_GRADE_STUDENT
+    with app_module.app.app_context():
+        app_module.db.session.delete(app_module.db.session.get(app_module.User, NO_GRADE_STUDENT))
+        app_module.db.session.commit()
+        app_module.mark_data_changed()
+
+
+def _predict(client, headers, student_ids):
+    response = client.post('/api/ml/predict-grades', headers=headers, json={'student_ids': student_ids})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_explicit_ids(app_module, client, auth_headers, student_without_grades):
+    headers = auth_headers('admin1')
+    student_ids = ['20230003', '20230001', 'unknown', student_without_grades, '20230001']
+    result = _predict(client, headers, student_ids)
+    assert [item['student_id'] for item in result['predictions']] == ['20230001', '20230003']
+    assert result['skipped'] == [student_without_grades]
+    assert result['missing'] == ['unknown']
+    assert result['feature_importance']
+
+    for item in result['predictions']:
+        single = client.post('/api/ml/predict-grade', headers=headers, json={'student_id': item['student_id']})
+        prediction = single.get_json()['prediction']
+        assert item['predicted_score'] == pytest.approx(prediction['predicted_score'])
+        assert item['confidence'] == prediction['confidence']
+
+
+def test_all_students(app_module, client, auth_headers, student_without_grades):
+    result = _predict(client, auth_headers('admin1'), 'all')
+    with app_module.app.app_context():
+        expected = {user.id for user in app_module.User.query.filter(app_module.User.role != 'admin')}
+    predicted = {item['student_id'] for item in result['predictions']}
+    assert predicted | set(result['skipped']) == expected
+    assert student_without_grades in result['skipped']
+    assert student_without_grades not in predicted
+    assert result['missing'] == []
+
+
+def test_only_unknown_ids(client, auth_headers):
+    result = _predict(client, auth_headers('admin1'), ['unknown'])
+    assert result['predictions'] == []
+    assert result['skipped'] == []
+    assert result['missing'] == ['unknown']
+
+
+@pytest.mark.parametrize('student_ids', [None, [], 'some', 42])
+def test_invalid_student_ids(client, auth_headers, student_ids):
+    response = client.post('/api/ml/predict-grades', headers=auth_headers('admin1'), json={'student_ids': student_ids})
+    assert response.status_code == 400
@@ -0,0 +1,46 @@
+"""
+学生画像加载器测试：面向学生的接口每次请求的 SQL 语句数
+每个接口先请求一次预热（排名索引、特征存储、模型和推荐表），再统计第二次请求的语句数
+"""
+
+import time
+
+import pytest
+
+STUDENT_ID = '20230001'
+
+
+def test_load_student_profile_single_query(app_module, count_queries):
+    with app_module.app.app_context():
+        with count_queries() as statements:
+            profile = app_module.load_student_profile(STUDENT_ID)
+    assert len(statements) == 1
+    assert profile.id == STUDENT_ID
+    assert profile.synthesis is not None and profile.homework is not None
+    assert profile.synthesis_grades == [profile.synthesis]
+
+
+def test_load_student_profile_missing_user(app_module):
+    with app_module.app.app_context():
+        assert app_module.load_student_profile('no-such-student') is None
+
+
+@pytest.mark.parametrize('method, path, body, expected', [
+    ('get', '/api/my-data', None, 1),
+    ('get', f'/api/chart-data?id={STUDENT_ID}', None, 1),
+    ('post', '/api/ml/predict-grade', {'student_id': STUDENT_ID}, 0),
+    ('post', '/api/ml/recommendations', {'student_id': STUDENT_ID}, 1),
+])
+def test_student_endpoint_query_count(app_module, client, auth_headers, count_queries, method, path, body, expected):
+    headers = auth_headers(STUDENT_ID)
+    request = getattr(client, method)
+    assert request(path, json=body, headers=headers).status_code == 200
+    # 排名索引在后台线程中重建，等待其完成，避免重建的查询计入下一次请求
+    deadline = time.time() + 10
+    while app_module._rank_index.rebuilding and time.time() < deadline:
+        time.sleep(0.01)
+
+    with count_queries() as statements:
+        response = request(path, json=body, headers=headers)
+    assert response.status_code == 200
+    assert len(statements) == expected, statements
@@ -0,0 +1,28 @@
+"""
+排名索引测试：并列成绩取相同名次，索引查询结果与 SQL 窗口函数的计算结果一致
+"""
+
+from services import RankIndex
+
+
+def test_tied_scores():
+    index = RankIndex()
+    index.rebuild([70, 90, 80, 90, 60, 90], 'v1')
+    assert [index.lookup(score)['rank'] for score in (90, 80, 70, 60)] == [1, 4, 5, 6]
+    assert index.lookup(90)['percentile'] == 100.0
+    assert index.lookup(80)['percentile'] == 50.0
+    # 不在索引中的成绩按严格高于它的人数计算
+    assert index.lookup(85) == {'rank': 4, 'percentile': 50.0, 'total': 6}
+    assert index.lookup(100)['rank'] == 1
+    assert RankIndex().lookup(80) == {'rank': 1, 'percentile': 0, 'total': 0}
+
+
+def test_matches_window_function(app_module):
+    with app_module.app.app_context():
+        grades = app_module.SynthesisGrade.query.all()
+        index = RankIndex()
+        index.rebuild([grade.comprehensive_score for grade in grades], 'test')
+        scores = [grade.comprehensive_score for grade in grades]
+        assert len(set(scores)) < len(scores), '测试数据中应有并列成绩'
+        for grade in grades:
+            assert index.lookup(grade.comprehensive_score) == app_module._query_rank_by_window_function(grade.id)
@@ -0,0 +1,43 @@
+"""
+个性化推荐表测试：不影响推荐的数据导入只更新整表版本标记，不改写推荐表中的各行
+"""
+
+STUDENT_ID = '20230001'
+
+
+def test_unaffected_import_only_restamps_table_version(app_module, client, auth_headers, count_queries):
+    headers = auth_headers(STUDENT_ID)
+    body = {'student_id': STUDENT_ID}
+    expected = client.post('/api/ml/recommendations', json=body, headers=headers).get_json()
+
+    with app_module.app.app_context():
+        with count_queries() as statements:
+            app_module.mark_data_changed('exam_statistic')
+        version = app_module.db.session.get(app_module.MaterializedVersion, app_module.RECOMMENDATIONS_VERSION_KEY)
+        assert version.data_version == app_module.get_data_version()
+    recommendation_writes = [
+        statement for statement in statements
+        if 'student_recommendations' in statement and not statement.lstrip().upper().startswith('SELECT')
+    ]
+    assert recommendation_writes == []
+
+    # 推荐表沿用到新数据版本，接口仍只需一条查询
+    with count_queries() as statements:
+        response = client.post('/api/ml/recommendations', json=body, headers=headers)
+    assert response.get_json() == expected
+    assert len(statements) == 1
+
+
+def test_stale_table_version_falls_back_to_single_student(app_module, client, auth_headers):
+    headers = auth_headers(STUDENT_ID)
+    body = {'student_id': STUDENT_ID}
+    expected = client.post('/api/ml/recommendations', json=body, headers=headers).get_json()
+    with app_module.app.app_context():
+        version = app_module.db.session.get(app_module.MaterializedVersion, app_module.RECOMMENDATIONS_VERSION_KEY)
+        current, version.data_version = version.data_version, 'stale'
+        app_module.db.session.commit()
+        try:
+            assert client.post('/api/ml/recommendations', json=body, headers=headers).get_json() == expected
+        finally:
+            version.data_version = current
+            app_module.db.session.commit()
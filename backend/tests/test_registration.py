@@ -0,0 +1,28 @@
+"""
+用户注册测试：注册只使学生名单相关的缓存失效，不更新数据版本
+"""
+
+from services import get_data_version, get_registration_version
+
+
+def test_register_keeps_data_version(app_module, client, auth_headers):
+    headers = auth_headers('admin1')
+    before = client.get('/api/admin-stats/summary', headers=headers).get_json()['data']['userCount']
+    data_version = get_data_version()
+    registration_version = get_registration_version()
+
+    response = client.post('/api/register', json={
+        'id': 'reg0001', 'name': '新同学', 'password': 'secret', 'phone_number': '13800000000'
+    })
+    assert response.status_code == 201
+
+    assert get_data_version() == data_version
+    assert get_registration_version() != registration_version
+    # 管理员看板缓存失效，学生数增量更新后与基础表一致
+    summary = client.get('/api/admin-stats/summary', headers=headers).get_json()['data']
+    assert summary['userCount'] == before + 1
+    with app_module.app.app_context():
+        assert app_module.check_cohort_stats() == []
+    # 搜索索引按学生名单版本重建，新学生可被搜索到
+    results = client.get('/api/admin-stats/search?q=新同学', headers=headers).get_json()
+    assert 'reg0001' in str(results)
@@ -0,0 +1,48 @@
+"""
+分析结果缓存测试：命中计数在进程内累加后批量写入；worker 重启后模型尚未加载时仍能命中缓存
+"""
+
+import sqlite3
+
+from services import ResultCache
+
+
+def _stored_stats(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute('SELECT endpoint, hits, misses FROM stats').fetchall()
+
+
+def test_hits_are_counted_in_process(tmp_path):
+    db_path = str(tmp_path / 'results.sqlite3')
+    cache = ResultCache(db_path, stats_flush_interval=3600)
+    cache.set('cluster-analysis', 'd1', 'm1', '{"ok": true}')
+    for _ in range(3):
+        assert cache.get('cluster-analysis', 'd1', 'm1') == '{"ok": true}'
+    assert cache.get('cluster-analysis', 'd2', 'm1') is None
+    assert cache.get('cluster-analysis', 'd1', None) is None
+
+    # 读取缓存不写入计数
+    assert _stored_stats(db_path) == []
+    stats = cache.stats()['cluster-analysis']
+    assert (stats['hits'], stats['misses'], stats['entries']) == (3, 2, 1)
+    assert _stored_stats(db_path) == [('cluster-analysis', 3, 2)]
+
+    # 其他 worker 的计数合并累加
+    other = ResultCache(db_path, stats_flush_interval=0)
+    other.get('cluster-analysis', 'd1', 'm1')
+    assert _stored_stats(db_path) == [('cluster-analysis', 4, 2)]
+
+
+def test_cold_worker_hits_cached_result(app_module, client, auth_headers):
+    headers = auth_headers('admin1')
+    response = client.get('/api/ml/cluster-analysis', headers=headers)
+    assert response.status_code == 200
+    assert client.get('/api/ml/cluster-analysis', headers=headers).headers['X-Cache'] == 'HIT'
+
+    # 模拟 worker 重启：新的模型热更新服务尚未加载任何模型
+    app_module._model_server.stop()
+    app_module._model_server = None
+    response = client.get('/api/ml/cluster-analysis', headers=headers)
+    assert response.status_code == 200
+    assert response.headers['X-Cache'] == 'HIT'
+    assert app_module._model_server.get('clustering_model') == (None, None)
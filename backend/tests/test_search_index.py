@@ -0,0 +1,33 @@
+"""
+学生搜索测试：n-gram 索引的匹配规则，以及管理员学生列表在宽泛查询词下的过滤方式
+"""
+
+from services import StudentSearchIndex
+
+
+def test_search_is_case_insensitive():
+    index = StudentSearchIndex()
+    index.rebuild([('S001', 'Alice Wang'), ('s002', 'BOB'), ('2023', '张伟')], 'v1')
+
+    assert index.search(id_term='s00') == ['S001', 's002']
+    assert index.search(name_term='alice') == ['S001']
+    assert index.search(name_term='bob') == ['s002']
+    assert index.search(name_term='张') == ['2023']
+    # 返回原始姓名而不是 casefold 后的值
+    assert index.search_any('WANG') == [('S001', 'Alice Wang')]
+
+
+def test_broad_admin_search_falls_back_to_like(app_module, client, auth_headers, monkeypatch):
+    headers = auth_headers('admin1')
+    url = '/api/admin-stats?sort_by=comprehensive_score&limit=500&search_id=2023'
+    expected = client.get(url, headers=headers).get_json()['data']['students']
+    assert len(expected) > 10
+
+    # 匹配数超过上限时不再生成 IN 列表，改用 LIKE 过滤，结果不变
+    monkeypatch.setattr(app_module, 'ADMIN_SEARCH_MAX_IDS', 10)
+    with app_module.app.test_request_context():
+        query = app_module._build_admin_student_query('2023', None)
+        assert ' IN ' not in str(query.statement)
+    app_module._admin_stats_cache.clear()
+    students = client.get(url, headers=headers).get_json()['data']['students']
+    assert students == expected
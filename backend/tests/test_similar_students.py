@@ -0,0 +1,52 @@
+"""
+相似学生接口测试：不在近邻索引中的学生用特征存储中的特征查询；补建索引时不修改正提供服务的模型对象
+"""
+
+import copy
+
+import pytest
+
+STUDENT_ID = '20230001'
+MODEL_NAME = 'clustering_model'
+
+
+@pytest.fixture
+def served_clustering(app_module, client, auth_headers):
+    """确保聚类模型已提供服务，测试结束后恢复原模型"""
+    assert client.get(f'/api/ml/similar-students/{STUDENT_ID}', headers=auth_headers(STUDENT_ID)).status_code == 200
+    server = app_module._get_model_server()
+    entry, model = server.get(MODEL_NAME)
+    yield server, entry, model
+    server.publish(MODEL_NAME, entry, model)
+
+
+def test_student_missing_from_index(app_module, client, auth_headers, served_clustering):
+    server, entry, model = served_clustering
+    expected = client.get(f'/api/ml/similar-students/{STUDENT_ID}', headers=auth_headers(STUDENT_ID)).get_json()
+
+    # 索引中不含该学生，模拟尚未参与增量更新的新增学生
+    with app_module.app.app_context():
+        features = app_module.load_student_features()
+    partial = copy.deepcopy(model)
+    partial.build_neighbor_index(features.select([user_id for user_id in features.user_ids if user_id != STUDENT_ID]))
+    assert partial.neighbor_index.position(STUDENT_ID) is None
+    server.publish(MODEL_NAME, entry, partial)
+
+    response = client.get(f'/api/ml/similar-students/{STUDENT_ID}', headers=auth_headers(STUDENT_ID))
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result['features'] == expected['features']
+    assert result['similar_students'] == expected['similar_students']
+
+
+def test_missing_index_is_built_on_a_copy(app_module, client, auth_headers, served_clustering):
+    server, entry, model = served_clustering
+    legacy = copy.deepcopy(model)
+    legacy.neighbor_index = None
+    server.publish(MODEL_NAME, entry, legacy)
+
+    response = client.get(f'/api/ml/similar-students/{STUDENT_ID}', headers=auth_headers(STUDENT_ID))
+    assert response.status_code == 200
+    assert legacy.neighbor_index is None
+    served = server.get(MODEL_NAME)[1]
+    assert served is not legacy and served.neighbor_index is not None
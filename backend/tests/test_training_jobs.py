@@ -0,0 +1,125 @@
+"""
+模型训练任务测试：提交后立即返回202和任务ID；同时提交的训练请求共用一个任务；
+任务状态依次为 pending → running → succeeded / failed；训练进程异常退出后任务被标记为失败
+"""
+
+import os
+import time
+import threading
+import subprocess
+import multiprocessing
+
+import pytest
+
+TERMINAL_STATUSES = ('succeeded', 'partial', 'failed')
+JOB_TIMEOUT = 120
+
+
+@pytest.fixture
+def job_store(app_module):
+    """测试结束后结束仍在进行的训练任务，避免影响后续提交"""
+    store = app_module._get_job_store()
+    yield store
+    with store._transaction() as conn:
+        conn.execute("UPDATE jobs SET status = 'failed' WHERE status IN ('pending', 'running')")
+
+
+def _submit(client, headers, **body):
+    response = client.post('/api/ml/train-models', headers=headers, json=body)
+    assert response.status_code == 202
+    return response.get_json()
+
+
+def _job(client, headers, job_id):
+    response = client.get(f'/api/ml/train-models/{job_id}', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()['job']
+
+
+def test_job_runs_to_completion(client, auth_headers, job_store):
+    headers = auth_headers('admin1')
+    submitted = _submit(client, headers)
+    assert submitted['job_id'] and submitted['status'] == 'pending' and submitted['mode'] == 'full'
+
+    statuses = ['pending']
+    deadline = time.time() + JOB_TIMEOUT
+    while statuses[-1] not in TERMINAL_STATUSES:
+        assert time.time() < deadline, '训练任务超时'
+        job = _job(client, headers, submitted['job_id'])
+        if job['status'] != statuses[-1]:
+            statuses.append(job['status'])
+        time.sleep(0.05)
+
+    # 状态只按 pending → running → 结束 的顺序推进（running 可能在两次查询之间就已结束）
+    assert statuses in (['pending', 'running', 'succeeded'], ['pending', 'succeeded'])
+    assert job['total_samples'] > 0 and job['elapsed'] is not None
+    assert all(state['status'] == 'succeeded' for state in job['models'].values())
+    assert job['results'] == {name: True for name in job['models']}
+    assert job['errors'] is None
+
+
+def test_concurrent_requests_share_one_job(app_module, client, auth_headers, job_store, monkeypatch):
+    started = []
+    monkeypatch.setattr(app_module, '_start_training_process', lambda job_id, mode: started.append(job_id))
+    headers = auth_headers('admin1')
+    barrier = threading.Barrier(4)
+    responses = []
+
+    def submit():
+        test_client = app_module.app.test_client()
+        barrier.wait()
+        responses.append(_submit(test_client, headers))
+
+    threads = [threading.Thread(target=submit) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({response['job_id'] for response in responses}) == 1
+    assert len(started) == 1 and started[0] == responses[0]['job_id']
+    assert [response['mode'] for response in responses].count('full') == 1
+    # 任务结束前再次提交仍返回同一任务
+    again = _submit(client, headers, mode='incremental')
+    assert again['job_id'] == started[0] and again['mode'] is None
+    assert len(started) == 1
+
+
+def test_failed_job(app_module, client, auth_headers, job_store, monkeypatch):
+    def fail(*args):
+        raise RuntimeError('特征存储不可用')
+
+    job, created = job_store.create(app_module.TRAINING_JOB_KIND, [name for name, _ in app_module.TRAINING_MODELS])
+    assert created
+    monkeypatch.setattr(app_module, 'load_student_features', fail)
+    app_module._run_training_job(job['id'])
+
+    job = _job(client, auth_headers('admin1'), job['id'])
+    assert job['status'] == 'failed'
+    assert job['started_at'] and job['finished_at']
+    assert job['errors'] == ['特征存储不可用']
+
+
+def test_dead_worker_is_reported_failed(app_module, client, auth_headers, job_store):
+    headers = auth_headers('admin1')
+    job, _ = job_store.create(app_module.TRAINING_JOB_KIND, ['prediction_model'])
+    process = subprocess.Popen(['sleep', '0'])
+    process.wait()
+    # 领取任务的进程已退出但未更新任务状态
+    job_store.start(job['id'], process.pid)
+    job = _job(client, headers, job['id'])
+    assert job['status'] == 'failed'
+    assert job['message'] == '任务进程异常退出'
+
+
+def test_crashed_training_process_is_reported_failed(app_module, client, auth_headers, job_store):
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        pytest.skip('需要 fork 启动方式')
+    headers = auth_headers('admin1')
+    job, _ = job_store.create(app_module.TRAINING_JOB_KIND, ['prediction_model'])
+    process = multiprocessing.get_context('fork').Process(target=os._exit, args=(3,))
+    process.start()
+    app_module._wait_training_process(process, job['id'])
+    job = _job(client, headers, job['id'])
+    assert job['status'] == 'failed'
+    assert job['message'] == '训练进程异常退出(exitcode=3)'
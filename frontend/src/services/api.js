@@ -52,6 +52,30 @@ export default {
     return apiClient.get('/api/admin-stats');
   },
 
+  // 游标分页获取学生列表，after 为上一页返回的 nextCursor
+  getAdminStatsPage(params = {}) {
+    return apiClient.get('/api/admin-stats', { params });
+  },
+
+  // 获取管理员数据看板汇总统计
+  getAdminSummary() {
+    return apiClient.get('/api/admin-stats/summary');
+  },
+
+  // 导出学生数据，format 为 csv 或 ndjson，其余参数与 getAdminStats 相同
+  exportAdminStudents(params = {}) {
+    return apiClient.get('/api/admin-stats/export', {
+      params,
+      responseType: 'blob',
+      timeout: 0
+    });
+  },
+
+  // 按学号或姓名搜索学生，match 为 substring（默认）或 prefix
+  searchStudents(q, params = {}) {
+    return apiClient.get('/api/admin-stats/search', { params: { q, ...params } });
+  },
+
   // 机器学习相关接口
   // 成绩预测
   predictGrade(studentId) {
@@ -60,6 +84,13 @@ export default {
     });
   },
 
+  // 批量成绩预测，studentIds 为学号数组或 'all'
+  predictGrades(studentIds = 'all') {
+    return apiClient.post('/api/ml/predict-grades', {
+      student_ids: studentIds
+    });
+  },
+
   // 学习行为聚类分析
   getClusterAnalysis() {
     return apiClient.get('/api/ml/cluster-analysis');
@@ -78,10 +109,16 @@ export default {
   },
 
   // 训练所有ML模型
+  // 提交模型训练任务，返回 job_id，训练在后台进行
   trainMLModels() {
     return apiClient.post('/api/ml/train-models');
   },
 
+  // 查询模型训练任务进度
+  getTrainingJob(jobId) {
+    return apiClient.get(`/api/ml/train-models/${jobId}`);
+  },
+
   // 数据导入接口
   importData(formData) {
     return apiClient.post('/api/import-data', formData, {